@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import config
+from db import User, create_database_engine
+from cache import CatalogCache
+from session import MusicSession
+from blob_store import LocalBlobStore
+from generator import WORDS, generate_catalog
+
+# сравниваемые конфигурации: название -> (профиль подключения, вывод SQL-запросов)
+CONFIGURATIONS = {
+    'baseline': ('default', True),  # прежняя конфигурация: настройки SQLite по умолчанию и echo=True
+    'default': ('default', False),
+    'tuned': ('tuned', False),
+}
+
+
+def measure(function, repeat: int) -> float:
+    """Время выполнения функции repeat раз (в мс)."""
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_operations(session: MusicSession, tracks: int) -> dict:
+    """Замер времени типичных операций (кэш каталога отключён)."""
+
+    rng = random.Random(1)
+    artists = max(1, tracks // 100)
+    results = {}
+
+    def walk_listing(pages=100):
+        after_id = None
+        for _ in range(pages):
+            rows = session.get_track_listing(after_id=after_id, limit=session.PAGE_SIZE)
+            if len(rows) == 0:
+                break
+            after_id = rows[-1].id
+
+    def open_session():
+        with Session(session.engine) as orm_session:
+            orm_session.execute(select(1))
+
+    results['track_listing_100_pages'] = measure(walk_listing, 1)
+    results['sorted_artist_pages_x20'] = measure(lambda: session.get_artists_page(limit=100, sort_key='name'), 20)
+    results['artist_albums_x500'] = measure(lambda: session.get_albums(rng.randrange(1, artists + 1)), 500)
+    results['search_x200'] = measure(lambda: session.search(rng.choice(WORDS)), 200)
+    results['session_open_x2000'] = measure(open_session, 2000)
+    results['add_genre_x300'] = measure(lambda: session.add_genre(f'New genre {rng.random()}'), 300)
+
+    return {name: round(value, 1) for name, value in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение профилей подключения к SQLite на синтетическом каталоге')
+    parser.add_argument('--tracks', type=int, default=100_000, help='количество композиций в каталоге')
+    args = parser.parse_args()
+
+    results = {'tracks': args.tracks, 'configurations': {}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        # на исполнителя приходится 10 альбомов, на альбом - 10 композиций
+        template = os.path.join(directory, 'template.db')
+        engine = create_database_engine(f'sqlite:///{template}', 'default')
+        generate_catalog(engine, LocalBlobStore(os.path.join(directory, 'audio')), max(1, args.tracks // 100))
+        engine.dispose()
+
+        for name, (profile, echo) in CONFIGURATIONS.items():
+            # режим журнала WAL сохраняется в файле БД, поэтому каждая конфигурация получает свою копию
+            path = os.path.join(directory, f'{name}.db')
+            shutil.copy(template, path)
+
+            config.SQL_ECHO = echo
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                session = MusicSession(f'sqlite:///{path}', blob_store=LocalBlobStore(os.path.join(directory, 'audio')),
+                                       engine_profile=profile)
+                session.cache = CatalogCache(max_size=0)
+                session.user = User(is_admin=True)
+
+                results['configurations'][name] = run_operations(session, args.tracks)
+            session.engine.dispose()
+
+    baseline = results['configurations']['baseline']
+    tuned = results['configurations']['tuned']
+    results['speedup_tuned_vs_baseline'] = {
+        operation: round(baseline[operation] / tuned[operation], 2) if tuned[operation] else None
+        for operation in baseline
+    }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import os
+import sys
+import random
+import hashlib
+import secrets
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert, Engine
+
+import migrations
+import passwords
+from db import Base, User, Track, Album, Artist, Genre, track_to_genre, create_database_engine
+from blob_store import LocalBlobStore
+
+# кадр MPEG 1 Layer III, 128 кбит/с, 44100 Гц, стерео: длина кадра 417 байт, 1152 отсчёта
+MP3_FRAME_HEADER = bytes((0xFF, 0xFB, 0x90, 0x00))
+MP3_FRAME_LENGTH = 417
+MP3_FRAMES_PER_SECOND = 44100 / 1152
+
+# учётные записи синтетического каталога: логин -> (пароль, администратор)
+USERS = {
+    'admin': ('admin-password', True),
+    'user': ('user-password', False),
+}
+
+WORDS = ('Blue', 'Night', 'River', 'Fire', 'Silent', 'Golden', 'Electric', 'Broken', 'Summer', 'Dream',
+         'Shadow', 'Ocean', 'Wild', 'Heart', 'Stone', 'Light', 'Storm', 'Velvet', 'Echo', 'Winter')
+
+
+class CatalogSize(NamedTuple):
+    """Размер синтетического каталога."""
+
+    artists: int
+    albums: int
+    tracks: int
+    genres: int
+    audio_files: int
+
+
+def synthetic_mp3(seconds: float, rng: random.Random) -> bytes:
+    """Создание MP3-файла заданной длительности из кадров со случайным содержимым.
+
+    Заголовки кадров корректны, поэтому длительность и битрейт файла
+    определяются mp3.read_mp3_info, а содержимое различается для разных rng."""
+
+    frames = max(2, round(seconds * MP3_FRAMES_PER_SECOND))
+    payload = rng.randbytes(MP3_FRAME_LENGTH - len(MP3_FRAME_HEADER))
+    frame_data = bytearray()
+    for i in range(frames):
+        # первые байты содержимого кадра различаются, чтобы файлы не совпадали по хешу
+        frame_data += MP3_FRAME_HEADER + i.to_bytes(4, 'big') + payload[4:]
+
+    return bytes(frame_data)
+
+
+def random_name(rng: random.Random, words: int) -> str:
+    """Случайное название из нескольких слов."""
+
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate_audio_files(blob_store: LocalBlobStore, count: int, references: list[int],
+                         rng: random.Random, seconds: float) -> list[dict]:
+    """Сохранение count синтетических аудиофайлов в локальное хранилище.
+
+    references[i] - количество композиций, ссылающихся на i-й файл (счётчик ссылок).
+    Возвращает сведения о файлах в формате столбцов таблицы композиций."""
+
+    audio_files = []
+    for i in range(count):
+        data = synthetic_mp3(seconds, rng)
+        sha256 = hashlib.sha256(data).hexdigest()
+        blob_id = secrets.token_hex(12)
+        filename = f'synthetic_{i}.mp3'
+
+        temp_path = os.path.join(blob_store.temp_dir, blob_id)
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(data)
+
+        blob_store.add_blob(blob_id, temp_path, {
+            'filename': filename,
+            'size': len(data),
+            'sha256': sha256,
+            'refcount': references[i],
+            'created_at': time.time()
+        })
+
+        audio_files.append({
+            'audio_id': blob_id,
+            'filename': filename,
+            'size': len(data),
+            'content_hash': sha256,
+            'duration': len(data) // MP3_FRAME_LENGTH / MP3_FRAMES_PER_SECOND,
+            'bitrate': 128
+        })
+
+    return audio_files
+
+
+def generate_catalog(engine: Engine, blob_store: LocalBlobStore, artists: int = 100, albums_per_artist: int = 10,
+                     tracks_per_album: int = 10, genres: int = 50, audio_files: int = 100,
+                     audio_seconds: float = 2.0, seed: int = 0) -> CatalogSize:
+    """Заполнение пустой БД и хранилища синтетическим каталогом.
+
+    При одинаковых параметрах и seed создаются одинаковые названия, связи и
+    содержимое аудиофайлов (различаются только ID файлов в хранилище).
+    Композиции ссылаются на audio_files файлов по кругу, как при загрузке
+    одинаковых файлов; каждой композиции назначается от одного до трёх жанров.
+    Также создаются учётные записи из USERS."""
+
+    rng = random.Random(seed)
+
+    Base.metadata.create_all(engine)
+    migrations.upgrade(engine)
+
+    albums = artists * albums_per_artist
+    tracks = albums * tracks_per_album
+    audio_files = max(1, min(audio_files, tracks))
+
+    references = [tracks // audio_files + (1 if i < tracks % audio_files else 0) for i in range(audio_files)]
+    audio_metadata = generate_audio_files(blob_store, audio_files, references, rng, audio_seconds)
+
+    created_at = datetime(2024, 1, 1)
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {'login': login, 'password_hash': passwords.hash_password(password), 'username': login,
+             'bio': '', 'is_admin': is_admin}
+            for login, (password, is_admin) in USERS.items()
+        ])
+
+        connection.execute(insert(Genre), [
+            {'id': i, 'name': f'{rng.choice(WORDS)} {i}', 'created_at': created_at}
+            for i in range(1, genres + 1)
+        ])
+
+        connection.execute(insert(Artist), [
+            {'id': i, 'name': f'{random_name(rng, 2)} {i}', 'description': random_name(rng, 8),
+             'created_at': created_at}
+            for i in range(1, artists + 1)
+        ])
+
+        connection.execute(insert(Album), [
+            {'id': i, 'name': f'{random_name(rng, 2)} {i}',
+             'release_date': date(1970, 1, 1) + timedelta(days=rng.randrange(20000)),
+             'artist_id': (i - 1) // albums_per_artist + 1, 'created_at': created_at}
+            for i in range(1, albums + 1)
+        ])
+
+        connection.execute(insert(Track), [
+            {'id': i, 'name': random_name(rng, rng.randint(1, 3)),
+             'album_id': (i - 1) // tracks_per_album + 1, 'created_at': created_at,
+             **audio_metadata[(i - 1) % audio_files]}
+            for i in range(1, tracks + 1)
+        ])
+
+        connection.execute(insert(track_to_genre), [
+            {'track_id': i, 'genre_id': genre_id}
+            for i in range(1, tracks + 1)
+            for genre_id in rng.sample(range(1, genres + 1), min(genres, rng.randint(1, 3)))
+        ])
+
+    return CatalogSize(artists, albums, tracks, genres, audio_files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Создание синтетического каталога для замеров производительности')
+    parser.add_argument('database', help='путь к создаваемому файлу БД SQLite')
+    parser.add_argument('blob_dir', help='каталог локального хранилища аудиофайлов')
+    parser.add_argument('--artists', type=int, default=100, help='количество исполнителей')
+    parser.add_argument('--albums-per-artist', type=int, default=10, help='количество альбомов у исполнителя')
+    parser.add_argument('--tracks-per-album', type=int, default=10, help='количество композиций в альбоме')
+    parser.add_argument('--genres', type=int, default=50, help='количество жанров')
+    parser.add_argument('--audio-files', type=int, default=100, help='количество различных аудиофайлов')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора случайных чисел')
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        parser.error(f'файл {args.database} уже существует')
+
+    engine = create_database_engine(f'sqlite:///{args.database}')
+    size = generate_catalog(engine, LocalBlobStore(args.blob_dir), args.artists, args.albums_per_artist,
+                            args.tracks_per_album, args.genres, args.audio_files, seed=args.seed)
+    engine.dispose()
+
+    print(size._asdict())
+
+
+if __name__ == '__main__':
+    main()
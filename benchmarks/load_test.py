@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from urllib.parse import urlsplit, quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generator import WORDS, generate_catalog
+
+# сценарии нагрузки: название -> вес (доля запросов)
+SCENARIOS = {
+    'list_tracks': 4,
+    'list_albums': 2,
+    'search': 2,
+    'audio_range': 2,
+    'audio_not_modified': 1,
+}
+
+
+def percentile(times: list[float], fraction: float) -> float:
+    """Значение, не превышаемое долей fraction отсортированных значений."""
+
+    return times[min(len(times) - 1, int(len(times) * fraction))]
+
+
+def summarize(times: list[float], duration: float) -> dict:
+    """Сводка по задержкам запросов (в мс) и пропускной способности."""
+
+    times = sorted(times)
+    if len(times) == 0:
+        return {'requests': 0}
+
+    return {
+        'requests': len(times),
+        'requests_per_s': round(len(times) / duration, 1),
+        'p50_ms': round(percentile(times, 0.5), 3),
+        'p99_ms': round(percentile(times, 0.99), 3),
+        'max_ms': round(times[-1], 3),
+    }
+
+
+class Connection:
+    """Соединение HTTP/1.1 с сервером, переиспользуемое для последовательных запросов."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Инициализация; соединение открывается при первом запросе."""
+
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, path: str, headers: dict = None, method: str = 'GET') -> tuple[int, dict, bytes]:
+        """Выполнение запроса; возвращает код ответа, заголовки и тело."""
+
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}']
+        lines.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+        try:
+            head = await self.reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            self.close()
+            raise ConnectionError('Сервер закрыл соединение')
+
+        head_lines = head.decode('latin-1').split('\r\n')
+        status = int(head_lines[0].split(' ')[1])
+        response_headers = {}
+        for line in head_lines[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                response_headers[name.strip().lower()] = value.strip()
+
+        body = b''
+        if method != 'HEAD' and status != 304:
+            body = await self.reader.readexactly(int(response_headers.get('content-length', 0)))
+
+        if response_headers.get('connection') == 'close':
+            self.close()
+
+        return status, response_headers, body
+
+    def close(self) -> None:
+        """Закрытие соединения."""
+
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def prepare_requests(host: str, port: int) -> dict:
+    """Сбор ID композиций и ETag их аудиофайлов для сценариев нагрузки."""
+
+    connection = Connection(host, port)
+
+    status, _, body = await connection.request('/tracks?limit=500')
+    if status != 200:
+        raise RuntimeError(f'Не удалось получить список композиций: код {status}')
+    tracks = [track for track in json.loads(body)['items'] if track['audio_id'] is not None]
+    if len(tracks) == 0:
+        raise RuntimeError('В каталоге нет композиций с аудиофайлами')
+
+    audio = []
+    for track in tracks[:50]:
+        status, headers, _ = await connection.request(f'/tracks/{track["id"]}/audio', method='HEAD')
+        if status == 200:
+            audio.append((track['id'], headers['etag'], int(headers['content-length'])))
+
+    connection.close()
+    return {'audio': audio}
+
+
+def scenario_request(name: str, data: dict, rng: random.Random) -> tuple[str, dict, int]:
+    """Путь, заголовки и ожидаемый код ответа для очередного запроса сценария."""
+
+    if name == 'list_tracks':
+        return f'/tracks?after_id={rng.randrange(0, 1000)}&limit=100', {}, 200
+    if name == 'list_albums':
+        return '/albums?limit=100&sort=name', {}, 200
+    if name == 'search':
+        return f'/search?q={quote(" ".join(rng.sample(WORDS, rng.randint(1, 2))))}', {}, 200
+
+    track_id, etag, size = rng.choice(data['audio'])
+    if name == 'audio_range':
+        start = rng.randrange(0, max(1, size - 64 * 1024))
+        return f'/tracks/{track_id}/audio', {'Range': f'bytes={start}-{start + 64 * 1024 - 1}'}, 206
+    return f'/tracks/{track_id}/audio', {'If-None-Match': etag}, 304
+
+
+async def run_load(host: str, port: int, concurrency: int, duration: float, seed: int) -> dict:
+    """Нагрузка сервера concurrency клиентами в течение duration секунд."""
+
+    data = await prepare_requests(host, port)
+    names = list(SCENARIOS)
+    weights = list(SCENARIOS.values())
+
+    times = {name: [] for name in names}
+    errors = {}
+    deadline = time.perf_counter() + duration
+
+    async def client(index: int) -> None:
+        rng = random.Random(seed + index)
+        connection = Connection(host, port)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            path, headers, expected_status = scenario_request(name, data, rng)
+
+            start = time.perf_counter()
+            try:
+                status, _, _ = await connection.request(path, headers)
+            except (ConnectionError, OSError) as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                connection.close()
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+
+            if status == expected_status:
+                times[name].append(elapsed)
+            else:
+                errors[f'HTTP {status}'] = errors.get(f'HTTP {status}', 0) + 1
+        connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'total': summarize([value for values in times.values() for value in values], elapsed),
+        'errors': errors,
+        'scenarios': {name: summarize(values, elapsed) for name, values in times.items()},
+    }
+
+
+def free_port() -> int:
+    """Выбор свободного TCP-порта."""
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60) -> None:
+    """Ожидание начала приёма соединений сервером."""
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Сервер завершился с кодом {process.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+
+    raise RuntimeError('Сервер не начал приём соединений')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочное тестирование HTTP-сервера каталога')
+    parser.add_argument('--url', help='адрес запущенного сервера (по умолчанию запускается сервер '
+                                      'с синтетическим каталогом и локальным хранилищем)')
+    parser.add_argument('--artists', type=int, default=20, help='количество исполнителей в синтетическом каталоге')
+    parser.add_argument('--concurrency', type=int, default=32, help='количество одновременных клиентов')
+    parser.add_argument('--duration', type=float, default=10, help='длительность нагрузки в секундах')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--output', help='файл для сохранения результатов (по умолчанию - stdout)')
+    args = parser.parse_args()
+
+    if args.url is not None:
+        url = urlsplit(args.url)
+        results = asyncio.run(run_load(url.hostname, url.port or 80, args.concurrency, args.duration, args.seed))
+    else:
+        from db import create_database_engine
+        from blob_store import LocalBlobStore
+
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, 'catalog.db')
+            blob_dir = os.path.join(directory, 'audio')
+
+            engine = create_database_engine(f'sqlite:///{database}')
+            generate_catalog(engine, LocalBlobStore(blob_dir), args.artists, seed=args.seed)
+            engine.dispose()
+
+            port = free_port()
+            environment = dict(os.environ)
+            environment.update({
+                'FREEMUSIC_DATABASE_URL': f'sqlite:///{database}',
+                'FREEMUSIC_BLOB_STORE': 'local',
+                'FREEMUSIC_BLOB_DIR': blob_dir,
+            })
+
+            # сервер работает в отдельном процессе, чтобы клиенты не конкурировали с ним за GIL
+            process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'server.py'), '--port', str(port)],
+                                       env=environment, stdout=subprocess.DEVNULL)
+            try:
+                wait_for_port(port, process)
+                results = asyncio.run(run_load('127.0.0.1', port, args.concurrency, args.duration, args.seed))
+            finally:
+                process.terminate()
+                process.wait()
+
+    output = json.dumps(results, indent=4, ensure_ascii=False)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import time
+
+START = time.perf_counter()  # замер начинается до импорта модулей приложения
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_first_frame() -> None:
+    """Запуск приложения и вывод времени до отображения первого кадра (в мс)."""
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+
+    from gui.app import App
+
+    app = App()
+
+    def on_first_frame():
+        print(json.dumps({'time_to_first_frame_ms': (time.perf_counter() - START) * 1000}))
+        app.destroy()
+
+    # окно считается отображённым, когда обработаны все отложенные задачи отрисовки
+    app.wait_visibility()
+    app.update_idletasks()
+    app.after_idle(on_first_frame)
+    app.mainloop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Измерение времени запуска приложения до первого кадра')
+    parser.add_argument('--runs', type=int, default=5, help='количество запусков')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_first_frame()
+        return
+
+    # каждый запуск выполняется в отдельном процессе, чтобы учитывать импорт модулей
+    times = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                                capture_output=True, text=True, check=True).stdout
+        # помимо результата в stdout может попасть журнал SQL-запросов
+        result_line = next(line for line in output.splitlines() if line.startswith('{"time_to_first_frame_ms"'))
+        times.append(json.loads(result_line)['time_to_first_frame_ms'])
+
+    print(json.dumps({
+        'runs': args.runs,
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        'max_ms': max(times)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
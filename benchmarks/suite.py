@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generator import USERS, generate_catalog, synthetic_mp3
+
+SEARCH_QUERIES = ('blue', 'night river', 'gold', 'storm heart', 'echo', 'wild fire', 'velvet', 'sil')
+
+
+def summarize(times: list[float]) -> dict:
+    """Сводка по времени выполнения отдельных вызовов (в мс)."""
+
+    times = sorted(times)
+    return {
+        'runs': len(times),
+        'min_ms': round(times[0], 3),
+        'median_ms': round(statistics.median(times), 3),
+        'p95_ms': round(times[min(len(times) - 1, int(len(times) * 0.95))], 3),
+        'max_ms': round(times[-1], 3),
+    }
+
+
+def time_calls(function, repeat: int, setup=None) -> dict:
+    """Замер времени repeat вызовов функции; setup вызывается перед каждым вызовом вне замера.
+
+    Функция получает номер вызова."""
+
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function(i)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return summarize(times)
+
+
+def check_result(result) -> None:
+    """Проверка результата метода сессии вида (успех, сообщение)."""
+
+    success, message = result
+    if not success:
+        raise RuntimeError(f'Операция завершилась ошибкой: {message}')
+
+
+def run_session_benchmarks(session, directory: str, repeat: int) -> dict:
+    """Замеры методов MusicSession на синтетическом каталоге.
+
+    Перед каждым вызовом кэш каталога очищается, поэтому замеряются обращения к БД."""
+
+    from cache import CatalogCache
+
+    rng = random.Random(1)
+    results = {}
+
+    def clear_cache():
+        session.cache = CatalogCache()
+
+    # вход в аккаунт включает проверку пароля bcrypt
+    password = USERS['admin'][0]
+    results['login'] = time_calls(lambda i: check_result(session.login('admin', password)), max(1, repeat // 5))
+
+    results['get_all_tracks'] = time_calls(lambda i: session.get_all_tracks(), max(1, repeat // 5), clear_cache)
+    results['get_track_listing_first_page'] = time_calls(
+        lambda i: session.get_track_listing(limit=session.PAGE_SIZE), repeat, clear_cache
+    )
+    results['get_track_listing_sorted_page'] = time_calls(
+        lambda i: session.get_track_listing(limit=session.PAGE_SIZE, sort_key='name'), repeat, clear_cache
+    )
+    results['get_all_albums'] = time_calls(lambda i: session.get_all_albums(), repeat, clear_cache)
+    results['get_all_artists'] = time_calls(lambda i: session.get_all_artists(), repeat, clear_cache)
+    results['get_all_genres'] = time_calls(lambda i: session.get_all_genres(), repeat, clear_cache)
+    results['search'] = time_calls(lambda i: session.search(SEARCH_QUERIES[i % len(SEARCH_QUERIES)]), repeat)
+
+    # добавление композиций с новыми аудиофайлами (включает сохранение файла в хранилище)
+    upload_dir = os.path.join(directory, 'uploads')
+    os.makedirs(upload_dir, exist_ok=True)
+    paths = []
+    for i in range(repeat):
+        path = os.path.join(upload_dir, f'upload_{i}.mp3')
+        with open(path, 'wb') as upload_file:
+            upload_file.write(synthetic_mp3(2.0, rng))
+        paths.append(path)
+
+    results['add_track'] = time_calls(
+        lambda i: check_result(session.add_track(f'Benchmark track {i}', paths[i], 1, (1, 2))), repeat
+    )
+
+    added_ids = [track.id for track in session.get_all_tracks() if track.name.startswith('Benchmark track ')]
+    results['delete_track'] = time_calls(lambda i: check_result(session.delete_track(added_ids[i])), len(added_ids))
+
+    session.log_out()
+    return results
+
+
+def measure_frames(repeat: int) -> None:
+    """Замер отрисовки виджетов основного окна (выполняется в дочернем процессе).
+
+    БД и хранилище задаются переменными окружения; результат выводится в stdout в формате JSON."""
+
+    os.chdir(ROOT)
+
+    from cache import CatalogCache
+    from gui.app import App
+
+    app = App()
+    app.session.wait_until_ready()
+    check_result(app.session.login('admin', USERS['admin'][0]))
+    app.show_main_frame()
+    app.update()
+
+    main_frame = app.main_frame
+    main_frame.search_query.set('blue')
+
+    frames = {
+        'track_frame': main_frame.show_tracks,
+        'album_frame': main_frame.show_albums,
+        'artist_frame': main_frame.show_artists,
+        'genre_frame': main_frame.show_genres,
+        'account_frame': main_frame.show_account,
+        'search_frame': main_frame.show_search_results,
+    }
+
+    def clear_cache():
+        app.session.cache = CatalogCache()
+
+    results = {}
+    for name, show in frames.items():
+        # время включает запросы к БД, создание виджетов и обработку отложенных задач отрисовки
+        def render(i, show=show):
+            show()
+            app.update_idletasks()
+
+        results[name] = time_calls(render, repeat, clear_cache)
+
+    app.destroy()
+    print(json.dumps(results))
+
+
+def run_frame_benchmarks(database: str, blob_dir: str, repeat: int) -> dict:
+    """Запуск замеров отрисовки виджетов в дочернем процессе.
+
+    Если дисплей недоступен, замеры пропускаются."""
+
+    if sys.platform.startswith('linux') and 'DISPLAY' not in os.environ and 'WAYLAND_DISPLAY' not in os.environ:
+        return {'skipped': 'дисплей недоступен'}
+
+    environment = dict(os.environ)
+    environment.update({
+        'FREEMUSIC_DATABASE_URL': f'sqlite:///{database}',
+        'FREEMUSIC_BLOB_STORE': 'local',
+        'FREEMUSIC_BLOB_DIR': blob_dir,
+        'FREEMUSIC_GC_INTERVAL': '0',
+    })
+
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), '--frames-child', '--repeat', str(repeat)],
+                             capture_output=True, text=True, env=environment)
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()
+        return {'skipped': error[-1] if error else f'код завершения {process.returncode}'}
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры производительности MusicSession и интерфейса '
+                                                 'на синтетическом каталоге')
+    parser.add_argument('--artists', type=int, default=100, help='количество исполнителей')
+    parser.add_argument('--albums-per-artist', type=int, default=10, help='количество альбомов у исполнителя')
+    parser.add_argument('--tracks-per-album', type=int, default=10, help='количество композиций в альбоме')
+    parser.add_argument('--genres', type=int, default=50, help='количество жанров')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--repeat', type=int, default=20, help='количество повторений каждой операции')
+    parser.add_argument('--output', help='файл для сохранения результатов (по умолчанию - stdout)')
+    parser.add_argument('--frames-child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.frames_child:
+        measure_frames(args.repeat)
+        return
+
+    from db import create_database_engine
+    from session import MusicSession
+    from blob_store import LocalBlobStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, 'catalog.db')
+        blob_dir = os.path.join(directory, 'audio')
+
+        engine = create_database_engine(f'sqlite:///{database}')
+        start = time.perf_counter()
+        size = generate_catalog(engine, LocalBlobStore(blob_dir), args.artists, args.albums_per_artist,
+                                args.tracks_per_album, args.genres, seed=args.seed)
+        generation_time = time.perf_counter() - start
+        engine.dispose()
+
+        session = MusicSession(f'sqlite:///{database}', blob_store=LocalBlobStore(blob_dir))
+        session_results = run_session_benchmarks(session, directory, args.repeat)
+        session.engine.dispose()
+
+        frame_results = run_frame_benchmarks(database, blob_dir, args.repeat)
+
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'catalog': {**size._asdict(), 'seed': args.seed, 'generation_s': round(generation_time, 2)},
+        'repeat': args.repeat,
+        'session': session_results,
+        'frames': frame_results,
+    }
+
+    output = json.dumps(results, indent=4, ensure_ascii=False)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
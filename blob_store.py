@@ -0,0 +1,708 @@
+import os
+import json
+import mmap
+import time
+import hashlib
+import secrets
+import threading
+from collections import Counter
+from datetime import timezone
+from typing import BinaryIO, Iterator, NamedTuple, Iterable
+
+import config
+from disk_cache import DiskCache, MappedFile
+
+
+class BlobStat(NamedTuple):
+    """Сведения о сохранённом файле."""
+
+    id: str
+    filename: str
+    size: int
+    sha256: str
+    refcount: int
+    created_at: float  # время сохранения (Unix time)
+
+
+class BlobWriter:
+    """Интерфейс записи файла в хранилище по частям."""
+
+    def write(self, data: bytes) -> None:
+        """Запись очередной части файла."""
+
+        raise NotImplementedError
+
+    def commit(self, sha256: str) -> str:
+        """Завершение записи; возвращает ID сохранённого файла."""
+
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        """Отмена записи с удалением уже записанных частей."""
+
+        raise NotImplementedError
+
+
+class BlobStore:
+    """Интерфейс хранилища аудиофайлов.
+
+    Файлы хранятся с дедупликацией по SHA-256 содержимого: одинаковое
+    содержимое сохраняется один раз, а число использующих его композиций
+    учитывается в счётчике ссылок (refcount)."""
+
+    CHUNK_SIZE = 255 * 1024  # размер части при потоковой записи
+
+    def new_writer(self, filename: str) -> BlobWriter:
+        """Начало записи нового файла."""
+
+        raise NotImplementedError
+
+    def acquire_by_hash(self, sha256: str) -> str:
+        """Увеличение счётчика ссылок файла с заданным SHA-256.
+
+        Возвращает ID найденного файла или None, если такого файла нет."""
+
+        raise NotImplementedError
+
+    def release(self, blob_id: str) -> bool:
+        """Уменьшение счётчика ссылок; файл удаляется, когда ссылок не остаётся.
+
+        Возвращает True, если файл был удалён."""
+
+        raise NotImplementedError
+
+    def release_many(self, blob_ids: Iterable[str]) -> list[str]:
+        """Освобождение нескольких ссылок (ID может повторяться, если на файл ссылались несколько композиций).
+
+        Возвращает ID удалённых файлов."""
+
+        return [blob_id for blob_id in blob_ids if self.release(blob_id)]
+
+    def get(self, blob_id: str) -> BinaryIO:
+        """Открытие файла для чтения (у объекта есть атрибут filename)."""
+
+        raise NotImplementedError
+
+    def open_range(self, blob_id: str, start: int, length: int) -> bytes | memoryview:
+        """Чтение length байт файла, начиная с позиции start.
+
+        Локальные файлы читаются без копирования: возвращается memoryview над
+        отображением файла в память. Отображение не закрывается явно, а освобождается
+        сборщиком мусора, когда на него не остаётся ссылок, поэтому фрагмент остаётся
+        действительным и после закрытия или удаления файла. Вызывающий, которому
+        нужен именно bytes (например, для хранения), копирует фрагмент: bytes(data)."""
+
+        raise NotImplementedError
+
+    def delete(self, blob_id: str) -> None:
+        """Удаление файла независимо от счётчика ссылок."""
+
+        raise NotImplementedError
+
+    def stat(self, blob_id: str) -> BlobStat:
+        """Получение сведений о файле (None, если файл не найден)."""
+
+        raise NotImplementedError
+
+    def stat_many(self, blob_ids: Iterable[str]) -> dict[str, BlobStat]:
+        """Получение сведений о нескольких файлах."""
+
+        stats = {}
+        for blob_id in blob_ids:
+            blob_stat = self.stat(blob_id)
+            if blob_stat is not None:
+                stats[blob_id] = blob_stat
+
+        return stats
+
+    def iter_blobs(self, after_id: str = None) -> Iterator[BlobStat]:
+        """Перебор всех файлов в порядке возрастания ID (начиная после after_id)."""
+
+        raise NotImplementedError
+
+    def put(self, audio_file: BinaryIO, filename: str) -> str:
+        """Сохранение файла из открытого потока с дедупликацией; возвращает ID файла."""
+
+        writer = self.new_writer(filename)
+        content_hash = hashlib.sha256()
+
+        try:
+            while chunk := audio_file.read(self.CHUNK_SIZE):
+                writer.write(chunk)
+                content_hash.update(chunk)
+            blob_id, _ = self.finish_write(writer, content_hash.hexdigest())
+        except BaseException:
+            writer.abort()
+            raise
+
+        return blob_id
+
+    def finish_write(self, writer: BlobWriter, sha256: str) -> tuple[str, bool]:
+        """Завершение записи файла с дедупликацией.
+
+        Если файл с таким же содержимым уже сохранён, запись отменяется, а счётчик ссылок
+        существующего файла увеличивается. Возвращает ID файла и признак дедупликации.
+        Если выброшено исключение, запись должна быть отменена вызывающим кодом."""
+
+        blob_id = self.acquire_by_hash(sha256)
+        if blob_id is None:
+            return writer.commit(sha256), False
+
+        try:
+            writer.abort()
+        except Exception:
+            pass  # ссылка уже получена; недописанные части удалит проверка согласованности
+
+        return blob_id, True
+
+    def dedup_report(self) -> dict:
+        """Получение статистики дедупликации."""
+
+        report = {'files': 0, 'references': 0, 'stored_bytes': 0, 'logical_bytes': 0}
+        for blob_stat in self.iter_blobs():
+            references = max(blob_stat.refcount, 1)
+            report['files'] += 1
+            report['references'] += references
+            report['stored_bytes'] += blob_stat.size
+            report['logical_bytes'] += blob_stat.size * references
+
+        return self._finish_dedup_report(report)
+
+    @staticmethod
+    def _finish_dedup_report(report: dict) -> dict:
+        """Добавление в отчёт о дедупликации производных показателей."""
+
+        # отношение объёма данных с учётом всех ссылок к реально хранимому объёму
+        report['dedup_ratio'] = report['logical_bytes'] / report['stored_bytes'] if report['stored_bytes'] else 1.0
+        report['saved_bytes'] = report['logical_bytes'] - report['stored_bytes']
+
+        return report
+
+
+class GridFSBlobWriter(BlobWriter):
+    """Запись файла в MongoDB GridFS."""
+
+    def __init__(self, grid_in) -> None:
+        self.grid_in = grid_in
+
+    def write(self, data: bytes) -> None:
+        self.grid_in.write(data)
+
+    def commit(self, sha256: str) -> str:
+        self.grid_in.sha256 = sha256
+        self.grid_in.refcount = 1
+        # после закрытия файл полностью записан и доступен для чтения
+        self.grid_in.close()
+
+        return str(self.grid_in._id)
+
+    def abort(self) -> None:
+        self.grid_in.abort()
+
+
+class GridFSBlobStore(BlobStore):
+    """Хранилище аудиофайлов в MongoDB GridFS."""
+
+    def __init__(self, uri: str = config.MONGO_URI, database: str = config.MONGO_DATABASE) -> None:
+        """Инициализация хранилища."""
+
+        # pymongo импортируется только при использовании этого хранилища
+        from pymongo import MongoClient
+        from gridfs import GridFS
+
+        mongo_client = MongoClient(uri)
+        self.mongo_db = mongo_client[database]
+        self.files = self.mongo_db['fs.files']
+        self.grid_fs = GridFS(self.mongo_db)
+
+        # индекс для поиска файлов с таким же содержимым при дедупликации
+        self.files.create_index('sha256')
+
+    def new_writer(self, filename: str) -> BlobWriter:
+        return GridFSBlobWriter(self.grid_fs.new_file(filename=filename, chunkSize=self.CHUNK_SIZE))
+
+    def acquire_by_hash(self, sha256: str) -> str:
+        duplicate = self.files.find_one_and_update({'sha256': sha256}, {'$inc': {'refcount': 1}})
+
+        return str(duplicate['_id']) if duplicate is not None else None
+
+    def release(self, blob_id: str) -> bool:
+        from pymongo import ReturnDocument
+
+        audio_file = self.files.find_one_and_update(
+            {'_id': self._object_id(blob_id)},
+            {'$inc': {'refcount': -1}},
+            return_document=ReturnDocument.AFTER
+        )
+
+        # у файлов, сохранённых до появления счётчика ссылок, он становится отрицательным
+        if audio_file is None or audio_file['refcount'] > 0:
+            return False
+
+        # между уменьшением счётчика и удалением файл может получить новую ссылку
+        # (acquire_by_hash), поэтому описание файла удаляется, только пока ссылок нет
+        result = self.files.delete_one({'_id': audio_file['_id'], 'refcount': {'$lte': 0}})
+        if result.deleted_count == 0:
+            return False
+
+        self.mongo_db['fs.chunks'].delete_many({'files_id': audio_file['_id']})
+        return True
+
+    def release_many(self, blob_ids: Iterable[str]) -> list[str]:
+        # файлы группируются по числу освобождаемых ссылок, и счётчики
+        # каждой группы уменьшаются одним запросом
+        groups = {}
+        for blob_id, count in Counter(blob_ids).items():
+            groups.setdefault(count, []).append(self._object_id(blob_id))
+        if len(groups) == 0:
+            return []
+
+        object_ids = []
+        for count, group in groups.items():
+            self.files.update_many({'_id': {'$in': group}}, {'$inc': {'refcount': -count}})
+            object_ids.extend(group)
+
+        unreferenced_ids = self.files.distinct('_id', {'_id': {'$in': object_ids}, 'refcount': {'$lte': 0}})
+        if len(unreferenced_ids) == 0:
+            return []
+
+        # описания удаляются с повторной проверкой счётчика (файл мог получить новую ссылку),
+        # а части - только у файлов, описания которых действительно удалены
+        self.files.delete_many({'_id': {'$in': unreferenced_ids}, 'refcount': {'$lte': 0}})
+        remaining_ids = set(self.files.distinct('_id', {'_id': {'$in': unreferenced_ids}}))
+        deleted_ids = [object_id for object_id in unreferenced_ids if object_id not in remaining_ids]
+        if len(deleted_ids) != 0:
+            self.mongo_db['fs.chunks'].delete_many({'files_id': {'$in': deleted_ids}})
+
+        return [str(object_id) for object_id in deleted_ids]
+
+    def get(self, blob_id: str) -> BinaryIO:
+        return self.grid_fs.get(self._object_id(blob_id))
+
+    def open_range(self, blob_id: str, start: int, length: int) -> bytes:
+        grid_out = self.grid_fs.get(self._object_id(blob_id))
+        grid_out.seek(start)
+
+        return grid_out.read(length)
+
+    def delete(self, blob_id: str) -> None:
+        self.grid_fs.delete(self._object_id(blob_id))
+
+    def stat(self, blob_id: str) -> BlobStat:
+        audio_file = self.files.find_one({'_id': self._object_id(blob_id)})
+
+        return self._blob_stat(audio_file) if audio_file is not None else None
+
+    def stat_many(self, blob_ids: Iterable[str]) -> dict[str, BlobStat]:
+        object_ids = [self._object_id(blob_id) for blob_id in blob_ids]
+        if len(object_ids) == 0:
+            return {}
+
+        # сведения о всех файлах запрашиваются одним запросом
+        return {
+            str(audio_file['_id']): self._blob_stat(audio_file)
+            for audio_file in self.files.find({'_id': {'$in': object_ids}})
+        }
+
+    def iter_blobs(self, after_id: str = None) -> Iterator[BlobStat]:
+        query = {} if after_id is None else {'_id': {'$gt': self._object_id(after_id)}}
+        for audio_file in self.files.find(query).sort('_id', 1):
+            yield self._blob_stat(audio_file)
+
+    def dedup_report(self) -> dict:
+        # подсчёт выполняется на стороне MongoDB
+        references = {'$max': [{'$ifNull': ['$refcount', 1]}, 1]}
+        pipeline = [{'$group': {
+            '_id': None,
+            'files': {'$sum': 1},
+            'references': {'$sum': references},
+            'stored_bytes': {'$sum': '$length'},
+            'logical_bytes': {'$sum': {'$multiply': ['$length', references]}}
+        }}]
+
+        report = {'files': 0, 'references': 0, 'stored_bytes': 0, 'logical_bytes': 0}
+        for result in self.files.aggregate(pipeline):
+            report.update({key: value for key, value in result.items() if key != '_id'})
+
+        return self._finish_dedup_report(report)
+
+    @staticmethod
+    def _object_id(blob_id: str):
+        """Преобразование строкового ID в ObjectId."""
+
+        from bson.objectid import ObjectId
+
+        return ObjectId(blob_id)
+
+    @staticmethod
+    def _blob_stat(audio_file: dict) -> BlobStat:
+        """Преобразование документа fs.files в BlobStat."""
+
+        return BlobStat(
+            id=str(audio_file['_id']),
+            filename=audio_file.get('filename'),
+            size=audio_file['length'],
+            sha256=audio_file.get('sha256'),
+            refcount=audio_file.get('refcount', 1),
+            created_at=audio_file['uploadDate'].replace(tzinfo=timezone.utc).timestamp()
+        )
+
+
+class LocalBlobWriter(BlobWriter):
+    """Запись файла в локальное хранилище через временный файл."""
+
+    def __init__(self, store: 'LocalBlobStore', filename: str) -> None:
+        self.store = store
+        self.filename = filename
+        self.blob_id = secrets.token_hex(12)
+        self.temp_path = os.path.join(store.temp_dir, self.blob_id)
+        self.temp_file = open(self.temp_path, 'wb')
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.temp_file.write(data)
+        self.size += len(data)
+
+    def commit(self, sha256: str) -> str:
+        self.temp_file.flush()
+        os.fsync(self.temp_file.fileno())
+        self.temp_file.close()
+
+        meta = {
+            'filename': self.filename,
+            'size': self.size,
+            'sha256': sha256,
+            'refcount': 1,
+            'created_at': time.time()
+        }
+        self.store.add_blob(self.blob_id, self.temp_path, meta)
+
+        return self.blob_id
+
+    def abort(self) -> None:
+        self.temp_file.close()
+        os.remove(self.temp_path)
+
+
+class LocalBlobStore(BlobStore):
+    """Хранилище аудиофайлов в локальном каталоге.
+
+    Файлы раскладываются по подкаталогам по первым символам ID
+    (root/blobs/ab/cd/abcd...), рядом хранятся метаданные в JSON,
+    а индекс по SHA-256 - в root/sha256. Чтение фрагментов файлов
+    выполняется через mmap без копирования данных."""
+
+    def __init__(self, root: str = config.BLOB_DIR) -> None:
+        """Инициализация хранилища."""
+
+        self.root = root
+        self.blobs_dir = os.path.join(root, 'blobs')
+        self.hashes_dir = os.path.join(root, 'sha256')
+        self.temp_dir = os.path.join(root, 'tmp')
+
+        for directory in (self.blobs_dir, self.hashes_dir, self.temp_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        # счётчики ссылок изменяются под блокировкой
+        self.lock = threading.Lock()
+
+    def blob_path(self, blob_id: str) -> str:
+        """Путь к содержимому файла."""
+
+        return os.path.join(self.blobs_dir, blob_id[:2], blob_id[2:4], blob_id)
+
+    def hash_path(self, sha256: str) -> str:
+        """Путь к записи индекса по SHA-256."""
+
+        return os.path.join(self.hashes_dir, sha256[:2], sha256)
+
+    def add_blob(self, blob_id: str, temp_path: str, meta: dict) -> None:
+        """Перемещение полностью записанного файла в хранилище."""
+
+        path = self.blob_path(blob_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # запись метаданных завершает сохранение файла
+        with self.lock:
+            os.replace(temp_path, path)
+            self._write_meta(blob_id, meta)
+            self._write_atomic(self.hash_path(meta['sha256']), blob_id.encode())
+
+    def new_writer(self, filename: str) -> BlobWriter:
+        return LocalBlobWriter(self, filename)
+
+    def acquire_by_hash(self, sha256: str) -> str:
+        with self.lock:
+            try:
+                with open(self.hash_path(sha256), 'rb') as hash_file:
+                    blob_id = hash_file.read().decode()
+            except FileNotFoundError:
+                return None
+
+            meta = self._read_meta(blob_id)
+            if meta is None:
+                return None
+
+            meta['refcount'] += 1
+            self._write_meta(blob_id, meta)
+
+        return blob_id
+
+    def release(self, blob_id: str) -> bool:
+        with self.lock:
+            meta = self._read_meta(blob_id)
+            if meta is None:
+                return False
+
+            meta['refcount'] -= 1
+            if meta['refcount'] > 0:
+                self._write_meta(blob_id, meta)
+                return False
+
+            # удаление под той же блокировкой: иначе acquire_by_hash мог бы
+            # получить ссылку на файл, который сразу после этого будет удалён
+            self._delete_unlocked(blob_id)
+
+        return True
+
+    def get(self, blob_id: str) -> BinaryIO:
+        meta = self._read_meta(blob_id)
+        if meta is None:
+            raise FileNotFoundError(blob_id)
+
+        audio_file = open(self.blob_path(blob_id), 'rb')
+        audio_file.filename = meta['filename']
+
+        return audio_file
+
+    def open_range(self, blob_id: str, start: int, length: int) -> bytes | memoryview:
+        with open(self.blob_path(blob_id), 'rb') as audio_file:
+            if os.fstat(audio_file.fileno()).st_size == 0:
+                return b''
+            mapped_file = mmap.mmap(audio_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # срез memoryview ссылается на отображённую память без копирования
+        return memoryview(mapped_file)[start:start + length]
+
+    def delete(self, blob_id: str) -> None:
+        with self.lock:
+            self._delete_unlocked(blob_id)
+
+    def _delete_unlocked(self, blob_id: str) -> None:
+        """Удаление файла, записи индекса и метаданных (вызывается под блокировкой)."""
+
+        meta = self._read_meta(blob_id)
+        if meta is not None:
+            try:
+                with open(self.hash_path(meta['sha256']), 'rb') as hash_file:
+                    if hash_file.read().decode() == blob_id:
+                        os.remove(self.hash_path(meta['sha256']))
+            except FileNotFoundError:
+                pass
+
+        for path in (self.blob_path(blob_id), self.blob_path(blob_id) + '.json'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stat(self, blob_id: str) -> BlobStat:
+        meta = self._read_meta(blob_id)
+
+        return self._blob_stat(blob_id, meta) if meta is not None else None
+
+    def iter_blobs(self, after_id: str = None) -> Iterator[BlobStat]:
+        # ID имеют одинаковую длину, поэтому обход подкаталогов
+        # в отсортированном порядке даёт ID в порядке возрастания
+        for first in sorted(os.listdir(self.blobs_dir)):
+            if after_id is not None and first < after_id[:2]:
+                continue
+            first_dir = os.path.join(self.blobs_dir, first)
+            for second in sorted(os.listdir(first_dir)):
+                if after_id is not None and first + second < after_id[:4]:
+                    continue
+                second_dir = os.path.join(first_dir, second)
+                for name in sorted(os.listdir(second_dir)):
+                    if not name.endswith('.json'):
+                        continue
+                    blob_id = name[:-len('.json')]
+                    if after_id is not None and blob_id <= after_id:
+                        continue
+                    meta = self._read_meta(blob_id)
+                    if meta is not None:
+                        yield self._blob_stat(blob_id, meta)
+
+    def _read_meta(self, blob_id: str) -> dict:
+        """Чтение метаданных файла (None, если файл не найден)."""
+
+        try:
+            with open(self.blob_path(blob_id) + '.json', 'r', encoding='utf-8') as meta_file:
+                return json.load(meta_file)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, blob_id: str, meta: dict) -> None:
+        """Запись метаданных файла."""
+
+        self._write_atomic(self.blob_path(blob_id) + '.json', json.dumps(meta).encode())
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """Атомарная запись небольшого файла через временный файл."""
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = os.path.join(self.temp_dir, secrets.token_hex(8))
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _blob_stat(blob_id: str, meta: dict) -> BlobStat:
+        """Преобразование метаданных в BlobStat."""
+
+        return BlobStat(
+            id=blob_id,
+            filename=meta['filename'],
+            size=meta['size'],
+            sha256=meta['sha256'],
+            refcount=meta['refcount'],
+            created_at=meta['created_at']
+        )
+
+
+class CachedAudioFile(MappedFile):
+    """Аудиофайл из локального кэша; имя файла запрашивается у хранилища только при обращении к нему."""
+
+    def __init__(self, path: str, store: BlobStore, blob_id: str) -> None:
+        """Открытие файла."""
+
+        self.store = store
+        self.blob_id = blob_id
+        self._filename = None
+
+        super().__init__(path, filename='')
+
+    @property
+    def filename(self) -> str:
+        if self._filename is None:
+            blob_stat = self.store.stat(self.blob_id)
+            self._filename = blob_stat.filename if blob_stat is not None else ''
+        return self._filename
+
+    @filename.setter
+    def filename(self, value: str) -> None:
+        self._filename = value or None
+
+
+class CachedBlobStore(BlobStore):
+    """Хранилище с локальным дисковым кэшем чтения перед удалённым хранилищем.
+
+    При первом чтении файл целиком копируется в кэш, а затем читается из
+    отображённого в память файла кэша. Чтение фрагментов (open_range) при
+    промахе выполняется из удалённого хранилища, а файл копируется в кэш
+    в фоновом потоке. Содержимое файла с заданным ID не изменяется,
+    поэтому кэш нужно очищать только при удалении файлов."""
+
+    def __init__(self, store: BlobStore, cache: DiskCache) -> None:
+        """Инициализация хранилища."""
+
+        self.store = store
+        self.cache = cache
+
+        # ID файлов, копируемых в кэш в фоновом режиме
+        self.filling = set()
+        self.filling_lock = threading.Lock()
+
+    def fill(self, blob_id: str) -> str:
+        """Копирование файла в кэш; возвращает путь к файлу в кэше (None, если файл не помещается)."""
+
+        with self.store.get(blob_id) as audio_file:
+            return self.cache.put(blob_id, audio_file)
+
+    def fill_in_background(self, blob_id: str) -> None:
+        """Копирование файла в кэш в фоновом потоке (не более одного потока на файл)."""
+
+        with self.filling_lock:
+            if blob_id in self.filling:
+                return
+            self.filling.add(blob_id)
+
+        def run():
+            try:
+                self.fill(blob_id)
+            except Exception:
+                pass  # файл будет прочитан из удалённого хранилища и при следующем обращении
+            finally:
+                with self.filling_lock:
+                    self.filling.discard(blob_id)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def new_writer(self, filename: str) -> BlobWriter:
+        return self.store.new_writer(filename)
+
+    def acquire_by_hash(self, sha256: str) -> str:
+        return self.store.acquire_by_hash(sha256)
+
+    def release(self, blob_id: str) -> bool:
+        deleted = self.store.release(blob_id)
+        if deleted:
+            self.cache.discard(blob_id)
+        return deleted
+
+    def release_many(self, blob_ids: Iterable[str]) -> list[str]:
+        deleted_ids = self.store.release_many(blob_ids)
+        for blob_id in deleted_ids:
+            self.cache.discard(blob_id)
+        return deleted_ids
+
+    def get(self, blob_id: str) -> BinaryIO:
+        path = self.cache.get(blob_id)
+        if path is None:
+            path = self.fill(blob_id)
+            if path is None:  # файл больше всего кэша
+                return self.store.get(blob_id)
+
+        return CachedAudioFile(path, self.store, blob_id)
+
+    def open_range(self, blob_id: str, start: int, length: int) -> bytes | memoryview:
+        path = self.cache.get(blob_id)
+        if path is None:
+            self.fill_in_background(blob_id)
+            return self.store.open_range(blob_id, start, length)
+
+        # фрагмент ссылается на отображённый в память файл кэша без копирования
+        with CachedAudioFile(path, self.store, blob_id) as audio_file:
+            return audio_file.getbuffer(start, length)
+
+    def delete(self, blob_id: str) -> None:
+        self.store.delete(blob_id)
+        self.cache.discard(blob_id)
+
+    def stat(self, blob_id: str) -> BlobStat:
+        return self.store.stat(blob_id)
+
+    def stat_many(self, blob_ids: Iterable[str]) -> dict[str, BlobStat]:
+        return self.store.stat_many(blob_ids)
+
+    def iter_blobs(self, after_id: str = None) -> Iterator[BlobStat]:
+        return self.store.iter_blobs(after_id)
+
+    def dedup_report(self) -> dict:
+        return self.store.dedup_report()
+
+
+def create_blob_store(kind: str = config.BLOB_STORE) -> BlobStore:
+    """Создание хранилища аудиофайлов указанного в настройках типа ('gridfs' или 'local').
+
+    Перед удалённым хранилищем GridFS подключается локальный дисковый кэш,
+    если его размер в настройках больше нуля."""
+
+    if kind == 'gridfs':
+        store = GridFSBlobStore()
+        if config.DISK_CACHE_SIZE > 0:
+            store = CachedBlobStore(store, DiskCache(config.DISK_CACHE_DIR, config.DISK_CACHE_SIZE))
+        return store
+    elif kind == 'local':
+        return LocalBlobStore()
+    else:
+        raise ValueError(f'Неизвестный тип хранилища аудиофайлов: {kind}')
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+
+class LRUCache:
+    """Кэш ограниченного размера с вытеснением давно не использовавшихся записей.
+
+    Кэш используется из нескольких потоков (потоки подготовки данных интерфейса,
+    ChangeWatcher, обработчики запросов server.py), поэтому операции выполняются под блокировкой."""
+
+    def __init__(self, max_size: int) -> None:
+        """Инициализация кэша."""
+
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Получение значения по ключу (None, если значение отсутствует в кэше)."""
+
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Сохранение значения в кэш."""
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+
+            # вытеснение самых старых записей при превышении размера
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Очистка кэша."""
+
+        with self.lock:
+            self.entries.clear()
+
+
+class CatalogCache:
+    """Кэш каталога, разделённый по типам сущностей.
+
+    Для каждого типа хранятся сущности по их ID, а также результаты запросов списков.
+    При изменении сущностей некоторого типа его кэш и кэши зависящих от него типов очищаются."""
+
+    ENTITY_TYPES = ('track', 'album', 'artist', 'genre')
+
+    # типы, кэшированные данные которых содержат данные других типов
+    # (например, списки альбомов содержат имена исполнителей, а списки композиций - имена жанров)
+    DEPENDENT_TYPES = {
+        'track': (),
+        'album': ('track',),
+        'artist': ('album', 'track'),
+        'genre': ('track',)
+    }
+
+    def __init__(self, max_size: int = 1024) -> None:
+        """Инициализация кэша; max_size - максимальное количество записей для каждого типа."""
+
+        self.caches = {entity_type: LRUCache(max_size) for entity_type in self.ENTITY_TYPES}
+
+    def get(self, entity_type: str, key: Hashable) -> Any:
+        """Получение кэшированного значения (None, если значение отсутствует в кэше)."""
+
+        return self.caches[entity_type].get(key)
+
+    def put(self, entity_type: str, key: Hashable, value: Any) -> None:
+        """Сохранение значения в кэш."""
+
+        self.caches[entity_type].put(key, value)
+
+    def get_entity(self, entity_type: str, entity_id: int) -> Any:
+        """Получение сущности по ID."""
+
+        return self.get(entity_type, ('id', entity_id))
+
+    def put_entities(self, entity_type: str, entities: Iterable[Any]) -> None:
+        """Сохранение сущностей в кэш по их ID."""
+
+        for entity in entities:
+            self.put(entity_type, ('id', entity.id), entity)
+
+    def invalidate(self, entity_type: str) -> None:
+        """Очистка кэша изменившегося типа сущностей и зависящих от него типов."""
+
+        self.caches[entity_type].clear()
+        for dependent_type in self.DEPENDENT_TYPES[entity_type]:
+            self.caches[dependent_type].clear()
+
+    def stats(self) -> dict:
+        """Получение статистики попаданий и промахов для каждого типа сущностей."""
+
+        return {
+            entity_type: {
+                'hits': cache.hits,
+                'misses': cache.misses,
+                'evictions': cache.evictions,
+                'size': len(cache)
+            }
+            for entity_type, cache in self.caches.items()
+        }
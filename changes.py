@@ -0,0 +1,221 @@
+import threading
+from typing import NamedTuple, Collection
+
+from sqlalchemy import Connection
+
+from migrations import CHANGE_TABLES
+
+
+class ChangeEvent(NamedTuple):
+    """Изменение каталога, сохранённое в БД."""
+
+    entity_type: str  # 'track', 'album', 'artist' или 'genre'
+    op: str  # 'insert', 'update' или 'delete'
+    ids: tuple[int, ...]
+
+
+class ChangeWatcher(threading.Thread):
+    """Отслеживание изменений каталога, сохранённых другими клиентами общей БД SQLite.
+
+    Раз в interval секунд выполняется PRAGMA data_version, значение которой
+    меняется после фиксации транзакций другими соединениями; только в этом
+    случае запрашиваются записи, изменённые после последней проверки (по
+    индексу updated_at), и новые отметки об удалении. Кэши изменившихся
+    типов сущностей очищаются, а подписчики сессии получают ChangeEvent.
+
+    Транзакции разных клиентов могут фиксироваться не в порядке их отметок
+    времени, поэтому записи запрашиваются с перекрытием WATERMARK_OVERLAP
+    секунд, а уже переданные изменения пропускаются.
+
+    Транзакции, зафиксированные самой сессией через другие соединения пула,
+    тоже меняют data_version; о них сессия уже оповестила подписчиков, поэтому
+    записи из её оповещений (add_local_change) при следующей проверке пропускаются."""
+
+    WATERMARK_OVERLAP = 5  # перекрытие интервалов запроса изменённых записей (в секундах)
+
+    def __init__(self, session, interval: float = 1.0, tombstone_retention: float = 7 * 24 * 3600) -> None:
+        """Инициализация; session - сессия MusicSession."""
+
+        super().__init__(daemon=True)
+
+        self.session = session
+        self.interval = interval
+        self.tombstone_retention = tombstone_retention
+
+        self.data_version = None
+        self.last_tombstone_id = 0
+        self.watermarks = {}  # таблица -> наибольшее известное значение updated_at
+        self.max_ids = {}  # таблица -> наибольший известный ID (более новые записи считаются добавленными)
+        self.recent = {}  # таблица -> {ID: updated_at} записей, переданных в пределах перекрытия
+
+        # изменения, о которых сессия оповестила сама после начала последней проверки
+        self.local_changes = []
+        self.lock = threading.Lock()
+
+        self.stop_requested = threading.Event()
+
+    def stop(self) -> None:
+        """Остановка отслеживания."""
+
+        self.stop_requested.set()
+
+    def run(self) -> None:
+        """Периодическая проверка изменений."""
+
+        try:
+            self.session.wait_until_ready()
+        except Exception:
+            return
+
+        engine = self.session.engine
+        if engine.dialect.name != 'sqlite':
+            return
+
+        # PRAGMA data_version отслеживает изменения относительно конкретного соединения,
+        # поэтому проверки выполняются через одно постоянно открытое соединение
+        with engine.connect() as connection:
+            try:
+                self.prune_tombstones(connection)
+                self.reset(connection)
+            except Exception:
+                return
+
+            while not self.stop_requested.wait(self.interval):
+                try:
+                    changes = self.poll(connection)
+                except Exception:
+                    # например, БД заблокирована другим клиентом: проверка повторяется позже
+                    connection.rollback()
+                    continue
+
+                for change in changes:
+                    self.session.notify(*change, local=False)
+
+    def add_local_change(self, change: ChangeEvent) -> None:
+        """Запоминание изменения, сохранённого самой сессией и уже переданного подписчикам."""
+
+        with self.lock:
+            self.local_changes.append(change)
+
+    def prune_tombstones(self, connection: Connection) -> None:
+        """Удаление отметок об удалении старше tombstone_retention секунд."""
+
+        connection.exec_driver_sql(
+            "DELETE FROM tombstone WHERE deleted_at < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)",
+            (f'-{int(self.tombstone_retention)} seconds',)
+        )
+        connection.commit()
+
+    def reset(self, connection: Connection) -> None:
+        """Запоминание текущего состояния БД: изменения отслеживаются начиная с него."""
+
+        # изменения сессии, сохранённые до этого момента, уже входят в запоминаемое состояние
+        with self.lock:
+            self.local_changes = []
+        self.data_version = connection.exec_driver_sql('PRAGMA data_version').scalar()
+        self.last_tombstone_id = connection.exec_driver_sql('SELECT coalesce(max(id), 0) FROM tombstone').scalar()
+        for table in CHANGE_TABLES:
+            max_id, watermark = connection.exec_driver_sql(
+                f'SELECT coalesce(max(id), 0), max(updated_at) FROM "{table}"'
+            ).one()
+            self.max_ids[table] = max_id
+            self.watermarks[table] = watermark
+            self.recent[table] = {}
+            # записи в пределах перекрытия уже известны и не должны передаваться как изменённые
+            self.changed_rows(connection, table)
+        connection.rollback()
+
+    def poll(self, connection: Connection) -> list[ChangeEvent]:
+        """Получение изменений, сохранённых после предыдущей проверки."""
+
+        # оповещения сессии отправляются после фиксации транзакций, поэтому все полученные
+        # до начала проверки изменения видны в её снимке БД и далее не понадобятся
+        with self.lock:
+            local_changes, self.local_changes = self.local_changes, []
+        local_deleted, local_changed = {}, {}
+        for entity_type, op, ids in local_changes:
+            (local_deleted if op == 'delete' else local_changed).setdefault(entity_type, set()).update(ids)
+
+        try:
+            data_version = connection.exec_driver_sql('PRAGMA data_version').scalar()
+            if data_version == self.data_version:
+                return []
+            self.data_version = data_version
+
+            changes = []
+
+            # удаления передаются первыми: ID удалённой записи может быть выдан новой записи
+            deleted = {}
+            for tombstone_id, entity_type, entity_id in connection.exec_driver_sql(
+                'SELECT id, entity_type, entity_id FROM tombstone WHERE id > ? ORDER BY id', (self.last_tombstone_id,)
+            ):
+                self.last_tombstone_id = tombstone_id
+                self.recent.get(entity_type, {}).pop(entity_id, None)
+                if entity_id not in local_deleted.get(entity_type, ()):
+                    deleted.setdefault(entity_type, []).append(entity_id)
+            for entity_type, ids in deleted.items():
+                changes.append(ChangeEvent(entity_type, 'delete', tuple(ids)))
+
+            # добавленные записи передаются после записей, на которые они ссылаются
+            for table in reversed(CHANGE_TABLES):
+                inserted, updated = self.changed_rows(connection, table, local_changed.get(table, ()))
+                if len(inserted) != 0:
+                    changes.append(ChangeEvent(table, 'insert', tuple(inserted)))
+                if len(updated) != 0:
+                    changes.append(ChangeEvent(table, 'update', tuple(updated)))
+        finally:
+            # открытая транзакция удерживала бы снимок БД, и изменения не были бы видны
+            connection.rollback()
+
+        for entity_type in {change.entity_type for change in changes}:
+            self.session.cache.invalidate(entity_type)
+
+        return changes
+
+    def changed_rows(self, connection: Connection, table: str,
+                     local_ids: Collection[int] = ()) -> tuple[list[int], list[int]]:
+        """Получение ID добавленных и изменённых записей таблицы (кроме записей local_ids)."""
+
+        # строки упорядочиваются по ID после запроса: с ORDER BY id SQLite предпочитает
+        # просмотр всей таблицы в порядке ID поиску по индексу updated_at
+        watermark = self.watermarks[table]
+        if watermark is None:  # таблица была пуста
+            rows = connection.exec_driver_sql(
+                f'SELECT id, updated_at FROM "{table}" WHERE updated_at IS NOT NULL'
+            ).all()
+        else:
+            rows = connection.exec_driver_sql(
+                f'SELECT id, updated_at FROM "{table}" '
+                f"WHERE updated_at >= strftime('%Y-%m-%d %H:%M:%f', ?, ?)",
+                (watermark, f'-{self.WATERMARK_OVERLAP} seconds')
+            ).all()
+        rows.sort()
+
+        recent = self.recent[table]
+        inserted, updated = [], []
+        for row_id, updated_at in rows:
+            if recent.get(row_id) == updated_at:
+                continue
+            recent[row_id] = updated_at
+
+            if row_id in local_ids:
+                continue
+            if row_id > self.max_ids[table]:
+                inserted.append(row_id)
+            else:
+                updated.append(row_id)
+
+        if len(rows) != 0:
+            self.max_ids[table] = max(self.max_ids[table], rows[-1][0])
+            self.watermarks[table] = max([updated_at for _, updated_at in rows] + ([watermark] if watermark else []))
+
+        # записи вне перекрытия уже не будут получены повторно
+        if len(recent) > len(rows):
+            threshold = connection.exec_driver_sql(
+                "SELECT strftime('%Y-%m-%d %H:%M:%f', ?, ?)",
+                (self.watermarks[table], f'-{self.WATERMARK_OVERLAP} seconds')
+            ).scalar()
+            self.recent[table] = {row_id: updated_at for row_id, updated_at in recent.items()
+                                  if updated_at >= threshold}
+
+        return inserted, updated
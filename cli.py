@@ -0,0 +1,380 @@
+import os
+import sys
+import json
+import getpass
+import argparse
+from datetime import date
+
+from db import User
+from session import MusicSession
+
+# служебные команды не должны импортировать tkinter и PIL: от времени запуска зависят пакетные задания
+
+# методы сессии для удаления сущностей по типу
+DELETE_METHODS = {
+    'tracks': 'delete_tracks',
+    'albums': 'delete_albums',
+    'artists': 'delete_artists',
+    'genres': 'delete_genres',
+}
+
+# методы сессии для получения страницы списка сущностей по типу
+PAGE_METHODS = {
+    'tracks': 'get_track_listing',
+    'albums': 'get_albums_page',
+    'artists': 'get_artists_page',
+    'genres': 'get_genres_page',
+}
+
+EXPORT_PAGE_SIZE = 1000  # размер страницы при выгрузке каталога
+
+
+def print_json(data) -> None:
+    """Вывод данных в формате JSON."""
+
+    print(json.dumps(data, indent=4, ensure_ascii=False, default=str))
+
+
+def to_dict(entity) -> dict:
+    """Представление сущности БД или строки списка в виде словаря."""
+
+    if isinstance(entity, tuple):
+        return entity._asdict()
+
+    return {column.key: getattr(entity, column.key) for column in entity.__table__.columns
+            if column.key != 'password_hash'}
+
+
+def run_operation(session: MusicSession, operation, *args) -> int:
+    """Выполнение метода сессии operation вида (успех, сообщение) и вывод результата вместе с изменениями каталога.
+
+    Возвращает код завершения программы."""
+
+    changes = []
+    session.subscribe(changes.append)
+    try:
+        success, message = operation(*args)
+    finally:
+        session.unsubscribe(changes.append)
+
+    print_json({
+        'success': success,
+        'message': str(message),
+        'changes': [change._asdict() for change in changes]
+    })
+    return 0 if success else 1
+
+
+def read_password() -> str:
+    """Чтение пароля с терминала или (в пакетных заданиях) из первой строки стандартного ввода."""
+
+    if sys.stdin.isatty():
+        return getpass.getpass('Пароль: ')
+    return sys.stdin.readline().rstrip('\n')
+
+
+def backfill_audio_metadata(session: MusicSession, args: argparse.Namespace) -> None:
+    """Заполнение сведений об аудиофайлах у ранее добавленных композиций."""
+
+    updated = session.backfill_audio_metadata(args.batch_size)
+    print(f'Обновлено композиций: {updated}')
+
+
+def audio_cache_stats(session: MusicSession, args: argparse.Namespace) -> None:
+    """Вывод статистики локального дискового кэша аудиофайлов."""
+
+    stats = session.get_audio_cache_stats()
+    if stats is None:
+        print('Дисковый кэш аудиофайлов не используется')
+    else:
+        print(json.dumps(stats, indent=4))
+
+
+def dedup_report(session: MusicSession, args: argparse.Namespace) -> None:
+    """Вывод статистики дедупликации аудиофайлов."""
+
+    print(json.dumps(session.get_dedup_report(), indent=4))
+
+
+def fsck(session: MusicSession, args: argparse.Namespace) -> None:
+    """Проверка согласованности композиций и хранилища аудиофайлов."""
+
+    report = session.check_consistency(args.delete_orphans, args.grace_period * 3600, args.batch_size)
+    print(json.dumps(report, indent=4))
+
+
+def import_catalog(session: MusicSession, args: argparse.Namespace) -> None:
+    """Массовый импорт композиций из дерева каталогов или CSV-манифеста."""
+
+    # импортируется только этой командой: модуль загружает multiprocessing
+    from importer import CatalogImporter, walk_directory, read_manifest
+
+    if os.path.isdir(args.source):
+        items = walk_directory(args.source)
+    else:
+        items = read_manifest(args.source)
+
+    checkpoint_path = args.checkpoint or os.path.abspath(args.source).rstrip(os.sep) + '.import.json'
+    importer = CatalogImporter(session, checkpoint_path, args.batch_size, args.processes, args.upload_threads)
+
+    def print_progress(stats: dict) -> None:
+        print(f'Импортировано композиций: {stats["imported"]}, пропущено: {stats["skipped"]}, '
+              f'ошибок: {stats["failed"]}')
+
+    stats = importer.run(items, print_progress)
+
+    for path, error in importer.errors:
+        print(f'Ошибка при импорте {path}: {error}')
+    print(f'Импорт завершён за {stats["seconds"]} с ({stats["tracks_per_minute"]} композиций в минуту); '
+          f'новых исполнителей: {stats["artists"]}, альбомов: {stats["albums"]}, жанров: {stats["genres"]}, '
+          f'повторяющихся аудиофайлов: {stats["deduplicated"]}')
+
+
+def list_entities(session: MusicSession, args: argparse.Namespace) -> None:
+    """Вывод страницы списка композиций, альбомов, исполнителей или жанров."""
+
+    page = getattr(session, PAGE_METHODS[args.kind])(after_id=args.after_id, limit=args.limit, sort_key=args.sort,
+                                                     after_value=args.after_value)
+    print_json([to_dict(entity) for entity in page])
+
+
+def search(session: MusicSession, args: argparse.Namespace) -> None:
+    """Полнотекстовый поиск по каталогу."""
+
+    print_json([result._asdict() for result in session.search(args.query, args.limit)])
+
+
+def export_catalog(session: MusicSession, args: argparse.Namespace) -> None:
+    """Выгрузка всего каталога в формате JSON.
+
+    Списки читаются постранично, поэтому каталог не загружается в память целиком."""
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        output.write('{')
+        for index, (kind, method_name) in enumerate(PAGE_METHODS.items()):
+            get_page = getattr(session, method_name)
+            output.write(f'{"," if index else ""}\n    "{kind}": [')
+            after_id = None
+            count = 0
+            while True:
+                page = get_page(after_id=after_id, limit=EXPORT_PAGE_SIZE)
+                for entity in page:
+                    item = json.dumps(to_dict(entity), ensure_ascii=False, default=str)
+                    output.write(f'{"," if count else ""}\n        {item}')
+                    count += 1
+                if len(page) < EXPORT_PAGE_SIZE:
+                    break
+                after_id = page[-1].id
+            output.write('\n    ]' if count else ']')
+        output.write('\n}\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def add_artist(session: MusicSession, args: argparse.Namespace) -> int:
+    """Добавление исполнителя."""
+
+    return run_operation(session, session.add_artist, args.name, args.description)
+
+
+def add_album(session: MusicSession, args: argparse.Namespace) -> int:
+    """Добавление альбома."""
+
+    return run_operation(session, session.add_album, args.name, args.release_date, args.artist_id)
+
+
+def add_genre(session: MusicSession, args: argparse.Namespace) -> int:
+    """Добавление жанра."""
+
+    return run_operation(session, session.add_genre, args.name)
+
+
+def add_track(session: MusicSession, args: argparse.Namespace) -> int:
+    """Добавление композиции с загрузкой аудиофайла в хранилище."""
+
+    return run_operation(session, session.add_track, args.name, args.path, args.album_id, tuple(args.genre_id))
+
+
+def delete_entities(session: MusicSession, args: argparse.Namespace) -> int:
+    """Удаление композиций, альбомов, исполнителей или жанров (зависимые записи удаляются каскадно)."""
+
+    return run_operation(session, getattr(session, DELETE_METHODS[args.kind]), args.ids)
+
+
+def assign_genres(session: MusicSession, args: argparse.Namespace) -> int:
+    """Добавление жанров композициям."""
+
+    return run_operation(session, session.add_genres_to_tracks, args.track_id, args.genre_id)
+
+
+def list_users(session: MusicSession, args: argparse.Namespace) -> None:
+    """Вывод списка пользователей (без хешей паролей)."""
+
+    print_json([to_dict(user) for user in session.get_all_users()])
+
+
+def add_user(session: MusicSession, args: argparse.Namespace) -> int:
+    """Создание аккаунта; пароль читается с терминала или из стандартного ввода."""
+
+    success, message = session.sign_up(args.login, read_password(), args.username, args.bio)
+    if success and args.admin:
+        return run_operation(session, session.set_admin, args.login, True)
+
+    print_json({'success': success, 'message': str(message), 'changes': []})
+    return 0 if success else 1
+
+
+def set_admin(session: MusicSession, args: argparse.Namespace) -> int:
+    """Назначение пользователя администратором или снятие с него этих прав."""
+
+    return run_operation(session, session.set_admin, args.login, not args.revoke)
+
+
+def reset_password(session: MusicSession, args: argparse.Namespace) -> int:
+    """Установка нового пароля пользователя; пароль читается с терминала или из стандартного ввода."""
+
+    return run_operation(session, session.reset_password, args.login, read_password())
+
+
+def delete_user(session: MusicSession, args: argparse.Namespace) -> int:
+    """Удаление пользователя."""
+
+    return run_operation(session, session.delete_user, args.login)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Создание разборщика аргументов командной строки; обработчик команды - в атрибуте handler."""
+
+    parser = argparse.ArgumentParser(description='Служебные команды Free Music')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backfill_parser = subparsers.add_parser('backfill-audio-metadata',
+                                            help='заполнить сведения об аудиофайлах у ранее добавленных композиций')
+    backfill_parser.add_argument('--batch-size', type=int, default=100, help='размер пакета обновления')
+    backfill_parser.set_defaults(handler=backfill_audio_metadata)
+
+    import_parser = subparsers.add_parser('import', help='импортировать композиции из каталога или CSV-манифеста')
+    import_parser.add_argument('source', help='каталог с аудиофайлами (исполнитель/альбом/композиция.mp3) '
+                                              'или CSV-файл со столбцами path, name, artist, album, genres, '
+                                              'release_date')
+    import_parser.add_argument('--checkpoint', help='файл контрольной точки (по умолчанию <source>.import.json)')
+    import_parser.add_argument('--batch-size', type=int, default=500, help='количество композиций в транзакции')
+    import_parser.add_argument('--processes', type=int, default=None,
+                               help='количество процессов для хэширования и разбора файлов')
+    import_parser.add_argument('--upload-threads', type=int, default=8,
+                               help='количество потоков загрузки в хранилище')
+    import_parser.set_defaults(handler=import_catalog)
+
+    cache_stats_parser = subparsers.add_parser('audio-cache-stats',
+                                               help='показать статистику дискового кэша аудиофайлов')
+    cache_stats_parser.set_defaults(handler=audio_cache_stats)
+
+    dedup_parser = subparsers.add_parser('dedup-report', help='показать статистику дедупликации аудиофайлов')
+    dedup_parser.set_defaults(handler=dedup_report)
+
+    fsck_parser = subparsers.add_parser('fsck', help='проверить согласованность композиций и хранилища аудиофайлов')
+    fsck_parser.add_argument('--delete-orphans', action='store_true',
+                             help='удалить аудиофайлы, на которые не ссылается ни одна композиция')
+    fsck_parser.add_argument('--grace-period', type=float, default=24,
+                             help='минимальный возраст удаляемого файла в часах')
+    fsck_parser.add_argument('--batch-size', type=int, default=1000, help='количество файлов в порции проверки')
+    fsck_parser.set_defaults(handler=fsck)
+
+    # команды, не использующие хранилище аудиофайлов, не подключаются к нему
+    list_parser = subparsers.add_parser('list', help='вывести страницу списка сущностей каталога')
+    list_parser.add_argument('kind', choices=PAGE_METHODS, help='тип сущностей')
+    list_parser.add_argument('--after-id', type=int, help='ID последней записи предыдущей страницы')
+    list_parser.add_argument('--after-value', help='значение столбца сортировки у последней записи '
+                                                   'предыдущей страницы (не указывается, если оно пустое)')
+    list_parser.add_argument('--limit', type=int, default=MusicSession.PAGE_SIZE, help='размер страницы')
+    list_parser.add_argument('--sort', help='столбец сортировки (по умолчанию - ID)')
+    list_parser.set_defaults(handler=list_entities, blob_store=False)
+
+    search_parser = subparsers.add_parser('search', help='полнотекстовый поиск по каталогу')
+    search_parser.add_argument('query', help='поисковый запрос')
+    search_parser.add_argument('--limit', type=int, default=50, help='максимальное количество результатов')
+    search_parser.set_defaults(handler=search, blob_store=False)
+
+    export_parser = subparsers.add_parser('export', help='выгрузить каталог в формате JSON')
+    export_parser.add_argument('--output', help='файл для сохранения каталога (по умолчанию - stdout)')
+    export_parser.set_defaults(handler=export_catalog, blob_store=False)
+
+    add_artist_parser = subparsers.add_parser('add-artist', help='добавить исполнителя')
+    add_artist_parser.add_argument('name', help='имя исполнителя')
+    add_artist_parser.add_argument('--description', default='', help='описание исполнителя')
+    add_artist_parser.set_defaults(handler=add_artist, blob_store=False)
+
+    add_album_parser = subparsers.add_parser('add-album', help='добавить альбом')
+    add_album_parser.add_argument('name', help='название альбома')
+    add_album_parser.add_argument('--artist-id', type=int, required=True, help='ID исполнителя')
+    add_album_parser.add_argument('--release-date', type=date.fromisoformat, required=True,
+                                  help='дата выпуска (ГГГГ-ММ-ДД)')
+    add_album_parser.set_defaults(handler=add_album, blob_store=False)
+
+    add_genre_parser = subparsers.add_parser('add-genre', help='добавить жанр')
+    add_genre_parser.add_argument('name', help='название жанра')
+    add_genre_parser.set_defaults(handler=add_genre, blob_store=False)
+
+    add_track_parser = subparsers.add_parser('add-track', help='добавить композицию')
+    add_track_parser.add_argument('name', help='название композиции')
+    add_track_parser.add_argument('path', help='аудиофайл MP3')
+    add_track_parser.add_argument('--album-id', type=int, required=True, help='ID альбома')
+    add_track_parser.add_argument('--genre-id', type=int, action='append', default=[],
+                                  help='ID жанра (можно указать несколько раз)')
+    add_track_parser.set_defaults(handler=add_track)
+
+    delete_parser = subparsers.add_parser('delete', help='удалить сущности каталога вместе с зависимыми')
+    delete_parser.add_argument('kind', choices=DELETE_METHODS, help='тип сущностей')
+    delete_parser.add_argument('ids', type=int, nargs='+', help='ID удаляемых записей')
+    delete_parser.set_defaults(handler=delete_entities)
+
+    assign_genres_parser = subparsers.add_parser('assign-genres', help='добавить жанры композициям')
+    assign_genres_parser.add_argument('--track-id', type=int, action='append', required=True,
+                                      help='ID композиции (можно указать несколько раз)')
+    assign_genres_parser.add_argument('--genre-id', type=int, action='append', required=True,
+                                      help='ID жанра (можно указать несколько раз)')
+    assign_genres_parser.set_defaults(handler=assign_genres, blob_store=False)
+
+    list_users_parser = subparsers.add_parser('list-users', help='вывести список пользователей')
+    list_users_parser.set_defaults(handler=list_users, blob_store=False)
+
+    add_user_parser = subparsers.add_parser('add-user', help='создать аккаунт (пароль читается из stdin)')
+    add_user_parser.add_argument('login', help='логин')
+    add_user_parser.add_argument('username', help='имя пользователя')
+    add_user_parser.add_argument('--bio', default='', help='информация о пользователе')
+    add_user_parser.add_argument('--admin', action='store_true', help='назначить администратором')
+    add_user_parser.set_defaults(handler=add_user, blob_store=False)
+
+    set_admin_parser = subparsers.add_parser('set-admin', help='назначить пользователя администратором')
+    set_admin_parser.add_argument('login', help='логин')
+    set_admin_parser.add_argument('--revoke', action='store_true', help='снять права администратора')
+    set_admin_parser.set_defaults(handler=set_admin, blob_store=False)
+
+    reset_password_parser = subparsers.add_parser('reset-password',
+                                                  help='установить пароль пользователя (читается из stdin)')
+    reset_password_parser.add_argument('login', help='логин')
+    reset_password_parser.set_defaults(handler=reset_password, blob_store=False)
+
+    delete_user_parser = subparsers.add_parser('delete-user', help='удалить пользователя')
+    delete_user_parser.add_argument('login', help='логин')
+    delete_user_parser.set_defaults(handler=delete_user, blob_store=False)
+
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+
+    session = MusicSession(prepare=False)
+    session.prepare(connect_blob_store=getattr(args, 'blob_store', True))
+
+    # служебные команды выполняются с прямым доступом к БД, поэтому - от имени администратора
+    session.user = User(login='cli', username='cli', is_admin=True)
+
+    sys.exit(args.handler(session, args))
+
+
+if __name__ == "__main__":
+    main()
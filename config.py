@@ -0,0 +1,57 @@
+import os
+
+
+# настройки приложения задаются переменными окружения
+
+# адрес базы данных каталога (SQLAlchemy URL)
+DATABASE_URL = os.environ.get('FREEMUSIC_DATABASE_URL', 'sqlite:///music.db')
+
+# профиль настройки подключения к БД ('tuned' или 'default', см. db.ENGINE_PROFILES)
+# и вывод выполняемых SQL-запросов в консоль
+ENGINE_PROFILE = os.environ.get('FREEMUSIC_ENGINE_PROFILE', 'tuned')
+SQL_ECHO = os.environ.get('FREEMUSIC_SQL_ECHO', '') == '1'
+
+# тип хранилища аудиофайлов: 'gridfs' (MongoDB GridFS) или 'local' (локальный каталог)
+BLOB_STORE = os.environ.get('FREEMUSIC_BLOB_STORE', 'gridfs')
+
+# параметры подключения к MongoDB для хранилища 'gridfs'
+MONGO_URI = os.environ.get('FREEMUSIC_MONGO_URI', 'mongodb://localhost:27017')
+MONGO_DATABASE = os.environ.get('FREEMUSIC_MONGO_DATABASE', 'music_db')
+
+# каталог хранилища 'local'
+BLOB_DIR = os.environ.get('FREEMUSIC_BLOB_DIR', 'audio')
+
+# команда запуска внешнего проигрывателя, получающего аудиопоток через стандартный ввод
+AUDIO_PLAYER = os.environ.get('FREEMUSIC_AUDIO_PLAYER', 'ffplay -nodisp -autoexit -loglevel quiet -')
+
+# локальный дисковый кэш аудиофайлов хранилища 'gridfs': каталог и максимальный объём в байтах (0 - без кэша)
+DISK_CACHE_DIR = os.environ.get('FREEMUSIC_DISK_CACHE_DIR', 'cache')
+DISK_CACHE_SIZE = int(os.environ.get('FREEMUSIC_DISK_CACHE_SIZE', 1024 ** 3))
+
+# стоимость хеширования паролей bcrypt (2^BCRYPT_ROUNDS итераций); при изменении
+# хеши паролей пересчитываются при следующем входе пользователей
+BCRYPT_ROUNDS = int(os.environ.get('FREEMUSIC_BCRYPT_ROUNDS', 12))
+
+# фоновое удаление потерянных аудиофайлов: интервал между полными проходами в секундах (0 - отключено)
+# и минимальный возраст удаляемого файла в секундах
+GC_INTERVAL = float(os.environ.get('FREEMUSIC_GC_INTERVAL', 3600))
+GC_GRACE_PERIOD = float(os.environ.get('FREEMUSIC_GC_GRACE_PERIOD', 24 * 3600))
+
+# отслеживание изменений каталога, сохранённых другими клиентами общей БД: интервал проверки
+# в секундах (0 - отключено) и срок хранения отметок об удалении записей в секундах
+CHANGE_POLL_INTERVAL = float(os.environ.get('FREEMUSIC_CHANGE_POLL_INTERVAL', 1.0))
+TOMBSTONE_RETENTION = float(os.environ.get('FREEMUSIC_TOMBSTONE_RETENTION', 7 * 24 * 3600))
+
+# HTTP-сервер каталога (server.py): адрес и порт, максимальное количество одновременно
+# обрабатываемых запросов и открытых соединений, количество потоков для обращений к БД
+# и хранилищу (не больше числа соединений пула БД, см. db.ENGINE_PROFILES)
+SERVER_HOST = os.environ.get('FREEMUSIC_SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.environ.get('FREEMUSIC_SERVER_PORT', 8080))
+SERVER_MAX_REQUESTS = int(os.environ.get('FREEMUSIC_SERVER_MAX_REQUESTS', 64))
+SERVER_MAX_CONNECTIONS = int(os.environ.get('FREEMUSIC_SERVER_MAX_CONNECTIONS', 1000))
+SERVER_THREADS = int(os.environ.get('FREEMUSIC_SERVER_THREADS', 8))
+
+# сбор метрик производительности (SQL-запросы, хранилище, bcrypt, отрисовка виджетов) и отладочная панель (F12);
+# при указании файла метрики сохраняются в него при закрытии приложения (.prom - формат Prometheus, иначе JSON)
+INSTRUMENTATION = os.environ.get('FREEMUSIC_INSTRUMENTATION', '') == '1'
+METRICS_FILE = os.environ.get('FREEMUSIC_METRICS_FILE', '')
@@ -1,7 +1,7 @@
 from datetime import datetime, date
 from typing import List
 
-from sqlalchemy import func, Column, String, ForeignKey, Table
+from sqlalchemy import create_engine, event, func, Column, String, ForeignKey, Table, Index, Engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -9,12 +9,90 @@ class Base(DeclarativeBase):
     pass
 
 
+def enable_foreign_keys(engine: Engine) -> None:
+    """Включение проверки внешних ключей (и каскадного удаления) для соединений SQLite.
+
+    Композиции, альбомы и связи с жанрами удаляются средствами БД (ON DELETE CASCADE),
+    поэтому ORM не загружает удаляемые дочерние объекты."""
+
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_foreign_keys_pragma(dbapi_connection, connection_record):
+        dbapi_connection.execute('PRAGMA foreign_keys = ON')
+
+
+# профили настройки подключения к БД: параметры PRAGMA для SQLite и параметры create_engine
+ENGINE_PROFILES = {
+    # настройки SQLite по умолчанию (журнал отката, полная синхронизация с диском)
+    'default': {
+        'pragmas': {},
+        'engine': {}
+    },
+    # журнал WAL (чтение не блокируется записью), синхронизация с диском только
+    # при контрольных точках WAL, чтение через mmap и увеличенный страничный кэш
+    'tuned': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # отрицательное значение - размер в КиБ
+            'temp_store': 'MEMORY'
+        },
+        'engine': {
+            'pool_size': 5,
+            'max_overflow': 10,
+            'query_cache_size': 1000,  # кэш скомпилированных SQLAlchemy запросов
+            'connect_args': {'cached_statements': 256}  # кэш подготовленных выражений sqlite3
+        }
+    }
+}
+
+
+def create_database_engine(database_url: str, profile: str = 'tuned', echo: bool = False) -> Engine:
+    """Создание подключения к БД с заданным профилем настройки (см. ENGINE_PROFILES).
+
+    Параметры PRAGMA применяются к каждому новому соединению пула."""
+
+    settings = ENGINE_PROFILES[profile]
+
+    engine_settings = dict(settings['engine'])
+    if not database_url.startswith('sqlite') or database_url in ('sqlite://', 'sqlite:///:memory:'):
+        # размер пула и параметры sqlite3 применимы только к файлам SQLite
+        engine_settings = {k: v for k, v in engine_settings.items() if k == 'query_cache_size'}
+
+    engine = create_engine(database_url, echo=echo, **engine_settings)
+    enable_foreign_keys(engine)
+
+    if engine.dialect.name == 'sqlite' and len(settings['pragmas']) != 0:
+        @event.listens_for(engine, 'connect')
+        def set_profile_pragmas(dbapi_connection, connection_record):
+            for name, value in settings['pragmas'].items():
+                dbapi_connection.execute(f'PRAGMA {name} = {value}')
+
+    return engine
+
+
+# текущее время с миллисекундами в формате хранения дат SQLite; используется для отметок
+# времени изменения, по которым клиенты общей БД находят изменённые другими клиентами записи
+CURRENT_TIMESTAMP_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def current_timestamp():
+    """SQL-выражение текущего времени с миллисекундами."""
+
+    return func.strftime('%Y-%m-%d %H:%M:%f', 'now')
+
+
 # вспомогательная таблица для создания отношения many-to-many
 track_to_genre = Table(
     'track_to_genre',
     Base.metadata,
-    Column('track_id', ForeignKey('track.id'), primary_key=True),
-    Column('genre_id', ForeignKey('genre.id'), primary_key=True)
+    Column('track_id', ForeignKey('track.id', ondelete='CASCADE'), primary_key=True),
+    Column('genre_id', ForeignKey('genre.id', ondelete='CASCADE'), primary_key=True),
+    # первичный ключ (track_id, genre_id) не подходит для поиска по genre_id
+    Index('ix_track_to_genre_genre_id', 'genre_id')
 )
 
 
@@ -41,15 +119,26 @@ class Track(Base):
     __tablename__ = 'track'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String(50))
-    audio_id: Mapped[str] = mapped_column(String(24), nullable=True)
+    name: Mapped[str] = mapped_column(String(50), index=True)
+    audio_id: Mapped[str] = mapped_column(String(24), nullable=True, index=True)
+
+    # сведения об аудиофайле, сохраняемые при загрузке
+    filename: Mapped[str] = mapped_column(String(255), nullable=True)
+    size: Mapped[int] = mapped_column(nullable=True)  # размер в байтах
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True)  # SHA-256
+    duration: Mapped[float] = mapped_column(nullable=True)  # длительность в секундах
+    bitrate: Mapped[int] = mapped_column(nullable=True)  # битрейт в кбит/с
+
     created_at: Mapped[datetime] = mapped_column(insert_default=func.now())
+    # время последнего изменения, поддерживаемое также триггерами БД (migrations.create_change_triggers)
+    updated_at: Mapped[datetime] = mapped_column(nullable=True, index=True, insert_default=current_timestamp(),
+                                                 onupdate=current_timestamp())
 
-    album_id: Mapped[int] = mapped_column(ForeignKey('album.id'))
+    album_id: Mapped[int] = mapped_column(ForeignKey('album.id', ondelete='CASCADE'), index=True)
     album: Mapped['Album'] = relationship(back_populates='tracks')
 
     genres: Mapped[List['Genre']] = relationship(
-        secondary=track_to_genre, back_populates='tracks'
+        secondary=track_to_genre, back_populates='tracks', passive_deletes=True
     )
 
     def __repr__(self):
@@ -62,14 +151,19 @@ class Album(Base):
     __tablename__ = 'album'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String(50))
+    name: Mapped[str] = mapped_column(String(50), index=True)
     release_date: Mapped[date] = mapped_column()
     created_at: Mapped[datetime] = mapped_column(insert_default=func.now())
+    # время последнего изменения, поддерживаемое также триггерами БД (migrations.create_change_triggers)
+    updated_at: Mapped[datetime] = mapped_column(nullable=True, index=True, insert_default=current_timestamp(),
+                                                 onupdate=current_timestamp())
 
-    artist_id: Mapped[int] = mapped_column(ForeignKey('artist.id'))
+    artist_id: Mapped[int] = mapped_column(ForeignKey('artist.id', ondelete='CASCADE'), index=True)
     artist: Mapped['Artist'] = relationship(back_populates='albums')
 
-    tracks: Mapped[List['Track']] = relationship(back_populates='album', cascade='all, delete-orphan')
+    tracks: Mapped[List['Track']] = relationship(
+        back_populates='album', cascade='all, delete-orphan', passive_deletes=True
+    )
 
     def __repr__(self):
         return f'<Album {self.name} by {self.artist}>'
@@ -81,11 +175,16 @@ class Artist(Base):
     __tablename__ = 'artist'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String(50))
+    name: Mapped[str] = mapped_column(String(50), index=True)
     description: Mapped[str] = mapped_column(String(1000))
     created_at: Mapped[datetime] = mapped_column(insert_default=func.now())
+    # время последнего изменения, поддерживаемое также триггерами БД (migrations.create_change_triggers)
+    updated_at: Mapped[datetime] = mapped_column(nullable=True, index=True, insert_default=current_timestamp(),
+                                                 onupdate=current_timestamp())
 
-    albums: Mapped[List['Album']] = relationship(back_populates='artist', cascade='all, delete-orphan')
+    albums: Mapped[List['Album']] = relationship(
+        back_populates='artist', cascade='all, delete-orphan', passive_deletes=True
+    )
 
     def __repr__(self):
         return f'<Artist {self.name}>'
@@ -97,12 +196,35 @@ class Genre(Base):
     __tablename__ = 'genre'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String(50))
+    name: Mapped[str] = mapped_column(String(50), index=True)
     created_at: Mapped[datetime] = mapped_column(insert_default=func.now())
+    # время последнего изменения, поддерживаемое также триггерами БД (migrations.create_change_triggers)
+    updated_at: Mapped[datetime] = mapped_column(nullable=True, index=True, insert_default=current_timestamp(),
+                                                 onupdate=current_timestamp())
 
     tracks: Mapped[List['Track']] = relationship(
-        secondary=track_to_genre, back_populates='genres'
+        secondary=track_to_genre, back_populates='genres', passive_deletes=True
     )
 
     def __repr__(self):
         return f'<Genre {self.name}>'
+
+
+class Tombstone(Base):
+    """Отметка об удалении записи каталога.
+
+    Создаётся триггером БД при удалении композиции, альбома, исполнителя
+    или жанра (в том числе каскадном), чтобы другие клиенты общей БД
+    могли удалить запись из своих списков и кэшей."""
+
+    __tablename__ = 'tombstone'
+    # ID не переиспользуются после удаления старых отметок, поэтому служат курсором
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    entity_type: Mapped[str] = mapped_column(String(10))
+    entity_id: Mapped[int] = mapped_column()
+    deleted_at: Mapped[datetime] = mapped_column(insert_default=current_timestamp(), index=True)
+
+    def __repr__(self):
+        return f'<Tombstone {self.entity_type} {self.entity_id}>'
@@ -0,0 +1,220 @@
+import io
+import os
+import mmap
+import secrets
+import threading
+from collections import OrderedDict
+from typing import BinaryIO
+
+
+class MappedFile(io.RawIOBase):
+    """Файл из кэша, отображённый в память; чтение выполняется без системных вызовов."""
+
+    def __init__(self, path: str, filename: str = None) -> None:
+        """Открытие файла."""
+
+        super().__init__()
+
+        self.filename = filename if filename is not None else os.path.basename(path)
+
+        with open(path, 'rb') as cached_file:
+            self.size = os.fstat(cached_file.fileno()).st_size
+            # пустой файл нельзя отобразить в память
+            self.mapped_file = mmap.mmap(cached_file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self.size - self.position)
+        if size <= 0:
+            return 0
+
+        buffer[:size] = self.mapped_file[self.position:self.position + size]
+        self.position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+
+        self.position = max(0, offset)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def getbuffer(self, start: int = 0, length: int = None) -> memoryview:
+        """Получение фрагмента файла без копирования."""
+
+        if self.mapped_file is None:
+            return memoryview(b'')
+
+        end = self.size if length is None else min(self.size, start + length)
+        return memoryview(self.mapped_file)[start:end]
+
+    def close(self) -> None:
+        # отображение освобождается сборщиком мусора, когда на него не останется ссылок
+        # (например, из полученных через getbuffer фрагментов)
+        self.mapped_file = None
+        super().close()
+
+
+class DiskCache:
+    """Кэш файлов на локальном диске с ограничением общего объёма.
+
+    Файлы записываются во временный каталог и атомарно перемещаются
+    в кэш (os.replace), поэтому в кэше никогда не бывает недописанных
+    файлов. При превышении max_bytes удаляются давно не использовавшиеся
+    файлы; порядок использования восстанавливается при запуске по времени
+    последнего доступа."""
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        """Инициализация кэша в каталоге root."""
+
+        self.root = root
+        self.temp_dir = os.path.join(root, 'tmp')
+        self.max_bytes = max_bytes
+
+        self.entries = OrderedDict()  # ключ -> размер файла, от давно использовавшихся к недавним
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+        os.makedirs(self.temp_dir, exist_ok=True)
+        self.load()
+
+    def load(self) -> None:
+        """Загрузка сведений о файлах, сохранённых при предыдущих запусках."""
+
+        # недописанные временные файлы остаются только после аварийного завершения
+        for name in os.listdir(self.temp_dir):
+            os.remove(os.path.join(self.temp_dir, name))
+
+        cached_files = []
+        for directory, subdirectories, filenames in os.walk(self.root):
+            if directory == self.temp_dir:
+                continue
+            for name in filenames:
+                file_stat = os.stat(os.path.join(directory, name))
+                cached_files.append((file_stat.st_atime, name, file_stat.st_size))
+
+        for _, key, size in sorted(cached_files):
+            self.entries[key] = size
+            self.total_bytes += size
+
+        with self.lock:
+            self.evict()
+
+    def path(self, key: str) -> str:
+        """Путь к файлу в кэше."""
+
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str) -> str:
+        """Получение пути к кэшированному файлу (None, если файла нет в кэше)."""
+
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.path(key)
+
+    def contains(self, key: str) -> bool:
+        """Проверка наличия файла в кэше (не учитывается в статистике)."""
+
+        with self.lock:
+            return key in self.entries
+
+    def put(self, key: str, source: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+        """Сохранение файла из потока в кэш; возвращает путь к файлу.
+
+        Файлы больше max_bytes не кэшируются (возвращается None)."""
+
+        temp_path = os.path.join(self.temp_dir, secrets.token_hex(8))
+        size = 0
+        try:
+            with open(temp_path, 'wb') as temp_file:
+                while chunk := source.read(chunk_size):
+                    temp_file.write(chunk)
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        break
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        if size > self.max_bytes:
+            os.remove(temp_path)
+            return None
+
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self.lock:
+            os.replace(temp_path, path)
+
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.evict()
+
+        return path
+
+    def discard(self, key: str) -> None:
+        """Удаление файла из кэша."""
+
+        with self.lock:
+            size = self.entries.pop(key, None)
+            if size is None:
+                return
+            self.total_bytes -= size
+            self.remove_file(key)
+
+    def evict(self) -> None:
+        """Удаление давно не использовавшихся файлов до соблюдения ограничения объёма (под блокировкой)."""
+
+        while self.total_bytes > self.max_bytes and len(self.entries) != 0:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            self.evicted_bytes += size
+            self.remove_file(key)
+
+    def remove_file(self, key: str) -> None:
+        """Удаление файла кэша с диска."""
+
+        try:
+            os.remove(self.path(key))
+        except (FileNotFoundError, PermissionError):
+            # в Windows нельзя удалить файл, пока он отображён в память
+            pass
+
+    def stats(self) -> dict:
+        """Получение статистики использования кэша."""
+
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests if requests else 0.0,
+                'evictions': self.evictions,
+                'evicted_bytes': self.evicted_bytes,
+                'files': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,218 @@
+import time
+import threading
+
+from sqlalchemy import select, func, Engine
+
+from db import Track
+from blob_store import BlobStore
+
+
+class ConsistencyChecker:
+    """Проверка согласованности таблицы композиций и хранилища аудиофайлов.
+
+    ID файлов хранилища и значения track.audio_id перебираются в порядке
+    возрастания порциями по batch_size файлов: для каждой порции одним
+    запросом (по индексу audio_id) подсчитываются ссылающиеся на файлы
+    композиции того же диапазона ID. Поэтому объём памяти не зависит от
+    размера каталога, а проверку можно выполнять по частям.
+
+    Находятся потерянные файлы (на них не ссылается ни одна композиция),
+    висячие ссылки (композиции с несуществующим файлом) и расхождения
+    счётчика ссылок файла с числом композиций. Потерянные файлы старше
+    grace_period секунд могут удаляться."""
+
+    REPORT_LIMIT = 1000  # максимальное количество ID каждого вида в отчёте
+
+    def __init__(self, engine: Engine, blob_store: BlobStore, batch_size: int = 1000,
+                 grace_period: float = 24 * 3600, delete_orphans: bool = False) -> None:
+        """Инициализация проверки."""
+
+        self.engine = engine
+        self.blob_store = blob_store
+        self.batch_size = batch_size
+        self.grace_period = grace_period
+        self.delete_orphans = delete_orphans
+
+        self.after_id = None
+        self.finished = False
+        self.report = self.new_report()
+
+    @staticmethod
+    def new_report() -> dict:
+        """Создание пустого отчёта."""
+
+        return {
+            'blobs': 0,
+            'referenced_blobs': 0,
+            'orphaned': 0,
+            'dangling': 0,
+            'refcount_mismatches': 0,
+            'deleted': 0,
+            'deleted_bytes': 0,
+            'orphaned_ids': [],
+            'dangling_ids': [],
+            'refcount_mismatch_ids': []
+        }
+
+    def restart(self) -> None:
+        """Начало новой полной проверки."""
+
+        self.after_id = None
+        self.finished = False
+        self.report = self.new_report()
+
+    def run(self) -> dict:
+        """Полная проверка; возвращает отчёт."""
+
+        while not self.finished:
+            self.step()
+
+        return self.report
+
+    def step(self) -> None:
+        """Проверка очередной порции файлов хранилища."""
+
+        if self.finished:
+            return
+
+        blobs = []
+        for blob_stat in self.blob_store.iter_blobs(self.after_id):
+            blobs.append(blob_stat)
+            if len(blobs) == self.batch_size:
+                break
+
+        # последняя порция захватывает все оставшиеся ссылки
+        last_id = blobs[-1].id if len(blobs) == self.batch_size else None
+        references = self.count_references(self.after_id, last_id)
+
+        orphans = []
+        for blob_stat in blobs:
+            track_count = references.pop(blob_stat.id, 0)
+            if track_count == 0:
+                self.add_to_report('orphaned', blob_stat.id)
+                orphans.append(blob_stat)
+            else:
+                self.report['referenced_blobs'] += 1
+                if blob_stat.refcount != track_count:
+                    self.add_to_report('refcount_mismatch', blob_stat.id)
+
+        # оставшиеся ссылки указывают на отсутствующие в хранилище файлы
+        for audio_id in references:
+            self.add_to_report('dangling', audio_id)
+
+        self.report['blobs'] += len(blobs)
+
+        if self.delete_orphans and len(orphans) != 0:
+            self.delete(orphans)
+
+        if last_id is None:
+            self.finished = True
+        else:
+            self.after_id = last_id
+
+    def count_references(self, after_id: str, last_id: str) -> dict[str, int]:
+        """Подсчёт композиций, ссылающихся на файлы с ID из диапазона (after_id, last_id]."""
+
+        statement = (
+            select(Track.audio_id, func.count())
+            .where(Track.audio_id.is_not(None))
+            .group_by(Track.audio_id)
+        )
+        if after_id is not None:
+            statement = statement.where(Track.audio_id > after_id)
+        if last_id is not None:
+            statement = statement.where(Track.audio_id <= last_id)
+
+        with self.engine.connect() as connection:
+            return {audio_id: count for audio_id, count in connection.execute(statement)}
+
+    def delete(self, orphans: list) -> None:
+        """Удаление потерянных файлов старше периода ожидания.
+
+        Перед удалением ссылки на файлы проверяются повторно, а файлы, счётчик
+        ссылок которых изменился с момента проверки (например, при добавлении
+        композиции с таким же содержимым), не удаляются."""
+
+        deadline = time.time() - self.grace_period
+        candidates = {blob_stat.id: blob_stat for blob_stat in orphans if blob_stat.created_at < deadline}
+        if len(candidates) == 0:
+            return
+
+        with self.engine.connect() as connection:
+            referenced = set(connection.scalars(
+                select(Track.audio_id).where(Track.audio_id.in_(list(candidates)))
+            ))
+
+        current_stats = self.blob_store.stat_many(list(candidates))
+        for blob_id, blob_stat in candidates.items():
+            current_stat = current_stats.get(blob_id)
+            if blob_id in referenced or current_stat is None or current_stat.refcount != blob_stat.refcount:
+                continue
+
+            self.blob_store.delete(blob_id)
+            self.report['deleted'] += 1
+            self.report['deleted_bytes'] += blob_stat.size
+
+    def add_to_report(self, kind: str, blob_id: str) -> None:
+        """Учёт найденной проблемы в отчёте."""
+
+        self.report[kind if kind != 'refcount_mismatch' else 'refcount_mismatches'] += 1
+        ids = self.report[f'{kind}_ids']
+        if len(ids) < self.REPORT_LIMIT:
+            ids.append(blob_id)
+
+
+class GarbageCollector(threading.Thread):
+    """Фоновое удаление потерянных аудиофайлов.
+
+    Проверка выполняется порциями с паузой batch_interval секунд между ними,
+    чтобы не создавать заметной нагрузки на БД и хранилище; после завершения
+    полного прохода следующий начинается через pass_interval секунд.
+    Отчёт о последнем завершённом проходе доступен в last_report."""
+
+    def __init__(self, session, batch_size: int = 1000, grace_period: float = 24 * 3600,
+                 batch_interval: float = 1.0, pass_interval: float = 3600) -> None:
+        """Инициализация сборщика; session - сессия MusicSession."""
+
+        super().__init__(daemon=True)
+
+        self.session = session
+        self.batch_size = batch_size
+        self.grace_period = grace_period
+        self.batch_interval = batch_interval
+        self.pass_interval = pass_interval
+
+        self.last_report = None
+        self.stop_requested = threading.Event()
+
+    def stop(self) -> None:
+        """Остановка сборщика."""
+
+        self.stop_requested.set()
+
+    def run(self) -> None:
+        """Выполнение проходов сборки."""
+
+        try:
+            self.session.wait_until_ready()
+        except Exception:
+            return
+
+        checker = ConsistencyChecker(self.session.engine, self.session.blob_store, self.batch_size,
+                                     self.grace_period, delete_orphans=True)
+
+        while not self.stop_requested.is_set():
+            try:
+                checker.step()
+            except Exception:
+                # ошибка доступа к БД или хранилищу: проход начинается заново после паузы
+                checker.restart()
+                self.stop_requested.wait(self.pass_interval)
+                continue
+
+            if checker.finished:
+                self.last_report = checker.report
+                checker.restart()
+                self.stop_requested.wait(self.pass_interval)
+            else:
+                self.stop_requested.wait(self.batch_interval)
@@ -1,11 +1,14 @@
+import queue
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Any
 
+import config
+import instrumentation
 from session import MusicSession
 from gui.login_frame import LoginFrame
 from gui.sign_up_frame import SignUpFrame
-from gui.main_frame.main_frame import MainFrame
 
 
 class App(tk.Tk):
@@ -14,6 +17,9 @@ class App(tk.Tk):
     FONT = 'Helvetica 12'
     HEADER_FONT = 'Helvetica 14 bold'
 
+    BACKGROUND_POLL_INTERVAL = 50  # интервал проверки завершения фоновых задач (в мс)
+    BACKGROUND_WORKERS = 2  # количество потоков для фоновых задач
+
     def __init__(self):
         """Инициализация основного окна приложения."""
 
@@ -26,19 +32,28 @@ class App(tk.Tk):
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
 
-        self.session = MusicSession()
+        # подготовка БД и хранилища выполняется в фоновом потоке, не задерживая отображение окна
+        self.session = MusicSession(prepare=False)
 
-        account_image = Image.open('img/account.png')
-        self.account_image = ImageTk.PhotoImage(account_image.resize((40, 40)))
+        # изображения и основной виджет создаются при первом входе в аккаунт
+        self.account_image = None
+        self.logout_image = None
+        self.add_image = None
+        self.delete_image = None
+        self.main_frame = None
 
-        logout_image = Image.open('img/logout.png')
-        self.logout_image = ImageTk.PhotoImage(logout_image.resize((40, 40)))
+        # проигрыватель создаётся при первом воспроизведении
+        self.player = None
 
-        add_image = Image.open('img/add.png')
-        self.add_image = ImageTk.PhotoImage(add_image.resize((60, 60)))
+        # пул потоков для длительных операций (например, хеширования паролей)
+        self.executor = ThreadPoolExecutor(self.BACKGROUND_WORKERS, thread_name_prefix='background')
 
-        delete_image = Image.open('img/delete.png')
-        self.delete_image = ImageTk.PhotoImage(delete_image.resize((40, 40)))
+        # изменения каталога могут сохраняться в фоновых потоках, поэтому оповещения сессии
+        # передаются через очередь и обрабатываются в основном потоке
+        self.change_listeners = []
+        self.changes = queue.Queue()
+        self.session.subscribe(self.changes.put)
+        self.after(self.BACKGROUND_POLL_INTERVAL, self.dispatch_changes)
 
         self.login_frame = LoginFrame(self)
         self.login_frame.grid(row=0, column=0, sticky='nsew')
@@ -46,13 +61,47 @@ class App(tk.Tk):
         self.sign_up_frame = SignUpFrame(self)
         self.sign_up_frame.grid(row=0, column=0, sticky='nsew')
 
-        self.main_frame = MainFrame(self)
-        self.main_frame.grid(row=0, column=0, sticky='nsew')
-
         self.configure_style()
 
         self.show_login_frame()
 
+        self.session.prepare_in_background()
+
+        # отладочная панель с количеством запросов и временем отрисовки экранов
+        self.debug_overlay = None
+        if instrumentation.enabled():
+            from gui.debug_overlay import DebugOverlay
+
+            self.debug_overlay = DebugOverlay(self)
+
+        # фоновое удаление потерянных аудиофайлов (начинается после подготовки сессии)
+        self.garbage_collector = None
+        if config.GC_INTERVAL > 0:
+            self.garbage_collector = self.session.start_garbage_collector()
+
+        # получение изменений каталога, сохранённых другими клиентами общей БД
+        self.change_watcher = None
+        if config.CHANGE_POLL_INTERVAL > 0:
+            self.change_watcher = self.session.start_change_watcher()
+
+    def load_images(self):
+        """Загрузка изображений кнопок."""
+
+        # PIL импортируется только при первой загрузке изображений
+        from PIL import Image, ImageTk
+
+        account_image = Image.open('img/account.png')
+        self.account_image = ImageTk.PhotoImage(account_image.resize((40, 40)))
+
+        logout_image = Image.open('img/logout.png')
+        self.logout_image = ImageTk.PhotoImage(logout_image.resize((40, 40)))
+
+        add_image = Image.open('img/add.png')
+        self.add_image = ImageTk.PhotoImage(add_image.resize((60, 60)))
+
+        delete_image = Image.open('img/delete.png')
+        self.delete_image = ImageTk.PhotoImage(delete_image.resize((40, 40)))
+
     def show_login_frame(self):
         """Отображение виджета входа в аккаунт."""
 
@@ -68,9 +117,89 @@ class App(tk.Tk):
     def show_main_frame(self):
         """Отображение основного виджета приложения."""
 
+        if self.main_frame is None:
+            # модули основного виджета (в том числе tkcalendar) импортируются при первом входе в аккаунт
+            from gui.main_frame.main_frame import MainFrame
+
+            self.load_images()
+
+            self.main_frame = MainFrame(self)
+            self.main_frame.grid(row=0, column=0, sticky='nsew')
+
         self.main_frame.reset()
         self.main_frame.tkraise()
 
+    def run_in_background(self, function: Callable, on_done: Callable[[Any], None], *args) -> None:
+        """Выполнение функции в пуле потоков без блокировки интерфейса.
+
+        on_done вызывается в основном потоке с результатом функции; если функция
+        завершилась исключением, результатом считается пара (False, исключение)."""
+
+        future = self.executor.submit(function, *args)
+        self.after(self.BACKGROUND_POLL_INTERVAL, self.check_background_task, future, on_done)
+
+    def check_background_task(self, future: Future, on_done: Callable[[Any], None]) -> None:
+        """Проверка завершения фоновой задачи."""
+
+        if not future.done():
+            self.after(self.BACKGROUND_POLL_INTERVAL, self.check_background_task, future, on_done)
+            return
+
+        try:
+            result = future.result()
+        except Exception as e:
+            result = False, e
+
+        on_done(result)
+
+    def add_change_listener(self, listener: Callable[[Any], None]) -> None:
+        """Подписка виджета на изменения каталога (вызывается в основном потоке)."""
+
+        self.change_listeners.append(listener)
+
+    def dispatch_changes(self) -> None:
+        """Передача накопившихся изменений каталога подписанным виджетам."""
+
+        while True:
+            try:
+                change = self.changes.get_nowait()
+            except queue.Empty:
+                break
+
+            for listener in self.change_listeners:
+                listener(change)
+
+        self.after(self.BACKGROUND_POLL_INTERVAL, self.dispatch_changes)
+
+    def get_player(self):
+        """Получение проигрывателя аудиофайлов (создаётся при первом обращении)."""
+
+        if self.player is None:
+            from playback import Player
+
+            self.player = Player(self.session.blob_store)
+
+        return self.player
+
+    def destroy(self):
+        """Остановка воспроизведения и фоновых задач, сохранение метрик и закрытие приложения."""
+
+        if self.player is not None:
+            self.player.stop()
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+        if self.garbage_collector is not None:
+            self.garbage_collector.stop()
+
+        if self.change_watcher is not None:
+            self.change_watcher.stop()
+
+        if instrumentation.enabled() and config.METRICS_FILE:
+            instrumentation.metrics.export(config.METRICS_FILE)
+
+        super().destroy()
+
     def configure_style(self):
         """Настройка стиля приложения."""
 
@@ -78,3 +207,5 @@ class App(tk.Tk):
         style.configure('TLabel', font=self.FONT)
         style.configure('TButton', font=self.FONT)
         style.configure('TCheckbutton', font=self.FONT)
+        style.configure('Treeview', font=self.FONT, rowheight=30)
+        style.configure('Treeview.Heading', font=self.HEADER_FONT)
@@ -0,0 +1,45 @@
+from tkinter import ttk
+
+import instrumentation
+
+
+class DebugOverlay(ttk.Label):
+    """Отладочная панель в углу окна: количество SQL-запросов и время отрисовки последнего экрана.
+
+    Отображается при включённой инструментации; скрывается и показывается клавишей F12."""
+
+    REFRESH_INTERVAL = 500  # интервал обновления панели (в мс)
+
+    def __init__(self, container):
+        """Инициализация панели."""
+
+        super().__init__(container, font='Courier 10', background='#ffffe0', padding=(6, 2))
+
+        self.visible = True
+        container.bind('<F12>', lambda event: self.toggle())
+
+        self.refresh()
+
+    def toggle(self) -> None:
+        """Скрытие или отображение панели."""
+
+        self.visible = not self.visible
+        if not self.visible:
+            self.place_forget()
+
+    def refresh(self) -> None:
+        """Обновление текста панели по сведениям о последнем отображённом экране."""
+
+        if self.visible:
+            last_screen = instrumentation.metrics.last_screen
+            if last_screen is None:
+                self.configure(text='нет данных')
+            else:
+                self.configure(text=f'{last_screen["screen"]}: запросов {last_screen["queries"]}, '
+                                    f'{last_screen["render_ms"]:.1f} мс')
+
+            # отображаемые виджеты поднимаются над остальными, поэтому панель поднимается после них
+            self.place(relx=1.0, rely=1.0, anchor='se')
+            self.lift()
+
+        self.after(self.REFRESH_INTERVAL, self.refresh)
@@ -64,8 +64,17 @@ class LoginFrame(ttk.Frame):
             showerror(title='Ошибка входа', message='Недопустимая длина пароля')
             return
 
-        # вход в аккаунт
-        success, message = self.app.session.login(self.login.get(), self.password.get())
+        # вход в аккаунт (проверка пароля выполняется в фоновом потоке)
+        self.login_button.state(['disabled'])
+        self.app.run_in_background(self.app.session.login, self.finish_login,
+                                   self.login.get(), self.password.get())
+
+    def finish_login(self, result: tuple) -> None:
+        """Обработка результата попытки входа в аккаунт."""
+
+        self.login_button.state(['!disabled'])
+
+        success, message = result
         if success:
             self.app.show_main_frame()
         else:
@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter.messagebox import showerror, showinfo
 
+from instrumentation import timed_screen
+
 
 class AccountFrame(ttk.Frame):
     """Виджет редактирования данных аккаунта."""
@@ -66,6 +68,7 @@ class AccountFrame(ttk.Frame):
         self.save_button = ttk.Button(self, text='Сохранить', command=self.save_changes)
         self.save_button.grid(row=5, column=0, columnspan=2, **padding)
 
+    @timed_screen
     def reset(self) -> None:
         """Сброс состояния виджета."""
 
@@ -106,7 +109,16 @@ class AccountFrame(ttk.Frame):
         elif self.bio_entry.get('1.0', 'end') != self.session.user.bio:
             bio = self.bio_entry.get('1.0', 'end')
 
-        success, message = self.session.edit_account(password, username, bio)
+        # сохранение изменений (хеширование нового пароля выполняется в фоновом потоке)
+        self.save_button.state(['disabled'])
+        self.app.run_in_background(self.session.edit_account, self.finish_save_changes, password, username, bio)
+
+    def finish_save_changes(self, result: tuple) -> None:
+        """Обработка результата сохранения изменений."""
+
+        self.save_button.state(['!disabled'])
+
+        success, message = result
         if success:
             self.reset()
             showinfo(title='Успех', message='Изменения сохранены')
@@ -3,6 +3,9 @@ from tkinter import ttk
 from tkinter.messagebox import askokcancel, showinfo, showerror
 from tkcalendar import DateEntry
 
+from gui.virtual_table import VirtualTable
+from instrumentation import timed_screen
+
 
 class AlbumFrame(ttk.Frame):
     """Виджет отображения и редактирования списка альбомов."""
@@ -18,69 +21,89 @@ class AlbumFrame(ttk.Frame):
         self.session = self.app.session
 
         self.add_album_button = None
+        self.delete_album_button = None
+        self.buttons_frame = None
         self.no_albums_label = None
-        self.albums_frame = None
+        self.albums_table = None
+
+        self.app.add_change_listener(self.on_change)
 
+    @timed_screen
     def update(self) -> None:
         """Обновление состояния виджета."""
 
         # удаление всех дочерних виджетов
         for child in self.winfo_children():
             child.destroy()
+        self.no_albums_label = None
+        self.albums_table = None
 
-        # получение списка добавленных альбомов
-        albums = self.session.get_all_albums()
+        # получение первой страницы списка добавленных альбомов
+        albums = self.session.get_albums_page()
 
         if len(albums) == 0:  # если пока не добавлено ни одного альбома
             self.no_albums_label = ttk.Label(self, text='Пока не добавлено ни одного альбома',
                                              font='Helvetica 16')
             self.no_albums_label.pack(pady=(150, 0))
-        else:  # заполнение шапки таблицы
-            self.albums_frame = ttk.Frame(self)
+        else:  # отображение списка альбомов
+            self.albums_table = VirtualTable(self, columns=(
+                ('Название', 320),
+                ('Дата выхода', 320),
+                ('Исполнитель', 320)
+            ))
+            self.albums_table.set_rows(albums, lambda album: (
+                album.name,
+                album.release_date.strftime('%d-%m-%Y'),
+                album.artist.name
+            ), load_more=self.load_more_albums)
+            self.albums_table.pack(side='top', fill='x', **self.padding)
 
-            self.albums_frame.columnconfigure(0, weight=2)
-            self.albums_frame.columnconfigure(1, weight=2)
-            self.albums_frame.columnconfigure(2, weight=2)
-            self.albums_frame.columnconfigure(3, weight=1)
-
-            name_label = ttk.Label(self.albums_frame, text='Название', font=self.app.HEADER_FONT)
-            name_label.grid(row=0, column=0)
+        # если пользователь администратор
+        # создание кнопок добавления и удаления альбома
+        if self.session.user is not None:
+            if self.session.user.is_admin:
+                self.buttons_frame = ttk.Frame(self)
 
-            release_date_label = ttk.Label(self.albums_frame, text='Дата выхода', font=self.app.HEADER_FONT)
-            release_date_label.grid(row=0, column=1)
+                self.add_album_button = ttk.Button(self.buttons_frame, image=self.app.add_image,
+                                                   command=self.show_add_album_window)
+                self.add_album_button.pack(side='left', padx=10)
 
-            artist_name_label = ttk.Label(self.albums_frame, text='Исполнитель', font=self.app.HEADER_FONT)
-            artist_name_label.grid(row=0, column=2)
+                if len(albums) != 0:
+                    self.delete_album_button = ttk.Button(self.buttons_frame, image=self.app.delete_image,
+                                                          command=self.delete_selected_albums)
+                    self.delete_album_button.pack(side='left', padx=10)
 
-            self.albums_frame.pack(side='top', fill='x', **self.padding)
+                self.buttons_frame.pack(side='top', **self.padding)
 
-        # отображение списка альбомов
-        for i, album in enumerate(albums):
-            separator = ttk.Separator(self.albums_frame, orient='horizontal')
-            separator.grid(row=2 * i + 1, column=0, columnspan=4, sticky='nsew', pady=10)
+    def load_more_albums(self, last_album):
+        """Получение следующей страницы списка альбомов."""
 
-            name_label = ttk.Label(self.albums_frame, text=album.name)
-            name_label.grid(row=2 * i + 2, column=0)
+        return self.session.get_albums_page(after_id=last_album.id)
 
-            release_date_label = ttk.Label(self.albums_frame, text=album.release_date.strftime('%d-%m-%Y'))
-            release_date_label.grid(row=2 * i + 2, column=1)
+    def on_change(self, change) -> None:
+        """Обновление только затронутых изменением каталога строк списка альбомов."""
 
-            artist_name_label = ttk.Label(self.albums_frame, text=self.session.get_artist(album.artist_id).name)
-            artist_name_label.grid(row=2 * i + 2, column=2)
+        if change.entity_type != 'album':
+            return
 
-            if self.session.user is not None:
-                if self.session.user.is_admin:
-                    delete_button = ttk.Button(self.albums_frame, image=self.app.delete_image,
-                                               command=lambda album_id=album.id: self.delete_album(album_id))
-                    delete_button.grid(row=2 * i + 2, column=3)
+        if self.albums_table is None:
+            # список пуст: при добавлении первой записи виджет строится заново
+            if self.no_albums_label is not None and change.op == 'insert':
+                self.update()
+            return
 
-        # если пользователь администратор
-        # создание кнопки добавления альбома
-        if self.session.user is not None:
-            if self.session.user.is_admin:
-                self.add_album_button = ttk.Button(self, image=self.app.add_image,
-                                                   command=self.show_add_album_window)
-                self.add_album_button.pack(side='top', **self.padding)
+        if change.op == 'insert':
+            self.albums_table.load_new_rows()
+        elif change.op == 'update':
+            # строки, которые ещё не загружены, будут получены при прокрутке уже изменёнными
+            loaded_ids = {album.id for album in self.albums_table.rows}
+            album_ids = [album_id for album_id in change.ids if album_id in loaded_ids]
+            if len(album_ids) != 0:
+                self.albums_table.replace_rows(self.session.get_album_rows(album_ids))
+        elif change.op == 'delete':
+            self.albums_table.remove_rows(change.ids)
+            if len(self.albums_table.rows) == 0:
+                self.update()
 
     def show_add_album_window(self) -> None:
         """Отображение окна добавления альбома."""
@@ -88,25 +111,34 @@ class AlbumFrame(ttk.Frame):
         add_album_window = AddAlbumWindow(self)
         add_album_window.grab_set()
 
-    def delete_album(self, album_id: int) -> None:
-        """Удаление альбома."""
+    def delete_selected_albums(self) -> None:
+        """Удаление выбранных в таблице альбомов."""
+
+        albums = self.albums_table.selected_rows()
+        if len(albums) == 0:
+            showerror(title='Ошибка удаления альбомов', message='Альбомы не выбраны')
+            return
+
+        self.delete_albums([album.id for album in albums])
+
+    def delete_albums(self, album_ids: list[int]) -> None:
+        """Удаление альбомов одной операцией с обновлением только удалённых строк списка."""
 
-        # подтверждение удаления альбома
+        # подтверждение удаления альбомов
         confirmation = askokcancel(
-            title='Подтверждение удаления альбома',
-            message='Вы уверены, что хотите безвозвратно удалить альбом?',
+            title='Подтверждение удаления альбомов',
+            message=f'Вы уверены, что хотите безвозвратно удалить выбранные альбомы ({len(album_ids)})?',
             icon='warning'
         )
         if not confirmation:
             return
 
-        # попытка удаления альбома
-        success, message = self.session.delete_album(album_id)
+        # попытка удаления альбомов
+        success, message = self.session.delete_albums(album_ids)
         if success:
-            self.update()
-            showinfo(title='Успех', message='Удаление альбома прошло успешно')
+            showinfo(title='Успех', message='Удаление альбомов прошло успешно')
         else:
-            showerror(title='Ошибка удаления альбома', message=message)
+            showerror(title='Ошибка удаления альбомов', message=message)
 
 
 class AddAlbumWindow(tk.Toplevel):
@@ -181,7 +213,6 @@ class AddAlbumWindow(tk.Toplevel):
             self.artist_ids[self.artist_name_combobox.current()]
         )
         if success:
-            self.parent.update()
             self.destroy()
             showinfo(title='Успех', message='Добавление альбома прошло успешно')
         else:
@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter.messagebox import askokcancel, showinfo, showerror
 
+from gui.virtual_table import VirtualTable
+from instrumentation import timed_screen
+
 
 class ArtistFrame(ttk.Frame):
     """Виджет отображения и редактирования списка исполнителей."""
@@ -17,62 +20,87 @@ class ArtistFrame(ttk.Frame):
         self.session = self.app.session
 
         self.add_artist_button = None
+        self.delete_artist_button = None
+        self.buttons_frame = None
         self.no_artists_label = None
-        self.artists_frame = None
+        self.artists_table = None
+
+        self.app.add_change_listener(self.on_change)
 
+    @timed_screen
     def update(self) -> None:
         """Обновление состояния виджета."""
 
         # удаление всех дочерних виджетов
         for child in self.winfo_children():
             child.destroy()
+        self.no_artists_label = None
+        self.artists_table = None
 
-        # получение списка добавленных исполнителей
-        artists = self.session.get_all_artists()
+        # получение первой страницы списка добавленных исполнителей
+        artists = self.session.get_artists_page()
 
         if len(artists) == 0:  # если пока не добавлено ни одного исполнителя
             self.no_artists_label = ttk.Label(self, text='Пока не добавлено ни одного исполнителя',
                                               font='Helvetica 16')
             self.no_artists_label.pack(pady=(150, 0))
-        else:  # заполнение шапки таблицы
-            self.artists_frame = ttk.Frame(self)
+        else:  # отображение списка исполнителей
+            self.artists_table = VirtualTable(self, columns=(
+                ('Название', 320),
+                ('Описание/биография', 640)
+            ))
+            self.artists_table.set_rows(artists, lambda artist: (
+                artist.name,
+                ' '.join(artist.description.split())
+            ), load_more=self.load_more_artists)
+            self.artists_table.pack(side='top', fill='x', **self.padding)
 
-            self.artists_frame.columnconfigure(0, weight=2)
-            self.artists_frame.columnconfigure(1, weight=2)
-            self.artists_frame.columnconfigure(2, weight=1)
+        # если пользователь администратор
+        # создание кнопок добавления и удаления исполнителя
+        if self.session.user is not None:
+            if self.session.user.is_admin:
+                self.buttons_frame = ttk.Frame(self)
 
-            name_label = ttk.Label(self.artists_frame, text='Название', font=self.app.HEADER_FONT)
-            name_label.grid(row=0, column=0)
+                self.add_artist_button = ttk.Button(self.buttons_frame, image=self.app.add_image,
+                                                    command=self.show_add_artist_window)
+                self.add_artist_button.pack(side='left', padx=10)
 
-            description_label = ttk.Label(self.artists_frame, text='Описание/биография', font=self.app.HEADER_FONT)
-            description_label.grid(row=0, column=1)
+                if len(artists) != 0:
+                    self.delete_artist_button = ttk.Button(self.buttons_frame, image=self.app.delete_image,
+                                                           command=self.delete_selected_artists)
+                    self.delete_artist_button.pack(side='left', padx=10)
 
-            self.artists_frame.pack(side='top', fill='x', **self.padding)
+                self.buttons_frame.pack(side='top', **self.padding)
 
-        # отображение списка исполнителей
-        for i, artist in enumerate(artists):
-            separator = ttk.Separator(self.artists_frame, orient='horizontal')
-            separator.grid(row=2 * i + 1, column=0, columnspan=3, sticky='nsew', pady=10)
+    def load_more_artists(self, last_artist):
+        """Получение следующей страницы списка исполнителей."""
 
-            name_label = ttk.Label(self.artists_frame, text=artist.name)
-            name_label.grid(row=2 * i + 2, column=0)
+        return self.session.get_artists_page(after_id=last_artist.id)
 
-            description_label = ttk.Label(self.artists_frame, text=artist.description.strip('\n'), justify='center')
-            description_label.grid(row=2 * i + 2, column=1)
+    def on_change(self, change) -> None:
+        """Обновление только затронутых изменением каталога строк списка исполнителей."""
 
-            if self.session.user is not None:
-                if self.session.user.is_admin:
-                    delete_button = ttk.Button(self.artists_frame, image=self.app.delete_image,
-                                               command=lambda artist_id=artist.id: self.delete_artist(artist_id))
-                    delete_button.grid(row=2 * i + 2, column=2)
+        if change.entity_type != 'artist':
+            return
 
-        # если пользователь администратор
-        # создание кнопки добавления исполнителя
-        if self.session.user is not None:
-            if self.session.user.is_admin:
-                self.add_artist_button = ttk.Button(self, image=self.app.add_image,
-                                                    command=self.show_add_artist_window)
-                self.add_artist_button.pack(side='top', **self.padding)
+        if self.artists_table is None:
+            # список пуст: при добавлении первой записи виджет строится заново
+            if self.no_artists_label is not None and change.op == 'insert':
+                self.update()
+            return
+
+        if change.op == 'insert':
+            self.artists_table.load_new_rows()
+        elif change.op == 'update':
+            # строки, которые ещё не загружены, будут получены при прокрутке уже изменёнными
+            loaded_ids = {artist.id for artist in self.artists_table.rows}
+            artist_ids = [artist_id for artist_id in change.ids if artist_id in loaded_ids]
+            if len(artist_ids) != 0:
+                self.artists_table.replace_rows(self.session.get_artist_rows(artist_ids))
+        elif change.op == 'delete':
+            self.artists_table.remove_rows(change.ids)
+            if len(self.artists_table.rows) == 0:
+                self.update()
 
     def show_add_artist_window(self) -> None:
         """Отображение окна добавления исполнителя."""
@@ -80,25 +108,34 @@ class ArtistFrame(ttk.Frame):
         add_artist_window = AddArtistWindow(self)
         add_artist_window.grab_set()
 
-    def delete_artist(self, artist_id: int) -> None:
-        """Удаление исполнителя."""
+    def delete_selected_artists(self) -> None:
+        """Удаление выбранных в таблице исполнителей."""
+
+        artists = self.artists_table.selected_rows()
+        if len(artists) == 0:
+            showerror(title='Ошибка удаления исполнителей', message='Исполнители не выбраны')
+            return
+
+        self.delete_artists([artist.id for artist in artists])
+
+    def delete_artists(self, artist_ids: list[int]) -> None:
+        """Удаление исполнителей одной операцией с обновлением только удалённых строк списка."""
 
-        # подтверждение удаления исполнителя
+        # подтверждение удаления исполнителей
         confirmation = askokcancel(
-            title='Подтверждение удаления исполнителя',
-            message='Вы уверены, что хотите безвозвратно удалить исполнителя?',
+            title='Подтверждение удаления исполнителей',
+            message=f'Вы уверены, что хотите безвозвратно удалить выбранных исполнителей ({len(artist_ids)})?',
             icon='warning'
         )
         if not confirmation:
             return
 
-        # попытка удаления исполнителя
-        success, message = self.session.delete_artist(artist_id)
+        # попытка удаления исполнителей
+        success, message = self.session.delete_artists(artist_ids)
         if success:
-            self.update()
-            showinfo(title='Успех', message='Удаление исполнителя прошло успешно')
+            showinfo(title='Успех', message='Удаление исполнителей прошло успешно')
         else:
-            showerror(title='Ошибка удаления исполнителя', message=message)
+            showerror(title='Ошибка удаления исполнителей', message=message)
 
 
 class AddArtistWindow(tk.Toplevel):
@@ -159,7 +196,6 @@ class AddArtistWindow(tk.Toplevel):
             self.artist_description_entry.get('1.0', 'end')
         )
         if success:
-            self.parent.update()
             self.destroy()
             showinfo(title='Успех', message='Добавление исполнителя прошло успешно')
         else:
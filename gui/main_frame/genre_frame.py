@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter.messagebox import askokcancel, showinfo, showerror
 
+from gui.virtual_table import VirtualTable
+from instrumentation import timed_screen
+
 
 class GenreFrame(ttk.Frame):
     """Виджет отображения и редактирования списка жанров."""
@@ -17,55 +20,85 @@ class GenreFrame(ttk.Frame):
         self.session = self.app.session
 
         self.add_genre_button = None
+        self.delete_genre_button = None
+        self.buttons_frame = None
         self.no_genres_label = None
-        self.genres_frame = None
+        self.genres_table = None
+
+        self.app.add_change_listener(self.on_change)
 
+    @timed_screen
     def update(self) -> None:
         """Обновление состояния виджета."""
 
         # удаление всех дочерних виджетов
         for child in self.winfo_children():
             child.destroy()
+        self.no_genres_label = None
+        self.genres_table = None
 
-        # получение списка добавленных жанров
-        genres = self.session.get_all_genres()
+        # получение первой страницы списка добавленных жанров
+        genres = self.session.get_genres_page()
 
         if len(genres) == 0:  # если пока не добавлено ни одного жанра
             self.no_genres_label = ttk.Label(self, text='Пока не добавлено ни одного жанра',
                                              font='Helvetica 16')
             self.no_genres_label.pack(pady=(150, 0))
-        else:  # заполнение шапки таблицы
-            self.genres_frame = ttk.Frame(self)
+        else:  # отображение списка жанров
+            self.genres_table = VirtualTable(self, columns=(
+                ('Название', 960),
+            ))
+            self.genres_table.set_rows(genres, lambda genre: (
+                genre.name,
+            ), load_more=self.load_more_genres)
+            self.genres_table.pack(side='top', fill='x', **self.padding)
 
-            self.genres_frame.columnconfigure(0, weight=2)
-            self.genres_frame.columnconfigure(1, weight=1)
+        # если пользователь администратор
+        # создание кнопок добавления и удаления жанра
+        if self.session.user is not None:
+            if self.session.user.is_admin:
+                self.buttons_frame = ttk.Frame(self)
 
-            name_label = ttk.Label(self.genres_frame, text='Название', font=self.app.HEADER_FONT)
-            name_label.grid(row=0, column=0)
+                self.add_genre_button = ttk.Button(self.buttons_frame, image=self.app.add_image,
+                                                   command=self.show_add_genre_window)
+                self.add_genre_button.pack(side='left', padx=10)
 
-            self.genres_frame.pack(side='top', fill='x', **self.padding)
+                if len(genres) != 0:
+                    self.delete_genre_button = ttk.Button(self.buttons_frame, image=self.app.delete_image,
+                                                          command=self.delete_selected_genres)
+                    self.delete_genre_button.pack(side='left', padx=10)
 
-        # отображение списка жанров
-        for i, genre in enumerate(genres):
-            separator = ttk.Separator(self.genres_frame, orient='horizontal')
-            separator.grid(row=2 * i + 1, column=0, columnspan=2, sticky='nsew', pady=10)
+                self.buttons_frame.pack(side='top', **self.padding)
 
-            name_label = ttk.Label(self.genres_frame, text=genre.name)
-            name_label.grid(row=2 * i + 2, column=0)
+    def load_more_genres(self, last_genre):
+        """Получение следующей страницы списка жанров."""
 
-            if self.session.user is not None:
-                if self.session.user.is_admin:
-                    delete_button = ttk.Button(self.genres_frame, image=self.app.delete_image,
-                                               command=lambda genre_id=genre.id: self.delete_genre(genre_id))
-                    delete_button.grid(row=2 * i + 2, column=1)
+        return self.session.get_genres_page(after_id=last_genre.id)
 
-        # если пользователь администратор
-        # создание кнопки добавления жанра
-        if self.session.user is not None:
-            if self.session.user.is_admin:
-                self.add_genre_button = ttk.Button(self, image=self.app.add_image,
-                                                   command=self.show_add_genre_window)
-                self.add_genre_button.pack(side='top', **self.padding)
+    def on_change(self, change) -> None:
+        """Обновление только затронутых изменением каталога строк списка жанров."""
+
+        if change.entity_type != 'genre':
+            return
+
+        if self.genres_table is None:
+            # список пуст: при добавлении первой записи виджет строится заново
+            if self.no_genres_label is not None and change.op == 'insert':
+                self.update()
+            return
+
+        if change.op == 'insert':
+            self.genres_table.load_new_rows()
+        elif change.op == 'update':
+            # строки, которые ещё не загружены, будут получены при прокрутке уже изменёнными
+            loaded_ids = {genre.id for genre in self.genres_table.rows}
+            genre_ids = [genre_id for genre_id in change.ids if genre_id in loaded_ids]
+            if len(genre_ids) != 0:
+                self.genres_table.replace_rows(self.session.get_genre_rows(genre_ids))
+        elif change.op == 'delete':
+            self.genres_table.remove_rows(change.ids)
+            if len(self.genres_table.rows) == 0:
+                self.update()
 
     def show_add_genre_window(self) -> None:
         """Отображение окна добавления жанра."""
@@ -73,25 +106,34 @@ class GenreFrame(ttk.Frame):
         add_genre_window = AddGenreWindow(self)
         add_genre_window.grab_set()
 
-    def delete_genre(self, genre_id: int) -> None:
-        """Удаление жанра."""
+    def delete_selected_genres(self) -> None:
+        """Удаление выбранных в таблице жанров."""
+
+        genres = self.genres_table.selected_rows()
+        if len(genres) == 0:
+            showerror(title='Ошибка удаления жанров', message='Жанры не выбраны')
+            return
+
+        self.delete_genres([genre.id for genre in genres])
+
+    def delete_genres(self, genre_ids: list[int]) -> None:
+        """Удаление жанров одной операцией с обновлением только удалённых строк списка."""
 
-        # подтверждение удаления жанра
+        # подтверждение удаления жанров
         confirmation = askokcancel(
-            title='Подтверждение удаления жанра',
-            message='Вы уверены, что хотите безвозвратно удалить жанр?',
+            title='Подтверждение удаления жанров',
+            message=f'Вы уверены, что хотите безвозвратно удалить выбранные жанры ({len(genre_ids)})?',
             icon='warning'
         )
         if not confirmation:
             return
 
-        # попытка удаления жанра
-        success, message = self.session.delete_genre(genre_id)
+        # попытка удаления жанров
+        success, message = self.session.delete_genres(genre_ids)
         if success:
-            self.update()
-            showinfo(title='Успех', message='Удаление жанра прошло успешно')
+            showinfo(title='Успех', message='Удаление жанров прошло успешно')
         else:
-            showerror(title='Ошибка удаления жанра', message=message)
+            showerror(title='Ошибка удаления жанров', message=message)
 
 
 class AddGenreWindow(tk.Toplevel):
@@ -138,7 +180,6 @@ class AddGenreWindow(tk.Toplevel):
 
         success, message = self.parent.session.add_genre(self.genre_name.get())
         if success:
-            self.parent.update()
             self.destroy()
             showinfo(title='Успех', message='Добавление жанра прошло успешно')
         else:
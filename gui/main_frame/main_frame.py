@@ -1,3 +1,4 @@
+import tkinter as tk
 from tkinter import ttk
 
 from gui.main_frame.track_frame import TrackFrame
@@ -5,6 +6,7 @@ from gui.main_frame.album_frame import AlbumFrame
 from gui.main_frame.artist_frame import ArtistFrame
 from gui.main_frame.genre_frame import GenreFrame
 from gui.main_frame.account_frame import AccountFrame
+from gui.main_frame.search_frame import SearchFrame
 
 
 class MainFrame(ttk.Frame):
@@ -28,6 +30,7 @@ class MainFrame(ttk.Frame):
         self.columnconfigure(3, weight=1)
         self.columnconfigure(4, weight=4)
         self.columnconfigure(5, weight=1)
+        self.columnconfigure(6, weight=1)
 
         self.tracks_button = ttk.Button(self, text='Композиции', padding=(10, 10), command=self.show_tracks)
         self.tracks_button.grid(row=0, column=0, **padding)
@@ -41,29 +44,44 @@ class MainFrame(ttk.Frame):
         self.genres_button = ttk.Button(self, text='Жанры', padding=(10, 10), command=self.show_genres)
         self.genres_button.grid(row=0, column=3, **padding)
 
+        self.search_form = ttk.Frame(self)
+
+        self.search_query = tk.StringVar()
+        self.search_entry = ttk.Entry(self.search_form, textvariable=self.search_query, font=self.app.FONT, width=20)
+        self.search_entry.bind('<Return>', lambda event: self.show_search_results())
+        self.search_entry.pack(side='left', padx=(0, 10))
+
+        self.search_button = ttk.Button(self.search_form, text='Найти', command=self.show_search_results)
+        self.search_button.pack(side='left')
+
+        self.search_form.grid(row=0, column=4, sticky='e', **padding)
+
         self.account_button = ttk.Button(self, text='Аккаунт', image=self.app.account_image, command=self.show_account)
-        self.account_button.grid(row=0, column=4, sticky='e', **padding)
+        self.account_button.grid(row=0, column=5, sticky='e', **padding)
 
         self.menu_buttons = [self.tracks_button, self.artists_button, self.albums_button,
                              self.genres_button, self.account_button]
 
         self.log_out_button = ttk.Button(self, text='Выйти', image=self.app.logout_image, command=self.log_out)
-        self.log_out_button.grid(row=0, column=5, sticky='w', **padding)
+        self.log_out_button.grid(row=0, column=6, sticky='w', **padding)
 
         self.track_frame = TrackFrame(self)
-        self.track_frame.grid(row=1, column=0, columnspan=6, sticky='nsew', **padding)
+        self.track_frame.grid(row=1, column=0, columnspan=7, sticky='nsew', **padding)
 
         self.album_frame = AlbumFrame(self)
-        self.album_frame.grid(row=1, column=0, columnspan=6, sticky='nsew', **padding)
+        self.album_frame.grid(row=1, column=0, columnspan=7, sticky='nsew', **padding)
 
         self.artist_frame = ArtistFrame(self)
-        self.artist_frame.grid(row=1, column=0, columnspan=6, sticky='nsew', **padding)
+        self.artist_frame.grid(row=1, column=0, columnspan=7, sticky='nsew', **padding)
 
         self.genre_frame = GenreFrame(self)
-        self.genre_frame.grid(row=1, column=0, columnspan=6, sticky='nsew', **padding)
+        self.genre_frame.grid(row=1, column=0, columnspan=7, sticky='nsew', **padding)
 
         self.account_frame = AccountFrame(self)
-        self.account_frame.grid(row=1, column=0, columnspan=6, sticky='nsew', **padding)
+        self.account_frame.grid(row=1, column=0, columnspan=7, sticky='nsew', **padding)
+
+        self.search_frame = SearchFrame(self)
+        self.search_frame.grid(row=1, column=0, columnspan=7, sticky='nsew', **padding)
 
     def enable_menu_buttons(self) -> None:
         """Активация всех кнопок меню."""
@@ -74,6 +92,7 @@ class MainFrame(ttk.Frame):
     def reset(self) -> None:
         """Сброс состояния виджета."""
 
+        self.search_query.set('')
         self.show_tracks()
 
     def show_tracks(self) -> None:
@@ -141,6 +160,19 @@ class MainFrame(ttk.Frame):
         self.account_frame.reset()
         self.account_frame.tkraise()
 
+    def show_search_results(self) -> None:
+        """Отображение результатов поиска по каталогу."""
+
+        if self.search_query.get().strip() == '':
+            return
+
+        # включение всех кнопок меню
+        self.enable_menu_buttons()
+
+        # поиск и отображение виджета результатов поиска
+        self.search_frame.show_results(self.search_query.get())
+        self.search_frame.tkraise()
+
     def log_out(self) -> None:
         """Выход из аккаунта."""
 
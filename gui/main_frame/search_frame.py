@@ -0,0 +1,54 @@
+from tkinter import ttk
+
+from gui.virtual_table import VirtualTable
+from instrumentation import timed_screen
+
+
+class SearchFrame(ttk.Frame):
+    """Виджет отображения результатов поиска по каталогу."""
+
+    KIND_NAMES = {
+        'track': 'Композиция',
+        'album': 'Альбом',
+        'artist': 'Исполнитель',
+        'genre': 'Жанр'
+    }
+
+    def __init__(self, container):
+        """Инициализация виджета."""
+
+        super().__init__(container)
+
+        self.padding = {'padx': 10, 'pady': 20}
+
+        self.app = container.app
+        self.session = self.app.session
+
+        self.no_results_label = None
+        self.results_table = None
+
+    @timed_screen
+    def show_results(self, query: str) -> None:
+        """Поиск и отображение результатов."""
+
+        # удаление всех дочерних виджетов
+        for child in self.winfo_children():
+            child.destroy()
+
+        results = self.session.search(query)
+
+        if len(results) == 0:  # если ничего не найдено
+            self.no_results_label = ttk.Label(self, text='По запросу ничего не найдено', font='Helvetica 16')
+            self.no_results_label.pack(pady=(150, 0))
+        else:  # отображение результатов поиска
+            self.results_table = VirtualTable(self, columns=(
+                ('Тип', 180),
+                ('Название', 320),
+                ('Описание', 460)
+            ))
+            self.results_table.set_rows(results, lambda result: (
+                self.KIND_NAMES[result.kind],
+                result.name,
+                ' '.join(result.description.split())
+            ))
+            self.results_table.pack(side='top', fill='x', **self.padding)
@@ -1,12 +1,19 @@
+import queue
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog as fd
 from tkinter.messagebox import askokcancel, showinfo, showerror
 
+from gui.virtual_table import VirtualTable
+from playback import PlaybackItem
+from instrumentation import timed_screen
+
 
 class TrackFrame(ttk.Frame):
     """Виджет отображения и редактирования списка композиций."""
 
+    PLAYBACK_POLL_INTERVAL = 200  # интервал проверки состояния воспроизведения (в мс)
+
     def __init__(self, container):
         """Инициализация виджета."""
 
@@ -18,89 +25,174 @@ class TrackFrame(ttk.Frame):
         self.session = self.app.session
 
         self.add_track_button = None
+        self.delete_track_button = None
+        self.assign_genres_button = None
+        self.buttons_frame = None
         self.no_tracks_label = None
-        self.tracks_frame = None
+        self.tracks_table = None
+        self.playback_frame = None
+        self.play_button = None
+        self.stop_button = None
+        self.now_playing_label = None
+
+        self.now_playing = ''
+        self.playback_poll_id = None
 
+        self.app.add_change_listener(self.on_change)
+
+    @timed_screen
     def update(self) -> None:
         """Обновление состояния виджета."""
 
         # удаление всех дочерних виджетов
         for child in self.winfo_children():
             child.destroy()
+        self.no_tracks_label = None
+        self.tracks_table = None
 
-        # получение списка добавленных композиций
-        tracks = self.session.get_all_tracks()
+        # получение первой страницы списка добавленных композиций
+        tracks = self.session.get_track_listing(limit=self.session.PAGE_SIZE)
 
         if len(tracks) == 0:  # если пока не добавлено ни одной композиции
             self.no_tracks_label = ttk.Label(self, text='Пока не добавлено ни одной композиции',
                                              font='Helvetica 16')
             self.no_tracks_label.pack(pady=(150, 0))
-        else:  # заполнение шапки таблицы
-            self.tracks_frame = ttk.Frame(self)
+        else:  # отображение списка композиций
+            self.tracks_table = VirtualTable(self, columns=(
+                ('Название', 200),
+                ('Исполнитель', 180),
+                ('Альбом', 180),
+                ('Жанры', 200),
+                ('Файл', 220)
+            ))
+            self.tracks_table.set_rows(tracks, lambda track: (
+                track.name,
+                track.artist_name,
+                track.album_name,
+                ', '.join(track.genre_names) or '-',
+                track.filename or '-'
+            ), load_more=self.load_more_tracks)
+            self.tracks_table.pack(side='top', fill='x', **self.padding)
+
+            # кнопки управления воспроизведением
+            self.playback_frame = ttk.Frame(self)
+
+            self.play_button = ttk.Button(self.playback_frame, text='Воспроизвести', command=self.play_selected_track)
+            self.play_button.pack(side='left', padx=10)
+
+            self.stop_button = ttk.Button(self.playback_frame, text='Остановить', command=self.stop_playback)
+            self.stop_button.pack(side='left', padx=10)
+
+            self.now_playing_label = ttk.Label(self.playback_frame, text=self.now_playing)
+            self.now_playing_label.pack(side='left', padx=10)
+
+            self.playback_frame.pack(side='top', fill='x', padx=10)
+
+        # если пользователь администратор
+        # создание кнопок добавления и удаления композиций и назначения жанров
+        if self.session.user is not None:
+            if self.session.user.is_admin:
+                self.buttons_frame = ttk.Frame(self)
 
-            self.tracks_frame.columnconfigure(0, weight=2)
-            self.tracks_frame.columnconfigure(1, weight=2)
-            self.tracks_frame.columnconfigure(2, weight=2)
-            self.tracks_frame.columnconfigure(3, weight=2)
-            self.tracks_frame.columnconfigure(4, weight=2)
-            self.tracks_frame.columnconfigure(5, weight=1)
+                self.add_track_button = ttk.Button(self.buttons_frame, image=self.app.add_image,
+                                                   command=self.show_add_track_window)
+                self.add_track_button.pack(side='left', padx=10)
 
-            name_label = ttk.Label(self.tracks_frame, text='Название', font=self.app.HEADER_FONT)
-            name_label.grid(row=0, column=0)
+                if len(tracks) != 0:
+                    self.delete_track_button = ttk.Button(self.buttons_frame, image=self.app.delete_image,
+                                                          command=self.delete_selected_tracks)
+                    self.delete_track_button.pack(side='left', padx=10)
 
-            artist_name_label = ttk.Label(self.tracks_frame, text='Исполнитель', font=self.app.HEADER_FONT)
-            artist_name_label.grid(row=0, column=1)
+                    self.assign_genres_button = ttk.Button(self.buttons_frame, text='Назначить жанры',
+                                                           command=self.show_assign_genres_window)
+                    self.assign_genres_button.pack(side='left', padx=10)
 
-            album_name_label = ttk.Label(self.tracks_frame, text='Альбом', font=self.app.HEADER_FONT)
-            album_name_label.grid(row=0, column=2)
+                self.buttons_frame.pack(side='top', **self.padding)
 
-            genres_label = ttk.Label(self.tracks_frame, text='Жанры', font=self.app.HEADER_FONT)
-            genres_label.grid(row=0, column=3)
+    def load_more_tracks(self, last_track):
+        """Получение следующей страницы списка композиций."""
 
-            filename_label = ttk.Label(self.tracks_frame, text='Файл', font=self.app.HEADER_FONT)
-            filename_label.grid(row=0, column=4)
+        return self.session.get_track_listing(after_id=last_track.id, limit=self.session.PAGE_SIZE)
 
-            self.tracks_frame.pack(side='top', fill='x', **self.padding)
+    def on_change(self, change) -> None:
+        """Обновление только затронутых изменением каталога строк списка композиций."""
 
-        # отображение списка композиций
-        for i, track in enumerate(tracks):
-            separator = ttk.Separator(self.tracks_frame, orient='horizontal')
-            separator.grid(row=2 * i + 1, column=0, columnspan=6, sticky='nsew', pady=10)
+        if change.entity_type != 'track':
+            return
 
-            name_label = ttk.Label(self.tracks_frame, text=track.name)
-            name_label.grid(row=2 * i + 2, column=0)
+        if self.tracks_table is None:
+            # список пуст: при добавлении первой записи виджет строится заново
+            if self.no_tracks_label is not None and change.op == 'insert':
+                self.update()
+            return
 
-            album = self.session.get_album(track.album_id)
+        if change.op == 'insert':
+            self.tracks_table.load_new_rows()
+        elif change.op == 'update':
+            # строки, которые ещё не загружены, будут получены при прокрутке уже изменёнными
+            loaded_ids = {track.id for track in self.tracks_table.rows}
+            track_ids = [track_id for track_id in change.ids if track_id in loaded_ids]
+            if len(track_ids) != 0:
+                self.tracks_table.replace_rows(self.session.get_track_rows(track_ids))
+        elif change.op == 'delete':
+            self.tracks_table.remove_rows(change.ids)
+            if len(self.tracks_table.rows) == 0:
+                self.update()
+
+    def play_selected_track(self) -> None:
+        """Воспроизведение выбранной композиции и следующих за ней загруженных композиций."""
+
+        index = self.tracks_table.selected_index
+        if index is None:
+            showerror(title='Ошибка воспроизведения', message='Композиция не выбрана')
+            return
 
-            artist_name_label = ttk.Label(self.tracks_frame, text=self.session.get_artist(album.artist_id).name)
-            artist_name_label.grid(row=2 * i + 2, column=1)
+        items = [PlaybackItem(track.audio_id, track.size, track.name)
+                 for track in self.tracks_table.rows[index:] if track.audio_id is not None]
+        if len(items) == 0:
+            showerror(title='Ошибка воспроизведения', message='У композиции нет аудиофайла')
+            return
 
-            album_name_label = ttk.Label(self.tracks_frame, text=album.name)
-            album_name_label.grid(row=2 * i + 2, column=2)
+        self.app.get_player().play(items)
 
-            genres_text = '\n'.join([g.name for g in self.session.get_genres(track.id)])
-            if genres_text == '':
-                genres_text = '-'
-            genres_label = ttk.Label(self.tracks_frame, text=genres_text, justify='center')
-            genres_label.grid(row=2 * i + 2, column=3)
+        if self.playback_poll_id is None:
+            self.playback_poll_id = self.after(self.PLAYBACK_POLL_INTERVAL, self.check_playback)
 
-            filename = self.session.get_audio_file(track.audio_id).filename
-            filename_label = ttk.Label(self.tracks_frame, text=filename)
-            filename_label.grid(row=2 * i + 2, column=4)
+    def stop_playback(self) -> None:
+        """Остановка воспроизведения."""
 
-            if self.session.user is not None:
-                if self.session.user.is_admin:
-                    delete_button = ttk.Button(self.tracks_frame, image=self.app.delete_image,
-                                               command=lambda track_id=track.id: self.delete_track(track_id))
-                    delete_button.grid(row=2 * i + 2, column=5)
+        if self.app.player is not None:
+            self.app.player.stop()
 
-        # если пользователь администратор
-        # создание кнопки добавления композиции
-        if self.session.user is not None:
-            if self.session.user.is_admin:
-                self.add_track_button = ttk.Button(self, image=self.app.add_image,
-                                                   command=self.show_add_track_window)
-                self.add_track_button.pack(side='top', **self.padding)
+    def check_playback(self) -> None:
+        """Обработка событий воспроизведения."""
+
+        self.playback_poll_id = None
+        player = self.app.player
+
+        while True:
+            try:
+                event = player.events.get_nowait()
+            except queue.Empty:
+                break
+
+            if event[0] == 'track':
+                self.set_now_playing(f'Сейчас играет: {event[2].name}')
+            elif event[0] in ('finished', 'stopped'):
+                self.set_now_playing('')
+            elif event[0] == 'error':
+                self.set_now_playing('')
+                showerror(title='Ошибка воспроизведения', message=event[1])
+
+        if player.is_playing() or not player.events.empty():
+            self.playback_poll_id = self.after(self.PLAYBACK_POLL_INTERVAL, self.check_playback)
+
+    def set_now_playing(self, text: str) -> None:
+        """Отображение названия воспроизводимой композиции."""
+
+        self.now_playing = text
+        if self.now_playing_label is not None and self.now_playing_label.winfo_exists():
+            self.now_playing_label.configure(text=text)
 
     def show_add_track_window(self) -> None:
         """Отображение окна добавления композиции."""
@@ -108,30 +200,103 @@ class TrackFrame(ttk.Frame):
         add_track_window = AddTrackWindow(self)
         add_track_window.grab_set()
 
-    def delete_track(self, track_id: int) -> None:
-        """Удаление композиции."""
+    def show_assign_genres_window(self) -> None:
+        """Отображение окна назначения жанров выбранным композициям."""
+
+        tracks = self.tracks_table.selected_rows()
+        if len(tracks) == 0:
+            showerror(title='Ошибка назначения жанров', message='Композиции не выбраны')
+            return
+
+        assign_genres_window = AssignGenresWindow(self, [track.id for track in tracks])
+        assign_genres_window.grab_set()
 
-        # подтверждение удаления композиции
+    def delete_selected_tracks(self) -> None:
+        """Удаление выбранных в таблице композиций."""
+
+        tracks = self.tracks_table.selected_rows()
+        if len(tracks) == 0:
+            showerror(title='Ошибка удаления композиций', message='Композиции не выбраны')
+            return
+
+        self.delete_tracks([track.id for track in tracks])
+
+    def delete_tracks(self, track_ids: list[int]) -> None:
+        """Удаление композиций одной операцией с обновлением только удалённых строк списка."""
+
+        # подтверждение удаления композиций
         confirmation = askokcancel(
-            title='Подтверждение удаления композиции',
-            message='Вы уверены, что хотите безвозвратно удалить композицию?',
+            title='Подтверждение удаления композиций',
+            message=f'Вы уверены, что хотите безвозвратно удалить выбранные композиции ({len(track_ids)})?',
             icon='warning'
         )
         if not confirmation:
             return
 
-        # попытка удаления композиции
-        success, message = self.session.delete_track(track_id)
+        # попытка удаления композиций
+        success, message = self.session.delete_tracks(track_ids)
+        if success:
+            showinfo(title='Успех', message='Удаление композиций прошло успешно')
+        else:
+            showerror(title='Ошибка удаления композиций', message=message)
+
+
+class AssignGenresWindow(tk.Toplevel):
+    """Окно назначения жанров нескольким композициям."""
+
+    def __init__(self, parent, track_ids: list[int]):
+        """Инициализация окна."""
+
+        super().__init__(parent)
+
+        padding = {'padx': 10, 'pady': 10}
+
+        self.parent = parent
+        self.track_ids = track_ids
+
+        self.title('Назначение жанров')
+
+        self.columnconfigure(0, weight=1)
+
+        self.tracks_label = ttk.Label(self, text=f'Выбрано композиций: {len(track_ids)}')
+        self.tracks_label.grid(row=0, column=0, **padding)
+
+        self.genres = self.parent.session.get_all_genres()
+
+        self.genres_frame = ttk.Frame(self)
+
+        self.selected_genres = [tk.BooleanVar() for _ in self.genres]
+        for i, genre in enumerate(self.genres):
+            genre_checkbutton = ttk.Checkbutton(self.genres_frame, text=genre.name,
+                                                variable=self.selected_genres[i])
+            genre_checkbutton.pack(side='top', anchor='w')
+
+        self.genres_frame.grid(row=1, column=0, **padding)
+
+        self.assign_genres_button = ttk.Button(self, text='Назначить жанры', command=self.assign_genres)
+        self.assign_genres_button.grid(row=2, column=0, **padding)
+
+    def assign_genres(self):
+        """Добавление отмеченных жанров выбранным композициям."""
+
+        genre_ids = [self.genres[i].id for i in range(len(self.genres)) if self.selected_genres[i].get()]
+        if len(genre_ids) == 0:
+            showerror(title='Ошибка назначения жанров', message='Жанры не выбраны')
+            return
+
+        success, message = self.parent.session.add_genres_to_tracks(self.track_ids, genre_ids)
         if success:
-            self.update()
-            showinfo(title='Успех', message='Удаление композиции прошло успешно')
+            self.destroy()
+            showinfo(title='Успех', message='Назначение жанров прошло успешно')
         else:
-            showerror(title='Ошибка удаления композиции', message=message)
+            showerror(title='Ошибка назначения жанров', message=message)
 
 
 class AddTrackWindow(tk.Toplevel):
     """Окно добавления композиции."""
 
+    UPLOAD_POLL_INTERVAL = 100  # интервал проверки состояния загрузки аудиофайла (в мс)
+
     def __init__(self, parent):
         """Инициализация окна."""
 
@@ -141,7 +306,10 @@ class AddTrackWindow(tk.Toplevel):
 
         self.parent = parent
 
-        self.geometry('540x420')
+        self.upload = None
+        self.upload_poll_id = None
+
+        self.geometry('540x480')
         self.title('Добавление альбома')
 
         self.rowconfigure(0, weight=2)
@@ -151,6 +319,7 @@ class AddTrackWindow(tk.Toplevel):
         self.rowconfigure(4, weight=2)
         self.rowconfigure(5, weight=5)
         self.rowconfigure(6, weight=2)
+        self.rowconfigure(7, weight=1)
 
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
@@ -222,6 +391,11 @@ class AddTrackWindow(tk.Toplevel):
         self.add_track_button = ttk.Button(self, text='Добавить композицию', command=self.add_track)
         self.add_track_button.grid(row=6, column=0, columnspan=2, **padding)
 
+        self.upload_progress_bar = ttk.Progressbar(self, orient='horizontal', mode='determinate', length=300)
+        self.cancel_upload_button = ttk.Button(self, text='Отменить', command=self.cancel_upload)
+
+        self.protocol('WM_DELETE_WINDOW', self.close)
+
     def select_audio_file(self):
         """Выбор аудиофайла композиции."""
 
@@ -264,20 +438,92 @@ class AddTrackWindow(tk.Toplevel):
             showerror(title='Ошибка добавления композиции', message='Альбом не выбран')
             return
 
+        # запуск фоновой загрузки аудиофайла
+        try:
+            self.upload = self.parent.session.start_audio_upload(self.filename.get())
+        except OSError as e:
+            showerror(title='Ошибка добавления композиции', message=e)
+            return
+
+        self.add_track_button.configure(state='disabled')
+        self.upload_progress_bar.configure(maximum=max(self.upload.total_size, 1), value=0)
+        self.upload_progress_bar.grid(row=7, column=0, padx=10, pady=10)
+        self.cancel_upload_button.grid(row=7, column=1, padx=10, pady=10)
+
+        self.upload_poll_id = self.after(self.UPLOAD_POLL_INTERVAL, self.check_upload)
+
+    def check_upload(self):
+        """Обработка событий фоновой загрузки аудиофайла."""
+
+        self.upload_poll_id = None
+
+        while True:
+            try:
+                event = self.upload.events.get_nowait()
+            except queue.Empty:
+                break
+
+            if event[0] == 'progress':
+                self.upload_progress_bar.configure(value=event[1])
+            elif event[0] == 'done':
+                # загрузка могла быть отменена после сохранения файла
+                if self.upload.claim():
+                    self.finish_add_track()
+                else:
+                    self.reset_upload()
+                return
+            elif event[0] == 'cancelled':
+                self.reset_upload()
+                return
+            elif event[0] == 'error':
+                self.reset_upload()
+                showerror(title='Ошибка загрузки аудиофайла', message=event[1])
+                return
+
+        self.upload_poll_id = self.after(self.UPLOAD_POLL_INTERVAL, self.check_upload)
+
+    def finish_add_track(self):
+        """Добавление композиции после завершения загрузки аудиофайла."""
+
         if len(self.genres) != 0:
             genre_ids = [self.genres[i].id for i in range(len(self.genres)) if self.selected_genres[i].get()]
         else:
             genre_ids = []
 
-        success, message = self.parent.session.add_track(
+        success, message = self.parent.session.create_track_from_upload(
             self.track_name.get(),
-            self.filename.get(),
+            self.upload,
             self.album_ids[self.album_name_combobox.current()],
             genre_ids
         )
         if success:
-            self.parent.update()
             self.destroy()
             showinfo(title='Успех', message='Добавление композиции прошло успешно')
         else:
+            self.reset_upload()
             showerror(title='Ошибка добавления композиции', message=message)
+
+    def cancel_upload(self):
+        """Отмена загрузки аудиофайла."""
+
+        if self.upload is not None:
+            self.upload.cancel()
+            self.cancel_upload_button.configure(state='disabled')
+
+    def reset_upload(self):
+        """Возврат окна в исходное состояние после завершения загрузки."""
+
+        self.upload = None
+        self.upload_progress_bar.grid_remove()
+        self.cancel_upload_button.grid_remove()
+        self.cancel_upload_button.configure(state='normal')
+        self.add_track_button.configure(state='normal')
+
+    def close(self):
+        """Закрытие окна с отменой незавершённой загрузки."""
+
+        if self.upload_poll_id is not None:
+            self.after_cancel(self.upload_poll_id)
+        if self.upload is not None:
+            self.upload.cancel()
+        self.destroy()
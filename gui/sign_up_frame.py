@@ -102,13 +102,23 @@ class SignUpFrame(ttk.Frame):
             showerror(title='Ошибка регистрации', message='Недопустимая длина имени пользователя')
             return
 
-        # регистрация нового аккаунта
-        success, message = self.app.session.sign_up(
+        # регистрация нового аккаунта (хеширование пароля выполняется в фоновом потоке)
+        self.sign_up_button.state(['disabled'])
+        self.app.run_in_background(
+            self.app.session.sign_up,
+            self.finish_sign_up,
             self.login.get(),
             self.password.get(),
             self.username.get(),
             self.bio_entry.get('1.0', 'end')
         )
+
+    def finish_sign_up(self, result: tuple) -> None:
+        """Обработка результата регистрации."""
+
+        self.sign_up_button.state(['!disabled'])
+
+        success, message = result
         if success:
             self.app.show_login_frame()
             showinfo(title='Успех', message='Регистрация прошла успешно')
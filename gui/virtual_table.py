@@ -0,0 +1,233 @@
+from typing import Callable, Sequence, Iterable, Hashable, Any
+from operator import attrgetter
+
+from tkinter import ttk
+
+
+class VirtualTable(ttk.Frame):
+    """Виджет таблицы, создающий строки только для видимой области.
+
+    Строки ttk.Treeview создаются один раз по числу видимых строк
+    и переиспользуются при прокрутке, поэтому время отрисовки
+    зависит от размера области просмотра, а не от количества данных.
+    При прокрутке к концу таблицы следующая порция данных подгружается
+    с помощью функции load_more. Щелчок с Ctrl добавляет строку к выбранным
+    (или исключает из них), щелчок с Shift выбирает диапазон строк.
+
+    Строки можно удалять, заменять и догружать по ключу (по умолчанию - атрибуту id),
+    не пересоздавая таблицу; при этом перерисовываются только видимые строки."""
+
+    SELECTED_BACKGROUND = '#cce4f7'
+
+    # маски модификаторов в event.state
+    SHIFT_MASK = 0x0001
+    CONTROL_MASK = 0x0004
+
+    def __init__(self, container, columns: Sequence[tuple[str, int]], height: int = 12,
+                 key: Callable[[Any], Hashable] = attrgetter('id')) -> None:
+        """Инициализация виджета.
+
+        columns - последовательность пар (заголовок, ширина) для каждого столбца,
+        height - количество одновременно отображаемых строк,
+        key - функция, возвращающая ключ строки данных."""
+
+        super().__init__(container)
+
+        self.height = height
+        self.key = key
+
+        self.rows = []
+        self.values = lambda row: row
+        self.load_more = None
+        self.exhausted = True
+        self.offset = 0
+        self.selected_index = None  # последняя выбранная строка (начало диапазона при выборе с Shift)
+        self.selected_indices = set()
+
+        self.columnconfigure(0, weight=1)
+
+        column_ids = [f'column{i}' for i in range(len(columns))]
+        self.tree = ttk.Treeview(self, columns=column_ids, show='headings', height=height, selectmode='none')
+        for column_id, (heading, width) in zip(column_ids, columns):
+            self.tree.heading(column_id, text=heading)
+            self.tree.column(column_id, width=width, anchor='center')
+        self.tree.tag_configure('selected', background=self.SELECTED_BACKGROUND)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+
+        # переиспользуемые строки таблицы
+        self.items = [self.tree.insert('', 'end') for _ in range(height)]
+
+        self.tree.bind('<Button-1>', self.on_click)
+        self.tree.bind('<MouseWheel>', self.on_mouse_wheel)
+        self.tree.bind('<Button-4>', self.on_mouse_wheel)
+        self.tree.bind('<Button-5>', self.on_mouse_wheel)
+
+    def set_rows(self, rows: Sequence[Any], values: Callable[[Any], tuple] = None,
+                 load_more: Callable[[Any], Sequence[Any]] = None) -> None:
+        """Замена отображаемых данных.
+
+        values - функция, возвращающая значения столбцов для строки данных;
+        вызывается только для видимых строк.
+        load_more - функция, возвращающая следующую порцию данных после переданной
+        последней строки (пустую, если данных больше нет)."""
+
+        self.rows = list(rows)
+        if values is not None:
+            self.values = values
+        self.load_more = load_more
+        self.exhausted = load_more is None
+        self.offset = 0
+        self.selected_index = None
+        self.selected_indices = set()
+        self.render()
+
+    def selected_row(self) -> Any:
+        """Получение выбранной строки данных (или None)."""
+
+        if self.selected_index not in self.selected_indices or self.selected_index >= len(self.rows):
+            return None
+        return self.rows[self.selected_index]
+
+    def selected_rows(self) -> list[Any]:
+        """Получение всех выбранных строк данных в порядке их следования."""
+
+        return [self.rows[index] for index in sorted(self.selected_indices) if index < len(self.rows)]
+
+    def remove_rows(self, keys: Iterable[Hashable]) -> None:
+        """Удаление строк данных с заданными ключами (выбор остальных строк сохраняется)."""
+
+        keys = set(keys)
+        rows = [row for row in self.rows if self.key(row) not in keys]
+        if len(rows) == len(self.rows):
+            return
+
+        selected_keys = {self.key(row) for row in self.selected_rows()}
+        anchor_key = self.key(self.rows[self.selected_index]) if self.selected_index is not None else None
+
+        self.rows = rows
+        self.selected_indices = set()
+        self.selected_index = None
+        if len(selected_keys) != 0 or anchor_key is not None:
+            for index, row in enumerate(rows):
+                row_key = self.key(row)
+                if row_key in selected_keys:
+                    self.selected_indices.add(index)
+                if row_key == anchor_key:
+                    self.selected_index = index
+
+        self.offset = max(0, min(self.offset, len(self.rows) - self.height))
+        self.render()
+
+    def replace_rows(self, rows: Iterable[Any]) -> None:
+        """Замена загруженных строк данных строками с теми же ключами."""
+
+        replacements = {self.key(row): row for row in rows}
+        if len(replacements) == 0:
+            return
+
+        for index, row in enumerate(self.rows):
+            replacement = replacements.get(self.key(row))
+            if replacement is not None:
+                self.rows[index] = replacement
+
+        self.render()
+
+    def load_new_rows(self) -> None:
+        """Подгрузка строк, добавленных после последней загруженной строки.
+
+        Если загружены ещё не все данные, новые строки будут получены при прокрутке."""
+
+        if not self.exhausted or self.load_more is None:
+            return
+
+        self.exhausted = False
+        self.fetch_more()
+        self.render()
+
+    def fetch_more(self) -> None:
+        """Подгрузка следующей порции данных."""
+
+        if self.exhausted:
+            return
+
+        rows = self.load_more(self.rows[-1] if len(self.rows) != 0 else None)
+        if len(rows) == 0:
+            self.exhausted = True
+        else:
+            self.rows.extend(rows)
+
+    def scroll_to(self, offset: int) -> None:
+        """Прокрутка таблицы к строке с заданным индексом."""
+
+        offset = max(0, min(offset, len(self.rows) - self.height))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def render(self) -> None:
+        """Заполнение видимых строк таблицы."""
+
+        # подгрузка данных при достижении конца загруженной части списка
+        if self.offset + 2 * self.height > len(self.rows):
+            self.fetch_more()
+
+        for slot, item in enumerate(self.items):
+            index = self.offset + slot
+            if index < len(self.rows):
+                tags = ('selected',) if index in self.selected_indices else ()
+                self.tree.item(item, values=self.values(self.rows[index]), tags=tags)
+            else:
+                self.tree.item(item, values=(), tags=())
+
+        if len(self.rows) == 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / len(self.rows),
+                               min(1, (self.offset + self.height) / len(self.rows)))
+
+    def on_scrollbar(self, action: str, *args) -> None:
+        """Обработка прокрутки с помощью полосы прокрутки."""
+
+        if action == 'moveto':
+            self.scroll_to(int(float(args[0]) * len(self.rows)))
+        elif action == 'scroll':
+            step = int(args[0])
+            if args[1] == 'pages':
+                step *= self.height
+            self.scroll_to(self.offset + step)
+
+    def on_mouse_wheel(self, event) -> str:
+        """Обработка прокрутки колёсиком мыши."""
+
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+        return 'break'
+
+    def on_click(self, event) -> None:
+        """Выбор строки щелчком мыши."""
+
+        item = self.tree.identify_row(event.y)
+        if item == '':
+            return
+
+        index = self.offset + self.items.index(item)
+        if index >= len(self.rows):
+            return
+
+        if event.state & self.SHIFT_MASK and self.selected_index is not None:
+            first, last = sorted((self.selected_index, index))
+            self.selected_indices = set(range(first, last + 1))
+            self.render()
+            return
+
+        if event.state & self.CONTROL_MASK:
+            self.selected_indices ^= {index}
+        else:
+            self.selected_indices = {index}
+        self.selected_index = index
+        self.render()
@@ -0,0 +1,405 @@
+import os
+import csv
+import json
+import time
+import hashlib
+from datetime import date
+from typing import Callable, Iterable, Iterator, NamedTuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+
+from db import Track, Album, Artist, Genre, track_to_genre
+from blob_store import BlobStore
+from mp3 import read_mp3_info, read_id3_tags
+from session import MusicSession
+
+
+AUDIO_EXTENSIONS = ('.mp3',)
+
+UNKNOWN_ARTIST = 'Неизвестный исполнитель'
+UNKNOWN_ALBUM = 'Неизвестный альбом'
+
+
+class ImportItem(NamedTuple):
+    """Импортируемый файл и известные заранее сведения о композиции.
+
+    Незаполненные поля берутся из тега ID3v2, а если их нет и там - из структуры
+    каталогов (исполнитель/альбом/композиция.mp3) и имени файла."""
+
+    path: str
+    name: str = None
+    artist: str = None
+    album: str = None
+    genres: tuple[str] = ()
+    release_date: date = None
+
+
+class ImportedFile(NamedTuple):
+    """Результат разбора импортируемого файла."""
+
+    path: str
+    filename: str
+    name: str
+    artist: str
+    album: str
+    genres: tuple[str]
+    release_date: date
+    size: int
+    sha256: str
+    duration: float
+    bitrate: int
+    error: str = None
+
+
+def walk_directory(root: str) -> Iterator[ImportItem]:
+    """Перебор аудиофайлов в дереве каталогов (в алфавитном порядке путей).
+
+    Исполнитель и альбом определяются по двум ближайшим родительским каталогам файла."""
+
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+
+        parts = os.path.relpath(directory, root).split(os.sep)
+        parts = [] if parts == ['.'] else parts
+
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+
+            yield ImportItem(
+                path=os.path.join(directory, filename),
+                artist=parts[-2] if len(parts) >= 2 else None,
+                album=parts[-1] if len(parts) >= 1 else None
+            )
+
+
+def read_manifest(manifest_path: str) -> Iterator[ImportItem]:
+    """Чтение списка импортируемых файлов из CSV-файла.
+
+    Столбцы: path (обязательный, относительно каталога манифеста), name, artist, album,
+    genres (через точку с запятой) и release_date (ГГГГ-ММ-ДД)."""
+
+    base_directory = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path, newline='', encoding='utf-8') as manifest_file:
+        for row in csv.DictReader(manifest_file):
+            genres = tuple(dict.fromkeys(g.strip() for g in (row.get('genres') or '').split(';') if g.strip()))
+            release_date = row.get('release_date') or None
+
+            yield ImportItem(
+                path=os.path.join(base_directory, row['path']),
+                name=row.get('name') or None,
+                artist=row.get('artist') or None,
+                album=row.get('album') or None,
+                genres=genres,
+                release_date=date.fromisoformat(release_date) if release_date else None
+            )
+
+
+def analyze_file(item: ImportItem) -> ImportedFile:
+    """Вычисление SHA-256, разбор заголовков MP3 и тега ID3v2 импортируемого файла.
+
+    Выполняется в отдельном процессе; ошибки чтения возвращаются в поле error."""
+
+    filename = os.path.basename(item.path)
+
+    try:
+        content_hash = hashlib.sha256()
+        with open(item.path, 'rb') as audio_file:
+            size = os.fstat(audio_file.fileno()).st_size
+            tags = read_id3_tags(audio_file)
+            mp3_info = read_mp3_info(audio_file, size)
+
+            audio_file.seek(0)
+            while chunk := audio_file.read(BlobStore.CHUNK_SIZE):
+                content_hash.update(chunk)
+    except Exception as e:
+        return ImportedFile(item.path, filename, None, None, None, (), None, 0, None, None, None, error=str(e))
+
+    release_date = item.release_date
+    if release_date is None and tags.get('year', '').isdigit():
+        release_date = date(int(tags['year']), 1, 1)
+
+    genres = item.genres
+    if len(genres) == 0 and 'genre' in tags:
+        genres = (tags['genre'],)
+
+    return ImportedFile(
+        path=item.path,
+        filename=filename,
+        name=item.name or tags.get('title') or os.path.splitext(filename)[0],
+        artist=item.artist or tags.get('artist') or UNKNOWN_ARTIST,
+        album=item.album or tags.get('album') or UNKNOWN_ALBUM,
+        genres=genres,
+        release_date=release_date or date.today(),
+        size=size,
+        sha256=content_hash.hexdigest(),
+        duration=mp3_info.duration if mp3_info is not None else None,
+        bitrate=mp3_info.bitrate if mp3_info is not None else None
+    )
+
+
+class CatalogImporter:
+    """Массовый импорт композиций в каталог.
+
+    Файлы обрабатываются пакетами: хэширование и разбор выполняются в пуле
+    процессов (следующий пакет разбирается, пока сохраняется текущий),
+    аудиофайлы загружаются в хранилище в несколько потоков, а строки каталога
+    вставляются пакетно (executemany) в одной транзакции на пакет.
+    После каждого пакета пути импортированных файлов записываются в файл
+    контрольной точки, поэтому прерванный импорт продолжается с места остановки."""
+
+    def __init__(self, session: MusicSession, checkpoint_path: str = None, batch_size: int = 500,
+                 processes: int = None, upload_threads: int = 8) -> None:
+        """Инициализация импорта."""
+
+        self.session = session
+        self.engine = session.engine
+        self.blob_store = session.blob_store
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.processes = processes
+        self.upload_threads = upload_threads
+
+        self.done_paths = self.load_checkpoint()
+
+        # ID уже существующих сущностей каталога: имя (для альбомов - (ID исполнителя, название)) -> ID
+        self.artist_ids = {}
+        self.album_ids = {}
+        self.genre_ids = {}
+
+        self.stats = {'files': 0, 'imported': 0, 'skipped': 0, 'failed': 0, 'deduplicated': 0,
+                      'artists': 0, 'albums': 0, 'genres': 0}
+        self.errors = []
+
+    def load_checkpoint(self) -> set[str]:
+        """Загрузка путей файлов, импортированных ранее."""
+
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return set()
+
+        with open(self.checkpoint_path, encoding='utf-8') as checkpoint_file:
+            return set(json.load(checkpoint_file)['done'])
+
+    def save_checkpoint(self) -> None:
+        """Атомарная запись контрольной точки."""
+
+        if self.checkpoint_path is None:
+            return
+
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump({'done': sorted(self.done_paths)}, checkpoint_file, ensure_ascii=False)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def run(self, items: Iterable[ImportItem], progress: Callable[[dict], None] = None) -> dict:
+        """Импорт файлов; progress вызывается со статистикой после каждого пакета.
+
+        Возвращает итоговую статистику импорта."""
+
+        start_time = time.perf_counter()
+        self.load_existing()
+
+        with ProcessPoolExecutor(self.processes) as process_pool, \
+                ThreadPoolExecutor(self.upload_threads) as upload_pool:
+            for files in self.analyzed_batches(items, process_pool):
+                imported = [f for f in files if f.error is None]
+                for f in files:
+                    if f.error is not None:
+                        self.stats['failed'] += 1
+                        self.errors.append((f.path, f.error))
+
+                if len(imported) != 0:
+                    audio_ids = self.upload(imported, upload_pool)
+                    self.insert(imported, audio_ids)
+
+                self.stats['imported'] += len(imported)
+                self.done_paths.update(f.path for f in imported)
+                self.save_checkpoint()
+
+                if progress is not None:
+                    progress(self.stats)
+
+        elapsed = time.perf_counter() - start_time
+        self.stats['seconds'] = round(elapsed, 3)
+        self.stats['tracks_per_minute'] = round(self.stats['imported'] / elapsed * 60) if elapsed else 0
+        return self.stats
+
+    def analyzed_batches(self, items: Iterable[ImportItem],
+                         process_pool: ProcessPoolExecutor) -> Iterator[list[ImportedFile]]:
+        """Разбор файлов пакетами; следующий пакет разбирается во время обработки текущего."""
+
+        pending = None
+        batch = []
+
+        for item in items:
+            self.stats['files'] += 1
+            if item.path in self.done_paths:
+                self.stats['skipped'] += 1
+                continue
+
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                submitted = [process_pool.submit(analyze_file, i) for i in batch]
+                batch = []
+                if pending is not None:
+                    yield [future.result() for future in pending]
+                pending = submitted
+
+        if len(batch) != 0:
+            submitted = [process_pool.submit(analyze_file, i) for i in batch]
+            if pending is not None:
+                yield [future.result() for future in pending]
+            pending = submitted
+
+        if pending is not None:
+            yield [future.result() for future in pending]
+
+    def upload_file(self, imported_file: ImportedFile) -> str:
+        """Сохранение аудиофайла в хранилище с дедупликацией по уже вычисленному SHA-256."""
+
+        blob_id = self.blob_store.acquire_by_hash(imported_file.sha256)
+        if blob_id is not None:
+            self.stats['deduplicated'] += 1
+            return blob_id
+
+        writer = self.blob_store.new_writer(imported_file.filename)
+        try:
+            with open(imported_file.path, 'rb') as audio_file:
+                while chunk := audio_file.read(BlobStore.CHUNK_SIZE):
+                    writer.write(chunk)
+            # файл с тем же содержимым мог быть сохранён параллельно, пока шла запись
+            blob_id, deduplicated = self.blob_store.finish_write(writer, imported_file.sha256)
+        except BaseException:
+            writer.abort()
+            raise
+
+        if deduplicated:
+            self.stats['deduplicated'] += 1
+        return blob_id
+
+    def upload(self, files: list[ImportedFile], upload_pool: ThreadPoolExecutor) -> list[str]:
+        """Параллельная загрузка аудиофайлов пакета; возвращает их ID в порядке файлов.
+
+        Файлы с одинаковым содержимым загружаются один раз, остальные получают ссылку на него.
+        При ошибке уже полученные ссылки освобождаются."""
+
+        first_by_hash = {}
+        for f in files:
+            first_by_hash.setdefault(f.sha256, f)
+
+        futures = {sha256: upload_pool.submit(self.upload_file, f) for sha256, f in first_by_hash.items()}
+
+        audio_ids = []
+        extra_ids = []
+        try:
+            uploaded = {sha256: future.result() for sha256, future in futures.items()}
+            for f in files:
+                if first_by_hash[f.sha256] is f:
+                    audio_ids.append(uploaded[f.sha256])
+                else:
+                    extra_ids.append(self.blob_store.acquire_by_hash(f.sha256))
+                    audio_ids.append(extra_ids[-1])
+                    self.stats['deduplicated'] += 1
+        except BaseException:
+            for future in futures.values():
+                if future.exception() is None:
+                    self.blob_store.release(future.result())
+            for audio_id in extra_ids:
+                self.blob_store.release(audio_id)
+            raise
+
+        return audio_ids
+
+    def load_existing(self) -> None:
+        """Загрузка ID существующих исполнителей, альбомов и жанров одним запросом на таблицу."""
+
+        with Session(self.engine) as session:
+            for artist_id, name in session.execute(select(Artist.id, Artist.name).order_by(Artist.id.desc())):
+                self.artist_ids[name] = artist_id
+            for album_id, artist_id, name in session.execute(
+                    select(Album.id, Album.artist_id, Album.name).order_by(Album.id.desc())):
+                self.album_ids[(artist_id, name)] = album_id
+            for genre_id, name in session.execute(select(Genre.id, Genre.name).order_by(Genre.id.desc())):
+                self.genre_ids[name] = genre_id
+
+    def insert(self, files: list[ImportedFile], audio_ids: list[str]) -> None:
+        """Добавление композиций пакета и недостающих исполнителей, альбомов и жанров в одной транзакции."""
+
+        artist_ids, album_ids, genre_ids = dict(self.artist_ids), dict(self.album_ids), dict(self.genre_ids)
+
+        with Session(self.engine) as session:
+            try:
+                # недостающие исполнители и жанры
+                new_artists = list(dict.fromkeys(f.artist for f in files if f.artist not in artist_ids))
+                if len(new_artists) != 0:
+                    rows = session.execute(
+                        insert(Artist).returning(Artist.id, sort_by_parameter_order=True),
+                        [{'name': name, 'description': ''} for name in new_artists]
+                    )
+                    artist_ids.update(zip(new_artists, rows.scalars()))
+
+                new_genres = list(dict.fromkeys(g for f in files for g in f.genres if g not in genre_ids))
+                if len(new_genres) != 0:
+                    rows = session.execute(
+                        insert(Genre).returning(Genre.id, sort_by_parameter_order=True),
+                        [{'name': name} for name in new_genres]
+                    )
+                    genre_ids.update(zip(new_genres, rows.scalars()))
+
+                # недостающие альбомы (дата выпуска берётся из первой композиции альбома)
+                new_albums = {}
+                for f in files:
+                    key = (artist_ids[f.artist], f.album)
+                    if key not in album_ids:
+                        new_albums.setdefault(key, f.release_date)
+                if len(new_albums) != 0:
+                    rows = session.execute(
+                        insert(Album).returning(Album.id, sort_by_parameter_order=True),
+                        [{'name': name, 'artist_id': artist_id, 'release_date': release_date}
+                         for (artist_id, name), release_date in new_albums.items()]
+                    )
+                    album_ids.update(zip(new_albums, rows.scalars()))
+
+                # композиции и их жанры
+                track_ids = session.execute(
+                    insert(Track).returning(Track.id, sort_by_parameter_order=True),
+                    [{
+                        'name': f.name,
+                        'audio_id': audio_id,
+                        'album_id': album_ids[(artist_ids[f.artist], f.album)],
+                        'filename': f.filename,
+                        'size': f.size,
+                        'content_hash': f.sha256,
+                        'duration': f.duration,
+                        'bitrate': f.bitrate
+                    } for f, audio_id in zip(files, audio_ids)]
+                ).scalars().all()
+
+                genre_rows = [{'track_id': track_id, 'genre_id': genre_ids[genre]}
+                              for f, track_id in zip(files, track_ids) for genre in f.genres]
+                if len(genre_rows) != 0:
+                    session.execute(insert(track_to_genre), genre_rows)
+
+                session.commit()
+            except BaseException:
+                session.rollback()
+                for audio_id in audio_ids:  # освобождение уже сохранённых аудиофайлов
+                    self.blob_store.release(audio_id)
+                raise
+
+        # кэш исполнителей очищается вместе с зависящими от него кэшами альбомов и композиций
+        self.session.cache.invalidate('artist')
+        self.session.cache.invalidate('genre')
+
+        self.session.notify('artist', 'insert', [artist_ids[name] for name in new_artists])
+        self.session.notify('genre', 'insert', [genre_ids[name] for name in new_genres])
+        self.session.notify('album', 'insert', [album_ids[key] for key in new_albums])
+        self.session.notify('track', 'insert', track_ids)
+
+        self.stats['artists'] += len(artist_ids) - len(self.artist_ids)
+        self.stats['albums'] += len(album_ids) - len(self.album_ids)
+        self.stats['genres'] += len(genre_ids) - len(self.genre_ids)
+        self.artist_ids, self.album_ids, self.genre_ids = artist_ids, album_ids, genre_ids
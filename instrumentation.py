@@ -0,0 +1,278 @@
+import json
+import time
+import inspect
+import threading
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from sqlalchemy import event, Engine
+
+import config
+
+# границы интервалов гистограмм (в мс); последний интервал не ограничен сверху
+BUCKETS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# операция, к которой относятся SQL-запросы, выполняемые вне методов сессии (например, сборщиком мусора)
+OTHER_OPERATION = 'other'
+
+
+class Histogram:
+    """Распределение длительностей операций одного вида."""
+
+    def __init__(self) -> None:
+        """Инициализация пустой гистограммы."""
+
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Учёт длительности операции (в мс)."""
+
+        index = 0
+        while index < len(BUCKETS) and value > BUCKETS[index]:
+            index += 1
+
+        self.bucket_counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> dict:
+        """Представление гистограммы в виде словаря."""
+
+        return {
+            'count': self.count,
+            'sum_ms': round(self.sum, 3),
+            'mean_ms': round(self.sum / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 3),
+            'buckets': {
+                str(bound): count for bound, count in zip(BUCKETS + ('+Inf',), self.bucket_counts)
+            }
+        }
+
+
+class Metrics:
+    """Собранные гистограммы длительностей и сведения о последнем отображённом экране.
+
+    Гистограммы хранятся по категориям ('session' - методы MusicSession,
+    'sql' - SQL-запросы по методам сессии, 'blob_store' - обращения к хранилищу
+    аудиофайлов, 'bcrypt' - хеширование паролей, 'frame' - обновление виджетов)
+    и названиям операций."""
+
+    def __init__(self) -> None:
+        """Инициализация пустого набора метрик."""
+
+        self.histograms = {}  # (категория, операция) -> Histogram
+        self.last_screen = None
+        self.lock = threading.Lock()
+
+        # текущая операция и количество выполненных в ней запросов - отдельно для каждого потока
+        self.local = threading.local()
+
+    def observe(self, category: str, name: str, value: float) -> None:
+        """Учёт длительности операции (в мс)."""
+
+        with self.lock:
+            histogram = self.histograms.get((category, name))
+            if histogram is None:
+                histogram = self.histograms[(category, name)] = Histogram()
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        """Удаление всех собранных данных."""
+
+        with self.lock:
+            self.histograms = {}
+            self.last_screen = None
+
+    @contextmanager
+    def operation(self, name: str) -> Iterator[None]:
+        """Отнесение выполняемых внутри блока SQL-запросов к операции name.
+
+        Во вложенных операциях запросы относятся к самой внешней."""
+
+        if getattr(self.local, 'operation', None) is not None:
+            yield
+            return
+
+        self.local.operation = name
+        try:
+            yield
+        finally:
+            self.local.operation = None
+
+    def current_operation(self) -> str:
+        """Операция, выполняемая в текущем потоке."""
+
+        return getattr(self.local, 'operation', None) or OTHER_OPERATION
+
+    def count_statement(self) -> None:
+        """Учёт выполненного в текущем потоке SQL-запроса."""
+
+        self.local.statements = getattr(self.local, 'statements', 0) + 1
+
+    def statement_count(self) -> int:
+        """Количество SQL-запросов, выполненных в текущем потоке."""
+
+        return getattr(self.local, 'statements', 0)
+
+    def to_dict(self) -> dict:
+        """Представление метрик в виде словаря для экспорта в JSON."""
+
+        with self.lock:
+            result = {}
+            for (category, name), histogram in sorted(self.histograms.items()):
+                result.setdefault(category, {})[name] = histogram.to_dict()
+            result['last_screen'] = self.last_screen
+
+        return result
+
+    def to_json(self) -> str:
+        """Экспорт метрик в формате JSON."""
+
+        return json.dumps(self.to_dict(), indent=4, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Экспорт метрик в текстовом формате Prometheus."""
+
+        lines = [
+            '# HELP freemusic_duration_milliseconds Длительность операций Free Music',
+            '# TYPE freemusic_duration_milliseconds histogram'
+        ]
+
+        with self.lock:
+            for (category, name), histogram in sorted(self.histograms.items()):
+                labels = f'category="{category}",operation="{name}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f'freemusic_duration_milliseconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'freemusic_duration_milliseconds_sum{{{labels}}} {histogram.sum:.3f}')
+                lines.append(f'freemusic_duration_milliseconds_count{{{labels}}} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path: str) -> None:
+        """Сохранение метрик в файл; формат Prometheus выбирается по расширению .prom."""
+
+        data = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with open(path, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(data)
+
+
+# метрики процесса; собираются только при включённой инструментации
+metrics = Metrics()
+
+
+def enabled() -> bool:
+    """Проверка, включена ли инструментация в настройках."""
+
+    return config.INSTRUMENTATION
+
+
+@contextmanager
+def timer(category: str, name: str) -> Iterator[None]:
+    """Замер длительности выполнения блока (при выключенной инструментации ничего не делает)."""
+
+    if not config.INSTRUMENTATION:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(category, name, (time.perf_counter() - start) * 1000)
+
+
+def timed(category: str, name: str = None) -> Callable:
+    """Декоратор, замеряющий длительность вызовов функции (по умолчанию операция - имя функции)."""
+
+    def decorator(function: Callable) -> Callable:
+        operation_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(category, operation_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def timed_screen(function: Callable) -> Callable:
+    """Декоратор метода обновления виджета: замер длительности и количества SQL-запросов.
+
+    Сведения о последнем вызове сохраняются в metrics.last_screen для отладочной панели."""
+
+    screen = function.__qualname__.split('.')[0]
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not config.INSTRUMENTATION:
+            return function(*args, **kwargs)
+
+        statements = metrics.statement_count()
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            metrics.observe('frame', screen, elapsed)
+            metrics.last_screen = {
+                'screen': screen,
+                'queries': metrics.statement_count() - statements,
+                'render_ms': round(elapsed, 3)
+            }
+
+    return wrapper
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Учёт количества и длительности SQL-запросов по методам сессии."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        context._instrumentation_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - context._instrumentation_start) * 1000
+        metrics.count_statement()
+        metrics.observe('sql', metrics.current_operation(), elapsed)
+
+
+def instrument_methods(instance: Any, category: str, operations: bool = False, interface: type = None) -> None:
+    """Замена открытых методов объекта обёртками, замеряющими их длительность.
+
+    Если указан interface, замеряются только объявленные в нём методы. При operations=True
+    выполняемые внутри методов SQL-запросы относятся к этим методам."""
+
+    for name, function in inspect.getmembers(type(instance), inspect.isfunction):
+        # у генераторов замерялось бы только создание итератора
+        if name.startswith('_') or inspect.isgeneratorfunction(function):
+            continue
+        if interface is not None and not hasattr(interface, name):
+            continue
+
+        method = getattr(instance, name)
+
+        def wrapper(*args, method=method, name=name, **kwargs):
+            with timer(category, name):
+                if operations:
+                    with metrics.operation(name):
+                        return method(*args, **kwargs)
+                return method(*args, **kwargs)
+
+        setattr(instance, name, functools.wraps(method)(wrapper))
+
+
+def instrument_session(session) -> None:
+    """Инструментация сессии MusicSession: её методов и выполняемых ими SQL-запросов."""
+
+    instrument_engine(session.engine)
+    instrument_methods(session, 'session', operations=True)
@@ -0,0 +1,272 @@
+from typing import Callable
+
+from sqlalchemy import inspect, text, Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+from db import Base, Tombstone, CURRENT_TIMESTAMP_SQL
+
+
+# зарегистрированные миграции: (версия, описание, функция)
+MIGRATIONS = []
+
+
+def migration(version: int, description: str) -> Callable:
+    """Декоратор, регистрирующий функцию миграции схемы БД до заданной версии."""
+
+    def register(function: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        MIGRATIONS.append((version, description, function))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return function
+
+    return register
+
+
+def get_schema_version(connection: Connection) -> int:
+    """Получение версии схемы БД (хранится в заголовке файла SQLite)."""
+
+    return connection.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def upgrade(engine: Engine) -> int:
+    """Применение к БД всех миграций новее её текущей версии.
+
+    Вызывается при запуске после Base.metadata.create_all. Каждая миграция
+    выполняется в отдельной транзакции вместе с записью новой версии (PRAGMA
+    user_version), поэтому прерванная миграция не оставляет схему изменённой
+    наполовину. Сами миграции идемпотентны (проверяют наличие столбцов, индексов
+    и таблиц), поэтому для только что созданной БД они лишь записывают версию.
+    Возвращает итоговую версию схемы."""
+
+    if engine.dialect.name != 'sqlite':
+        return 0
+
+    with engine.connect() as connection:
+        version = get_schema_version(connection)
+
+    for target_version, description, function in MIGRATIONS:
+        if target_version <= version:
+            continue
+
+        with engine.connect() as connection:
+            # при пересоздании таблиц проверка внешних ключей должна быть отключена,
+            # иначе удаление старой таблицы вызовет каскадное удаление зависящих строк;
+            # PRAGMA foreign_keys не действует внутри транзакции, поэтому выполняется до неё
+            connection.exec_driver_sql('PRAGMA foreign_keys = OFF')
+            try:
+                # sqlite3 сам начинает транзакцию только перед INSERT, UPDATE и DELETE,
+                # а CREATE, ALTER и DROP без явного BEGIN фиксировались бы сразу
+                connection.exec_driver_sql('BEGIN')
+                function(connection)
+                connection.exec_driver_sql(f'PRAGMA user_version = {target_version}')
+                connection.commit()
+            finally:
+                connection.rollback()
+                connection.exec_driver_sql('PRAGMA foreign_keys = ON')
+        version = target_version
+
+    return version
+
+
+@migration(1, 'Сведения об аудиофайлах в таблице композиций')
+def add_missing_columns(connection: Connection) -> None:
+    """Добавление в существующие таблицы столбцов, появившихся в моделях позже."""
+
+    inspector = inspect(connection)
+
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+
+# индексируемые для полнотекстового поиска таблицы: тип записи -> (код типа, столбец описания)
+SEARCH_SOURCES = {
+    'track': (0, None),
+    'album': (1, None),
+    'artist': (2, 'description'),
+    'genre': (3, None),
+}
+
+
+def create_search_triggers(connection: Connection) -> None:
+    """Создание триггеров, поддерживающих индекс catalog_search в актуальном состоянии."""
+
+    for table, (code, description_column) in SEARCH_SOURCES.items():
+        new_description = f'new.{description_column}' if description_column else "''"
+        # индекс обновляется только при изменении индексируемых столбцов
+        indexed_columns = ', '.join(['name'] + ([description_column] if description_column else []))
+        connection.execute(text(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO catalog_search(rowid, kind, ref_id, name, description) '
+            f"VALUES (new.id * 4 + {code}, '{table}', new.id, new.name, {new_description}); END"
+        ))
+        connection.execute(text(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {indexed_columns} ON "{table}" BEGIN '
+            f'UPDATE catalog_search SET name = new.name, description = {new_description} '
+            f'WHERE rowid = new.id * 4 + {code}; END'
+        ))
+        connection.execute(text(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON "{table}" BEGIN '
+            f'DELETE FROM catalog_search WHERE rowid = old.id * 4 + {code}; END'
+        ))
+
+
+@migration(2, 'Полнотекстовый поиск по каталогу')
+def create_search_index(connection: Connection) -> None:
+    """Создание полнотекстового индекса SQLite FTS5 по каталогу.
+
+    Индекс catalog_search содержит названия композиций, альбомов, исполнителей
+    и жанров, а также описания исполнителей; rowid записи индекса равен
+    ID * 4 + код типа, поэтому триггеры находят запись без просмотра индекса.
+    Индекс поддерживается в актуальном состоянии триггерами на таблицах каталога."""
+
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_search'"
+    )).first() is not None
+
+    if not exists:
+        connection.execute(text(
+            'CREATE VIRTUAL TABLE catalog_search USING fts5('
+            "kind UNINDEXED, ref_id UNINDEXED, name, description, tokenize='unicode61 remove_diacritics 2')"
+        ))
+        # совпадения в названии важнее совпадений в описании
+        connection.execute(text(
+            "INSERT INTO catalog_search(catalog_search, rank) VALUES ('rank', 'bm25(0, 0, 10, 1)')"
+        ))
+
+        # заполнение только что созданного индекса уже имеющимися данными
+        for table, (code, description_column) in SEARCH_SOURCES.items():
+            description = description_column or "''"
+            connection.execute(text(
+                f'INSERT INTO catalog_search(rowid, kind, ref_id, name, description) '
+                f"SELECT id * 4 + {code}, '{table}', id, name, {description} FROM \"{table}\""
+            ))
+
+    create_search_triggers(connection)
+
+
+@migration(3, 'Индексы по внешним ключам и названиям')
+def create_indexes(connection: Connection) -> None:
+    """Создание объявленных в моделях индексов, отсутствующих в существующей БД."""
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# таблицы с внешними ключами ON DELETE CASCADE в порядке зависимостей:
+# таблица -> {столбец внешнего ключа: родительская таблица}
+CASCADE_TABLES = {
+    'album': {'artist_id': 'artist'},
+    'track': {'album_id': 'album'},
+    'track_to_genre': {'track_id': 'track', 'genre_id': 'genre'},
+}
+
+
+def rebuild_table(connection: Connection, table_name: str, foreign_keys: dict[str, str]) -> None:
+    """Пересоздание таблицы по её текущему описанию в моделях.
+
+    SQLite не позволяет изменить внешние ключи существующей таблицы, поэтому
+    создаётся новая таблица, в неё копируются строки (кроме ссылающихся на уже
+    удалённые родительские строки), старая таблица удаляется, а новая
+    переименовывается. Индексы и триггеры удалённой таблицы создаются заново."""
+
+    table = Base.metadata.tables[table_name]
+    new_name = f'{table_name}_new'
+
+    create_statement = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(create_statement.replace(f'CREATE TABLE {table_name} ', f'CREATE TABLE {new_name} ', 1))
+
+    columns = ', '.join(f'"{column.name}"' for column in table.columns)
+    conditions = ' AND '.join(f'"{column}" IN (SELECT id FROM "{parent}")' for column, parent in foreign_keys.items())
+    connection.exec_driver_sql(
+        f'INSERT INTO "{new_name}" ({columns}) SELECT {columns} FROM "{table_name}" WHERE {conditions}'
+    )
+
+    connection.exec_driver_sql(f'DROP TABLE "{table_name}"')
+    connection.exec_driver_sql(f'ALTER TABLE "{new_name}" RENAME TO "{table_name}"')
+
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+
+
+@migration(4, 'Каскадное удаление средствами БД')
+def add_cascade_foreign_keys(connection: Connection) -> None:
+    """Пересоздание таблиц, внешние ключи которых не имеют ON DELETE CASCADE."""
+
+    rebuilt = False
+    for table_name, foreign_keys in CASCADE_TABLES.items():
+        actions = {
+            row[3]: row[6]  # столбец -> действие при удалении
+            for row in connection.exec_driver_sql(f'PRAGMA foreign_key_list("{table_name}")')
+        }
+        if all(actions.get(column) == 'CASCADE' for column in foreign_keys):
+            continue
+
+        rebuild_table(connection, table_name, foreign_keys)
+        rebuilt = True
+
+    # триггеры полнотекстового индекса удаляются вместе со старыми таблицами
+    if rebuilt:
+        create_search_triggers(connection)
+
+
+# таблицы каталога, изменения которых отслеживаются клиентами общей БД
+CHANGE_TABLES = ('track', 'album', 'artist', 'genre')
+
+
+def create_change_triggers(connection: Connection) -> None:
+    """Создание триггеров, поддерживающих отметки времени изменения и отметки об удалении.
+
+    Отметка updated_at выставляется при добавлении и изменении записи, если её
+    не выставил сам запрос (например, при изменении БД сторонними программами),
+    а у композиции - также при изменении списка её жанров. При удалении записи,
+    в том числе каскадном, в таблицу tombstone добавляется отметка об удалении."""
+
+    for table in CHANGE_TABLES:
+        connection.execute(text(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_updated_at_insert AFTER INSERT ON "{table}" '
+            f'WHEN new.updated_at IS NULL BEGIN '
+            f'UPDATE "{table}" SET updated_at = {CURRENT_TIMESTAMP_SQL} WHERE id = new.id; END'
+        ))
+        connection.execute(text(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_updated_at_update AFTER UPDATE ON "{table}" '
+            f'WHEN new.updated_at IS old.updated_at BEGIN '
+            f'UPDATE "{table}" SET updated_at = {CURRENT_TIMESTAMP_SQL} WHERE id = new.id; END'
+        ))
+        connection.execute(text(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_tombstone AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO tombstone(entity_type, entity_id, deleted_at) '
+            f"VALUES ('{table}', old.id, {CURRENT_TIMESTAMP_SQL}); END"
+        ))
+
+    for event, row in (('insert', 'new'), ('delete', 'old')):
+        connection.execute(text(
+            f'CREATE TRIGGER IF NOT EXISTS track_to_genre_updated_at_{event} AFTER {event.upper()} ON track_to_genre '
+            f'BEGIN UPDATE track SET updated_at = {CURRENT_TIMESTAMP_SQL} WHERE id = {row}.track_id; END'
+        ))
+
+
+@migration(5, 'Отметки времени изменения и отметки об удалении')
+def add_change_tracking(connection: Connection) -> None:
+    """Добавление столбцов updated_at, таблицы tombstone и поддерживающих их триггеров.
+
+    У существующих записей время изменения принимается равным времени создания.
+    Триггер полнотекстового индекса на изменение записи пересоздаётся так, чтобы
+    срабатывать только при изменении индексируемых столбцов, а не отметок времени."""
+
+    add_missing_columns(connection)
+    Tombstone.__table__.create(connection, checkfirst=True)
+    create_indexes(connection)
+
+    for table in CHANGE_TABLES:
+        connection.execute(text(
+            f"UPDATE \"{table}\" SET updated_at = strftime('%Y-%m-%d %H:%M:%f', coalesce(created_at, 'now')) "
+            f'WHERE updated_at IS NULL'
+        ))
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {table}_search_update'))
+
+    create_search_triggers(connection)
+    create_change_triggers(connection)
@@ -0,0 +1,202 @@
+from typing import BinaryIO, NamedTuple
+
+
+class Mp3Info(NamedTuple):
+    """Параметры MP3-файла."""
+
+    duration: float  # длительность в секундах
+    bitrate: int  # средний битрейт в кбит/с
+
+
+# битрейты (кбит/с) по индексу из заголовка кадра: (версия MPEG, слой) -> таблица
+BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# частоты дискретизации (Гц) по индексу из заголовка кадра для MPEG 1, 2 и 2.5
+SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+
+SCAN_LIMIT = 64 * 1024  # сколько байт после тега ID3v2 просматривается в поисках первого кадра
+
+
+class FrameHeader(NamedTuple):
+    """Заголовок кадра MPEG Audio."""
+
+    version: float
+    layer: int
+    bitrate: int
+    sample_rate: int
+    samples: int  # количество отсчётов в кадре
+    length: int  # длина кадра в байтах
+    mono: bool
+
+
+def parse_frame_header(data: bytes) -> FrameHeader:
+    """Разбор 4-байтового заголовка кадра (None, если заголовок некорректен)."""
+
+    if len(data) < 4 or data[0] != 0xFF or data[1] & 0xE0 != 0xE0:
+        return None
+
+    version = {0: 2.5, 2: 2, 3: 1}.get((data[1] >> 3) & 0x03)
+    layer = {1: 3, 2: 2, 3: 1}.get((data[1] >> 1) & 0x03)
+    bitrate_index = data[2] >> 4
+    sample_rate_index = (data[2] >> 2) & 0x03
+    padding = (data[2] >> 1) & 0x01
+    mono = data[3] >> 6 == 3
+
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrate = BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        length = samples // 8 * bitrate * 1000 // sample_rate + padding
+
+    return FrameHeader(version, layer, bitrate, sample_rate, samples, length, mono)
+
+
+def read_mp3_info(audio_file: BinaryIO, size: int) -> Mp3Info:
+    """Определение длительности и битрейта MP3-файла по заголовкам.
+
+    Читаются только тег ID3v2 (его заголовок), первый кадр и заголовок
+    Xing/Info или VBRI; для файлов без них битрейт считается постоянным.
+    Возвращает None, если файл не похож на MP3."""
+
+    audio_file.seek(0)
+    header = audio_file.read(10)
+
+    # пропуск тега ID3v2 (его размер записан в формате synchsafe integer)
+    audio_start = 0
+    if len(header) == 10 and header[:3] == b'ID3':
+        audio_start = 10 + (header[6] << 21 | header[7] << 14 | header[8] << 7 | header[9])
+        if header[5] & 0x10:  # присутствует footer
+            audio_start += 10
+
+    audio_file.seek(audio_start)
+    data = audio_file.read(SCAN_LIMIT)
+
+    # поиск первого кадра, за которым следует ещё один корректный кадр
+    for offset in range(len(data) - 3):
+        frame = parse_frame_header(data[offset:offset + 4])
+        if frame is None:
+            continue
+        next_offset = offset + frame.length
+        if next_offset + 4 <= len(data) and parse_frame_header(data[next_offset:next_offset + 4]) is None:
+            continue
+        break
+    else:
+        return None
+
+    audio_start += offset
+    audio_size = size - audio_start
+
+    # количество кадров из заголовка Xing/Info (после побочной информации кадра) или VBRI
+    frames = None
+    if frame.version == 1:
+        side_info_length = 17 if frame.mono else 32
+    else:
+        side_info_length = 9 if frame.mono else 17
+    xing_offset = offset + 4 + side_info_length
+    vbri_offset = offset + 4 + 32
+
+    if data[xing_offset:xing_offset + 4] in (b'Xing', b'Info'):
+        flags = int.from_bytes(data[xing_offset + 4:xing_offset + 8], 'big')
+        if flags & 0x01:
+            frames = int.from_bytes(data[xing_offset + 8:xing_offset + 12], 'big')
+    elif data[vbri_offset:vbri_offset + 4] == b'VBRI':
+        frames = int.from_bytes(data[vbri_offset + 14:vbri_offset + 18], 'big')
+
+    if frames:
+        duration = frames * frame.samples / frame.sample_rate
+        bitrate = round(audio_size * 8 / duration / 1000)
+    else:
+        bitrate = frame.bitrate
+        duration = audio_size * 8 / (bitrate * 1000)
+
+    return Mp3Info(duration=duration, bitrate=bitrate)
+
+
+# текстовые кадры ID3v2, используемые при импорте: идентификатор кадра -> поле тега
+# (ID3v2.2 использует трёхбуквенные идентификаторы)
+ID3_TEXT_FRAMES = {
+    'TIT2': 'title', 'TT2': 'title',
+    'TPE1': 'artist', 'TP1': 'artist',
+    'TALB': 'album', 'TAL': 'album',
+    'TCON': 'genre', 'TCO': 'genre',
+    'TDRC': 'year', 'TYER': 'year', 'TYE': 'year',
+}
+
+ID3_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+
+
+def read_id3_tags(audio_file: BinaryIO) -> dict:
+    """Чтение названия, исполнителя, альбома, жанра и года из тега ID3v2.
+
+    Возвращает словарь с найденными полями (title, artist, album, genre, year);
+    пустой, если тега нет."""
+
+    audio_file.seek(0)
+    header = audio_file.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return {}
+
+    major_version = header[3]
+    tag_size = header[6] << 21 | header[7] << 14 | header[8] << 7 | header[9]
+    data = audio_file.read(tag_size)
+
+    # пропуск расширенного заголовка
+    offset = 0
+    if header[5] & 0x40 and major_version >= 3 and len(data) >= 4:
+        if major_version == 4:
+            offset = data[0] << 21 | data[1] << 14 | data[2] << 7 | data[3]
+        else:
+            offset = int.from_bytes(data[:4], 'big') + 4
+
+    id_length, header_length = (3, 6) if major_version == 2 else (4, 10)
+
+    tags = {}
+    while offset + header_length <= len(data):
+        frame_id = data[offset:offset + id_length]
+        if frame_id.strip(b'\0') == b'':  # начало заполнения нулями
+            break
+
+        size_bytes = data[offset + id_length:offset + id_length + (3 if major_version == 2 else 4)]
+        if major_version == 4:
+            frame_size = size_bytes[0] << 21 | size_bytes[1] << 14 | size_bytes[2] << 7 | size_bytes[3]
+        else:
+            frame_size = int.from_bytes(size_bytes, 'big')
+
+        body = data[offset + header_length:offset + header_length + frame_size]
+        offset += header_length + frame_size
+
+        field = ID3_TEXT_FRAMES.get(frame_id.decode('latin-1'))
+        if field is None or len(body) < 2 or field in tags:
+            continue
+
+        encoding = ID3_ENCODINGS.get(body[0], 'latin-1')
+        value = body[1:].decode(encoding, errors='replace').split('\0')[0].strip()
+
+        # жанр может быть записан ссылкой на номер жанра ID3v1, например "(17)Rock"
+        if field == 'genre' and value.startswith('('):
+            value = value.partition(')')[2].strip() or value
+        if field == 'year':
+            value = value[:4]
+
+        if value:
+            tags[field] = value
+
+    return tags
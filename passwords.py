@@ -0,0 +1,35 @@
+import config
+from instrumentation import timed
+
+
+@timed('bcrypt')
+def hash_password(password: str, rounds: int = None) -> str:
+    """Хеширование пароля bcrypt с заданной стоимостью (по умолчанию - из настроек)."""
+
+    # bcrypt импортируется при первом использовании, чтобы не замедлять запуск приложения
+    import bcrypt
+
+    rounds = rounds if rounds is not None else config.BCRYPT_ROUNDS
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+@timed('bcrypt')
+def check_password(password: str, password_hash: str) -> bool:
+    """Проверка пароля по хешу."""
+
+    import bcrypt
+
+    return bcrypt.checkpw(password.encode(), password_hash.encode())
+
+
+def get_rounds(password_hash: str) -> int:
+    """Получение стоимости хеша bcrypt (формат $2b$12$...)."""
+
+    return int(password_hash.split('$')[2])
+
+
+def needs_rehash(password_hash: str, rounds: int = None) -> bool:
+    """Проверка, отличается ли стоимость хеша от заданной (по умолчанию - из настроек)."""
+
+    rounds = rounds if rounds is not None else config.BCRYPT_ROUNDS
+    return get_rounds(password_hash) != rounds
@@ -0,0 +1,382 @@
+import queue
+import shlex
+import threading
+import subprocess
+from typing import NamedTuple, Sequence
+
+import config
+from blob_store import BlobStore
+
+
+class PlaybackItem(NamedTuple):
+    """Композиция в очереди воспроизведения."""
+
+    audio_id: str
+    size: int  # размер аудиофайла (None, если неизвестен - тогда он запрашивается у хранилища)
+    name: str
+
+
+class RingBuffer:
+    """Кольцевой буфер фиксированного размера для передачи данных между потоками.
+
+    Запись блокируется, пока в буфере нет места, а чтение - пока нет данных,
+    поэтому объём памяти не зависит от размера передаваемого файла."""
+
+    def __init__(self, capacity: int) -> None:
+        """Инициализация буфера."""
+
+        self.data = bytearray(capacity)
+        self.capacity = capacity
+        self.start = 0
+        self.length = 0
+
+        self.finished = False  # запись завершена, оставшиеся данные можно дочитать
+        self.closed = False  # буфер закрыт читателем, данные больше не нужны
+
+        self.condition = threading.Condition()
+
+    def write(self, data: bytes) -> bool:
+        """Запись данных; возвращает False, если буфер закрыт читателем."""
+
+        view = memoryview(data)
+        while len(view) != 0:
+            with self.condition:
+                while self.length == self.capacity and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return False
+
+                end = (self.start + self.length) % self.capacity
+                size = min(len(view), self.capacity - self.length, self.capacity - end)
+                self.data[end:end + size] = view[:size]
+                self.length += size
+                self.condition.notify_all()
+
+            view = view[size:]
+
+        return True
+
+    def read(self, size: int) -> bytes:
+        """Чтение не более size байт; пустой результат означает конец данных."""
+
+        with self.condition:
+            while self.length == 0 and not self.finished and not self.closed:
+                self.condition.wait()
+            if self.closed:
+                return b''
+
+            size = min(size, self.length, self.capacity - self.start)
+            data = bytes(self.data[self.start:self.start + size])
+            self.start = (self.start + size) % self.capacity
+            self.length -= size
+            self.condition.notify_all()
+
+        return data
+
+    def finish(self) -> None:
+        """Завершение записи."""
+
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    def close(self) -> None:
+        """Закрытие буфера читателем (ожидающая запись прерывается)."""
+
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class StreamFeeder(threading.Thread):
+    """Фоновое чтение аудиофайла из хранилища фрагментами в кольцевой буфер."""
+
+    def __init__(self, blob_store: BlobStore, audio_id: str, size: int, buffer: RingBuffer,
+                 start: int = 0, chunk_size: int = BlobStore.CHUNK_SIZE) -> None:
+        """Инициализация чтения файла размером size, начиная с позиции start."""
+
+        super().__init__(daemon=True)
+
+        self.blob_store = blob_store
+        self.audio_id = audio_id
+        self.size = size
+        self.buffer = buffer
+        self.start_position = start
+        self.chunk_size = chunk_size
+
+        self.error = None
+
+    def run(self) -> None:
+        """Чтение файла."""
+
+        position = self.start_position
+        try:
+            while position < self.size:
+                data = self.blob_store.open_range(self.audio_id, position, min(self.chunk_size, self.size - position))
+                if len(data) == 0:
+                    break
+                if not self.buffer.write(data):
+                    return
+                position += len(data)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.buffer.finish()
+
+
+class Prefetch(threading.Thread):
+    """Фоновое чтение начала следующей композиции для воспроизведения без пауз."""
+
+    def __init__(self, blob_store: BlobStore, item: PlaybackItem, size: int) -> None:
+        """Инициализация чтения первых size байт файла."""
+
+        super().__init__(daemon=True)
+
+        self.blob_store = blob_store
+        self.item = item
+        self.prefetch_size = size
+
+        self.file_size = item.size
+        self.data = b''
+        self.error = None
+
+    def run(self) -> None:
+        """Чтение начала файла."""
+
+        try:
+            if self.file_size is None:
+                self.file_size = self.blob_store.stat(self.item.audio_id).size
+            self.data = bytes(self.blob_store.open_range(self.item.audio_id, 0,
+                                                         min(self.prefetch_size, self.file_size)))
+        except Exception as e:
+            self.error = e
+
+
+class AudioSink:
+    """Получатель воспроизводимого потока."""
+
+    def start_track(self, item: PlaybackItem) -> None:
+        """Начало очередной композиции."""
+
+    def write(self, data: bytes) -> None:
+        """Передача очередной части потока (может блокироваться, задавая темп воспроизведения)."""
+
+        raise NotImplementedError
+
+    def finish(self) -> None:
+        """Завершение потока после воспроизведения всех переданных данных."""
+
+        self.close()
+
+    def close(self) -> None:
+        """Немедленная остановка воспроизведения."""
+
+
+class NullSink(AudioSink):
+    """Получатель, отбрасывающий данные (подсчитывает полученные байты и композиции)."""
+
+    def __init__(self) -> None:
+        """Инициализация получателя."""
+
+        self.tracks = []
+        self.bytes_written = 0
+
+    def start_track(self, item: PlaybackItem) -> None:
+        self.tracks.append(item)
+
+    def write(self, data: bytes) -> None:
+        self.bytes_written += len(data)
+
+
+class RawFileSink(AudioSink):
+    """Получатель, записывающий поток всех композиций подряд в файл без декодирования.
+
+    В файл попадают байты аудиофайлов в том виде, в каком они хранятся (кадры MP3),
+    поэтому результат - склейка MP3-файлов, а не WAV. Используется в тестах
+    и для проверки передаваемого проигрывателю потока."""
+
+    def __init__(self, path: str) -> None:
+        """Инициализация получателя."""
+
+        self.path = path
+        self.file = None
+
+    def start_track(self, item: PlaybackItem) -> None:
+        if self.file is None:
+            self.file = open(self.path, 'wb')
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ProcessSink(AudioSink):
+    """Получатель, передающий поток внешнему проигрывателю через стандартный ввод.
+
+    Композиции передаются одному процессу подряд, поэтому переходы между
+    ними не требуют перезапуска проигрывателя."""
+
+    def __init__(self, command: str = config.AUDIO_PLAYER) -> None:
+        """Инициализация получателя; command - команда запуска проигрывателя."""
+
+        self.command = shlex.split(command)
+        self.process = None
+
+    def start_track(self, item: PlaybackItem) -> None:
+        if self.process is None:
+            self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def write(self, data: bytes) -> None:
+        self.process.stdin.write(data)
+
+    def finish(self) -> None:
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process = None
+
+    def close(self) -> None:
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+
+class Player:
+    """Потоковое воспроизведение очереди композиций из хранилища аудиофайлов.
+
+    Текущая композиция читается фрагментами (range-запросами к хранилищу)
+    в кольцевой буфер ограниченного размера, из которого данные передаются
+    получателю; начало следующей композиции читается заранее. Таким образом,
+    в памяти одновременно находится не больше buffer_size + prefetch_size байт.
+    О ходе воспроизведения сообщается через очередь событий events:
+    ('track', индекс, композиция), ('position', индекс, передано_байт, всего_байт),
+    ('finished',), ('stopped',) или ('error', исключение).
+
+    Методы play, skip и stop не ожидают фоновый поток и могут вызываться из потока
+    интерфейса: остановленный поток завершается сам (чтение из удалённого хранилища
+    может занять время), а следующее воспроизведение начинается после его завершения."""
+
+    BUFFER_SIZE = 1024 * 1024
+    PREFETCH_SIZE = 256 * 1024
+
+    def __init__(self, blob_store: BlobStore, sink: AudioSink = None, buffer_size: int = BUFFER_SIZE,
+                 prefetch_size: int = PREFETCH_SIZE, chunk_size: int = BlobStore.CHUNK_SIZE) -> None:
+        """Инициализация проигрывателя (по умолчанию поток передаётся внешнему проигрывателю)."""
+
+        self.blob_store = blob_store
+        self.sink = sink if sink is not None else ProcessSink()
+        self.buffer_size = buffer_size
+        self.prefetch_size = prefetch_size
+        self.chunk_size = chunk_size
+
+        self.events = queue.Queue()
+        self.thread = None
+        # у каждого запуска воспроизведения свои признаки остановки и перехода
+        self.stop_requested = threading.Event()
+        self.skip_requested = threading.Event()
+
+    def play(self, items: Sequence[PlaybackItem], index: int = 0) -> None:
+        """Запуск воспроизведения очереди, начиная с композиции с заданным индексом."""
+
+        self.stop()
+
+        self.stop_requested = threading.Event()
+        self.skip_requested = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run,
+            args=(list(items), index, self.stop_requested, self.skip_requested, self.thread),
+            daemon=True
+        )
+        self.thread.start()
+
+    def skip(self) -> None:
+        """Переход к следующей композиции."""
+
+        self.skip_requested.set()
+
+    def stop(self) -> None:
+        """Остановка воспроизведения (без ожидания завершения фонового потока)."""
+
+        if self.thread is None or self.stop_requested.is_set():
+            return
+
+        self.stop_requested.set()
+        self.sink.close()  # прерывание блокирующей записи в проигрыватель
+
+    def is_playing(self) -> bool:
+        """Проверка, работает ли фоновый поток воспроизведения (в том числе завершающийся после остановки)."""
+
+        return self.thread is not None and self.thread.is_alive()
+
+    def run(self, items: list[PlaybackItem], index: int, stop_requested: threading.Event,
+            skip_requested: threading.Event, previous_thread: threading.Thread = None) -> None:
+        """Воспроизведение очереди после завершения потока предыдущего воспроизведения."""
+
+        # получатель не должен использоваться двумя потоками одновременно
+        if previous_thread is not None:
+            previous_thread.join()
+        if stop_requested.is_set():
+            self.events.put(('stopped',))
+            return
+
+        prefetch = Prefetch(self.blob_store, items[index], self.prefetch_size)
+        prefetch.start()
+
+        try:
+            while index < len(items) and not stop_requested.is_set():
+                item = items[index]
+
+                prefetch.join()
+                if prefetch.error is not None:
+                    raise prefetch.error
+                head, size = prefetch.data, prefetch.file_size
+
+                # остаток файла читается в буфер, пока передаётся уже прочитанное начало
+                buffer = RingBuffer(self.buffer_size)
+                feeder = StreamFeeder(self.blob_store, item.audio_id, size, buffer, len(head), self.chunk_size)
+                feeder.start()
+
+                # начало следующей композиции читается во время воспроизведения текущей
+                if index + 1 < len(items):
+                    prefetch = Prefetch(self.blob_store, items[index + 1], self.prefetch_size)
+                    prefetch.start()
+
+                self.sink.start_track(item)
+                self.events.put(('track', index, item))
+
+                self.sink.write(head)
+                position = len(head)
+                while not stop_requested.is_set() and not skip_requested.is_set():
+                    data = buffer.read(self.chunk_size)
+                    if len(data) == 0:
+                        break
+                    self.sink.write(data)
+                    position += len(data)
+                    self.events.put(('position', index, position, size))
+
+                buffer.close()
+                feeder.join()
+                if feeder.error is not None:
+                    raise feeder.error
+
+                skip_requested.clear()
+                index += 1
+        except Exception as e:
+            self.sink.close()
+            if not stop_requested.is_set():  # ошибки записи после остановки ожидаемы
+                self.events.put(('error', e))
+                return
+        else:
+            if not stop_requested.is_set():
+                self.sink.finish()
+                self.events.put(('finished',))
+                return
+
+        # композиция могла начаться уже после закрытия получателя в stop()
+        self.sink.close()
+        self.events.put(('stopped',))
@@ -0,0 +1,485 @@
+import re
+import json
+import asyncio
+import argparse
+import functools
+import traceback
+from contextlib import suppress
+from typing import NamedTuple
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.exc import NoResultFound
+
+import config
+from session import MusicSession
+
+# текстовые описания кодов ответа
+STATUS_REASONS = {
+    200: 'OK',
+    206: 'Partial Content',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Content Too Large',
+    416: 'Range Not Satisfiable',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+MAX_PAGE_SIZE = 500  # максимальный размер страницы списка
+MAX_HEADER_SIZE = 16 * 1024  # максимальный размер строки запроса и заголовков (в байтах)
+KEEP_ALIVE_TIMEOUT = 30  # время ожидания следующего запроса в открытом соединении (в секундах)
+STREAM_CHUNK_SIZE = 256 * 1024  # размер части аудиофайла при потоковой передаче
+
+# функции получения страницы списка сущностей по типу
+PAGE_METHODS = {
+    'tracks': MusicSession.get_track_listing,
+    'albums': MusicSession.get_albums_page,
+    'artists': MusicSession.get_artists_page,
+    'genres': MusicSession.get_genres_page,
+}
+
+
+class HTTPError(Exception):
+    """Ошибка обработки запроса, передаваемая клиенту с заданным кодом ответа."""
+
+    def __init__(self, status: int, message: str, headers: dict = None) -> None:
+        """Инициализация ошибки."""
+
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Request(NamedTuple):
+    """Разобранный HTTP-запрос."""
+
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]  # названия заголовков приведены к нижнему регистру
+    keep_alive: bool
+
+
+def to_dict(entity) -> dict:
+    """Представление сущности БД или строки списка в виде словаря."""
+
+    if isinstance(entity, tuple):
+        return entity._asdict()
+
+    return {column.key: getattr(entity, column.key) for column in entity.__table__.columns}
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Проверка, совпадает ли ETag с одним из перечисленных в заголовке If-None-Match."""
+
+    if header is None:
+        return False
+
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+
+    return False
+
+
+def parse_range(header: str, size: int) -> tuple[int, int]:
+    """Разбор заголовка Range для файла размером size байт.
+
+    Возвращает первый и последний байт диапазона или None, если заголовок следует
+    игнорировать (другие единицы, несколько диапазонов, синтаксическая ошибка)."""
+
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    unsatisfiable = HTTPError(416, 'Запрошенный диапазон вне файла', {'Content-Range': f'bytes */{size}'})
+
+    # последние last байт файла
+    if first == '':
+        if last == '':
+            return None
+        if int(last) == 0 or size == 0:
+            raise unsatisfiable
+        return max(0, size - int(last)), size - 1
+
+    start = int(first)
+    if last != '' and int(last) < start:
+        return None
+    if start >= size:
+        raise unsatisfiable
+
+    end = size - 1 if last == '' else min(int(last), size - 1)
+    return start, end
+
+
+class CatalogServer:
+    """HTTP-сервер каталога для веб- и мобильных клиентов.
+
+    Списки и результаты поиска отдаются постранично в формате JSON, аудиофайлы -
+    потоком с поддержкой Range, ETag и If-None-Match. Соединения обслуживаются
+    в цикле событий asyncio, а обращения к БД и хранилищу выполняются в пуле
+    потоков, размер которого не превышает пула соединений БД. Количество
+    одновременно обрабатываемых запросов и открытых соединений ограничено.
+
+    Маршруты (только GET и HEAD):
+        /tracks, /albums, /artists, /genres - ?after_id=&after_value=&limit=&sort=
+        /artists/<id>/albums - альбомы исполнителя
+        /search - ?q=&limit=
+        /tracks/<id>/audio - аудиофайл композиции"""
+
+    ROUTES = (
+        (re.compile(r'/(tracks|albums|artists|genres)'), 'list_entities'),
+        (re.compile(r'/artists/(\d+)/albums'), 'artist_albums'),
+        (re.compile(r'/search'), 'search'),
+        (re.compile(r'/tracks/(\d+)/audio'), 'stream_audio'),
+    )
+
+    def __init__(self, session: MusicSession, max_requests: int = config.SERVER_MAX_REQUESTS,
+                 max_connections: int = config.SERVER_MAX_CONNECTIONS, threads: int = config.SERVER_THREADS) -> None:
+        """Инициализация сервера; session - подготовленная сессия MusicSession."""
+
+        self.session = session
+        self.max_connections = max_connections
+        self.connections = 0
+
+        # семафор создаётся при запуске, чтобы относиться к циклу событий сервера
+        self.max_requests = max_requests
+        self.requests = None
+
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='catalog-server')
+
+    async def start(self, host: str = config.SERVER_HOST, port: int = config.SERVER_PORT) -> asyncio.Server:
+        """Запуск приёма соединений."""
+
+        self.requests = asyncio.Semaphore(self.max_requests)
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_SIZE)
+
+    async def serve_forever(self, host: str = config.SERVER_HOST, port: int = config.SERVER_PORT) -> None:
+        """Запуск сервера и обработка соединений до завершения задачи."""
+
+        server = await self.start(host, port)
+        print(f'Сервер каталога запущен: http://{host}:{port}', flush=True)
+        async with server:
+            await server.serve_forever()
+
+    async def run(self, function, *args):
+        """Выполнение блокирующей функции в пуле потоков."""
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обработка последовательных запросов одного соединения."""
+
+        if self.connections >= self.max_connections:
+            with suppress(ConnectionError):
+                await self.send_error(writer, HTTPError(503, 'Слишком много соединений'), False)
+            writer.close()
+            return
+
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HTTPError as e:
+                    await self.send_error(writer, e, False)
+                    break
+                if request is None:
+                    break
+
+                async with self.requests:
+                    keep_alive = await self.handle_request(request, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.TimeoutError):
+            pass  # клиент закрыл соединение или долго не отправлял запрос
+        finally:
+            self.connections -= 1
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def read_request(self, reader: asyncio.StreamReader) -> Request:
+        """Чтение и разбор запроса; возвращает None, если клиент закрыл соединение."""
+
+        try:
+            data = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, 'Слишком большие заголовки запроса')
+
+        lines = data.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise HTTPError(400, 'Некорректная строка запроса')
+
+        headers = {}
+        for line in lines[1:]:
+            if line == '':
+                continue
+            name, separator, value = line.partition(':')
+            if separator == '':
+                raise HTTPError(400, 'Некорректный заголовок запроса')
+            headers[name.strip().lower()] = value.strip()
+
+        # тело запроса сервером не используется, но должно быть прочитано до следующего запроса
+        if 'transfer-encoding' in headers:
+            raise HTTPError(400, 'Тело запроса не поддерживается')
+        try:
+            content_length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, 'Некорректный заголовок Content-Length')
+        if content_length > MAX_HEADER_SIZE:
+            raise HTTPError(413, 'Тело запроса не поддерживается')
+        if content_length > 0:
+            await reader.readexactly(content_length)
+
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+
+        url = urlsplit(target)
+        return Request(method, url.path.rstrip('/') or '/', parse_qs(url.query), headers, keep_alive)
+
+    async def handle_request(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        """Обработка запроса; возвращает False, если соединение нужно закрыть."""
+
+        try:
+            if request.method not in ('GET', 'HEAD'):
+                raise HTTPError(405, 'Метод не поддерживается', {'Allow': 'GET, HEAD'})
+
+            for pattern, name in self.ROUTES:
+                match = pattern.fullmatch(request.path)
+                if match is not None:
+                    handler = getattr(self, name)
+                    break
+            else:
+                raise HTTPError(404, 'Ресурс не найден')
+
+            # потоковые обработчики сами отправляют ответ, остальные возвращают данные для JSON
+            if asyncio.iscoroutinefunction(handler):
+                return await handler(request, writer, *match.groups())
+
+            data = await self.run(handler, request, *match.groups())
+            body = json.dumps(data, ensure_ascii=False, default=str).encode()
+            await self.send_response(writer, request, 200, {'Content-Type': 'application/json; charset=utf-8'},
+                                     body)
+        except HTTPError as e:
+            await self.send_error(writer, e, request.keep_alive, request.method == 'HEAD')
+        except NoResultFound:
+            await self.send_error(writer, HTTPError(404, 'Запись не найдена'), request.keep_alive,
+                                  request.method == 'HEAD')
+        except ValueError as e:  # например, недопустимый ключ сортировки
+            await self.send_error(writer, HTTPError(400, str(e)), request.keep_alive, request.method == 'HEAD')
+        except ConnectionError:
+            return False
+        except Exception:
+            traceback.print_exc()
+            await self.send_error(writer, HTTPError(500, 'Внутренняя ошибка сервера'), False)
+            return False
+
+        return request.keep_alive
+
+    async def send_response(self, writer: asyncio.StreamWriter, request: Request, status: int, headers: dict,
+                            body: bytes = b'') -> None:
+        """Отправка ответа целиком (для HEAD - без тела)."""
+
+        self.write_head(writer, status, headers, len(body), request.keep_alive)
+        if request.method != 'HEAD':
+            writer.write(body)
+        await writer.drain()
+
+    async def send_error(self, writer: asyncio.StreamWriter, error: HTTPError, keep_alive: bool,
+                         head: bool = False) -> None:
+        """Отправка ответа с описанием ошибки в формате JSON."""
+
+        body = json.dumps({'error': error.message}, ensure_ascii=False).encode()
+        headers = {'Content-Type': 'application/json; charset=utf-8', **error.headers}
+
+        self.write_head(writer, error.status, headers, len(body), keep_alive)
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+    @staticmethod
+    def write_head(writer: asyncio.StreamWriter, status: int, headers: dict, content_length: int,
+                   keep_alive: bool) -> None:
+        """Запись строки состояния и заголовков ответа (у ответа 304 нет тела и его длины)."""
+
+        lines = [
+            f'HTTP/1.1 {status} {STATUS_REASONS[status]}',
+            f'Date: {formatdate(usegmt=True)}',
+            'Server: FreeMusic',
+            f'Connection: {"keep-alive" if keep_alive else "close"}',
+        ]
+        if status != 304:
+            lines.append(f'Content-Length: {content_length}')
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+    @staticmethod
+    def query_param(request: Request, name: str, default: str = None) -> str:
+        """Получение параметра строки запроса."""
+
+        values = request.query.get(name)
+        return values[0] if values else default
+
+    def int_param(self, request: Request, name: str, default: int = None, minimum: int = 0,
+                  maximum: int = None) -> int:
+        """Получение целочисленного параметра строки запроса (значения больше maximum уменьшаются до него)."""
+
+        value = self.query_param(request, name)
+        if value is None:
+            return default
+
+        try:
+            value = int(value)
+        except ValueError:
+            raise HTTPError(400, f'Некорректное значение параметра {name}')
+        if value < minimum:
+            raise HTTPError(400, f'Некорректное значение параметра {name}')
+
+        return min(value, maximum) if maximum is not None else value
+
+    def list_entities(self, request: Request, kind: str) -> dict:
+        """Страница списка сущностей.
+
+        next_after_id и (при сортировке) next_after_value - курсор следующей страницы,
+        передаваемый в параметрах after_id и after_value (None на последней странице;
+        при значении null параметр after_value не передаётся)."""
+
+        limit = self.int_param(request, 'limit', MusicSession.PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        sort_key = self.query_param(request, 'sort')
+        page = PAGE_METHODS[kind](self.session, after_id=self.int_param(request, 'after_id'), limit=limit,
+                                  sort_key=sort_key, after_value=self.query_param(request, 'after_value'))
+
+        result = {
+            'items': [to_dict(entity) for entity in page],
+            'next_after_id': page[-1].id if len(page) == limit else None
+        }
+        if sort_key is not None:
+            result['next_after_value'] = getattr(page[-1], sort_key) if len(page) == limit else None
+        return result
+
+    def artist_albums(self, request: Request, artist_id: str) -> dict:
+        """Альбомы исполнителя."""
+
+        return {'items': [to_dict(album) for album in self.session.get_albums(int(artist_id))]}
+
+    def search(self, request: Request) -> dict:
+        """Полнотекстовый поиск по каталогу."""
+
+        query = self.query_param(request, 'q')
+        if query is None:
+            raise HTTPError(400, 'Не указан параметр q')
+
+        limit = self.int_param(request, 'limit', 50, 1, MAX_PAGE_SIZE)
+        return {'items': [result._asdict() for result in self.session.search(query, limit)]}
+
+    async def stream_audio(self, request: Request, writer: asyncio.StreamWriter, track_id: str) -> bool:
+        """Потоковая передача аудиофайла композиции (целиком или диапазона байт).
+
+        ETag - SHA-256 содержимого файла: ID композиции может быть выдан новой
+        композиции после удаления, поэтому клиент должен перепроверять файл.
+        У файлов, сохранённых до подсчёта SHA-256, ETag составляется из ID и размера файла."""
+
+        audio_id = await self.run(self.session.get_track_audio_id, int(track_id))
+        if audio_id is None:
+            raise HTTPError(404, 'Композиция не найдена')
+
+        blob_stat = await self.run(self.session.blob_store.stat, audio_id)
+        if blob_stat is None:
+            raise HTTPError(404, 'Аудиофайл не найден')
+
+        if blob_stat.sha256 is not None:
+            etag = f'"{blob_stat.sha256}"'
+        else:
+            etag = f'"{blob_stat.id}-{blob_stat.size}"'
+        headers = {'ETag': etag, 'Accept-Ranges': 'bytes', 'Cache-Control': 'no-cache'}
+
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            await self.send_response(writer, request, 304, headers)
+            return request.keep_alive
+
+        # диапазон учитывается, только если у клиента та же версия файла (If-Range)
+        byte_range = None
+        if 'range' in request.headers and request.headers.get('if-range', etag) == etag:
+            byte_range = parse_range(request.headers['range'], blob_stat.size)
+
+        if byte_range is None:
+            status, (start, end) = 200, (0, blob_stat.size - 1)
+        else:
+            status, (start, end) = 206, byte_range
+            headers['Content-Range'] = f'bytes {start}-{end}/{blob_stat.size}'
+        headers['Content-Type'] = 'audio/mpeg'
+
+        self.write_head(writer, status, headers, end - start + 1, request.keep_alive)
+        if request.method == 'HEAD':
+            await writer.drain()
+            return request.keep_alive
+
+        # после отправки заголовков об ошибке можно сообщить только закрытием соединения
+        try:
+            position = start
+            while position <= end:
+                chunk = await self.run(self.session.blob_store.open_range, audio_id, position,
+                                       min(STREAM_CHUNK_SIZE, end + 1 - position))
+                if len(chunk) == 0:  # файл короче указанного в сведениях о нём размера
+                    return False
+                writer.write(chunk)
+                await writer.drain()
+                position += len(chunk)
+        except ConnectionError:
+            return False
+        except Exception:
+            traceback.print_exc()
+            return False
+
+        return request.keep_alive
+
+    def close(self) -> None:
+        """Завершение потоков обработки запросов."""
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP-сервер каталога Free Music')
+    parser.add_argument('--host', default=config.SERVER_HOST, help='адрес для приёма соединений')
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT, help='порт')
+    args = parser.parse_args()
+
+    session = MusicSession()
+
+    # изменения каталога, сохранённые другими клиентами общей БД, очищают кэш сессии
+    watcher = None
+    if config.CHANGE_POLL_INTERVAL > 0:
+        watcher = session.start_change_watcher()
+
+    server = CatalogServer(session)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if watcher is not None:
+            watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
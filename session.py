@@ -1,35 +1,140 @@
-import sqlite3
-from typing import Sequence
-from datetime import date
-
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session
-import bcrypt
-from pymongo import MongoClient
-from bson.objectid import ObjectId
-from gridfs import GridFS, GridOut
-
-from db import Base, User, Track, Album, Artist, Genre
+import re
+import threading
+import traceback
+from typing import Sequence, NamedTuple, BinaryIO, Callable
+from datetime import date, datetime
+
+from sqlalchemy import select, insert, update, delete, text, func, and_, or_, Select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.exc import IntegrityError
+
+import config
+from db import Base, User, Track, Album, Artist, Genre, track_to_genre, create_database_engine
+import migrations
+import passwords
+import instrumentation
+from cache import CatalogCache
+from upload import AudioUpload
+from blob_store import BlobStore, CachedBlobStore, create_blob_store
+from mp3 import read_mp3_info
+from fsck import ConsistencyChecker, GarbageCollector
+from changes import ChangeEvent, ChangeWatcher
+
+
+class TrackRow(NamedTuple):
+    """Строка списка композиций."""
+
+    id: int
+    name: str
+    album_name: str
+    artist_name: str
+    genre_names: tuple[str, ...]
+    filename: str
+    audio_id: str
+    size: int
+
+
+class SearchResult(NamedTuple):
+    """Результат поиска по каталогу."""
+
+    kind: str  # 'track', 'album', 'artist' или 'genre'
+    id: int
+    name: str
+    description: str
 
 
 class MusicSession:
     """Класс сессии работы с приложением."""
 
-    def __init__(self) -> None:
-        """Инициализация сессии."""
+    PAGE_SIZE = 100  # размер страницы при постраничном получении списков
+
+    def __init__(self, database_url: str = config.DATABASE_URL, blob_store: BlobStore = None,
+                 prepare: bool = True, engine_profile: str = config.ENGINE_PROFILE) -> None:
+        """Инициализация сессии.
+
+        Если хранилище аудиофайлов не передано, оно создаётся согласно настройкам.
+        При prepare=False подготовка БД и хранилища откладывается до вызова prepare()
+        или prepare_in_background(). engine_profile - профиль настройки подключения
+        к БД (см. db.ENGINE_PROFILES)."""
 
-        self.engine = create_engine('sqlite:///music.db', echo=True)
+        # create_engine не открывает соединение с БД
+        self.engine = create_database_engine(database_url, engine_profile, config.SQL_ECHO)
 
-        Base.metadata.create_all(self.engine)
+        self.blob_store = blob_store
 
-        mongo_client = MongoClient()
-        mongo_db = mongo_client['music_db']
-        self.grid_fs = GridFS(mongo_db)
+        self.ready = threading.Event()
+        self.prepare_error = None
+
+        # кэш каталога, очищаемый при добавлении и удалении сущностей
+        self.cache = CatalogCache()
 
         self.user = None
 
+        # подписчики на изменения каталога
+        self.listeners = []
+        self.change_watcher = None
+
+        if instrumentation.enabled():
+            instrumentation.instrument_session(self)
+
+        if prepare:
+            self.prepare()
+
+    def prepare(self, connect_blob_store: bool = True) -> None:
+        """Создание и обновление схемы БД и подключение к хранилищу аудиофайлов.
+
+        При connect_blob_store=False хранилище не подключается: так быстрее выполняются
+        операции, не затрагивающие аудиофайлы (например, служебные команды cli.py)."""
+
+        try:
+            Base.metadata.create_all(self.engine)
+            migrations.upgrade(self.engine)
+
+            if self.blob_store is None and connect_blob_store:
+                self.blob_store = create_blob_store()
+
+            if instrumentation.enabled() and self.blob_store is not None:
+                instrumentation.instrument_methods(self.blob_store, 'blob_store', interface=BlobStore)
+        except Exception as e:
+            self.prepare_error = e
+            raise
+        finally:
+            self.ready.set()
+
+    def prepare_in_background(self) -> threading.Thread:
+        """Запуск подготовки сессии в фоновом потоке."""
+
+        thread = threading.Thread(target=self._prepare_quietly, daemon=True)
+        thread.start()
+
+        return thread
+
+    def _prepare_quietly(self) -> None:
+        """Подготовка сессии с сохранением ошибки вместо её выбрасывания."""
+
+        try:
+            self.prepare()
+        except Exception:
+            pass  # ошибка сохранена в prepare_error и будет выброшена в wait_until_ready
+
+    def wait_until_ready(self) -> None:
+        """Ожидание завершения подготовки сессии."""
+
+        self.ready.wait()
+        if self.prepare_error is not None:
+            raise self.prepare_error
+
     def login(self, login: str, password: str) -> (bool, str):
-        """Вход в аккаунт."""
+        """Вход в аккаунт.
+
+        Проверка пароля занимает заметное время, поэтому в интерфейсе метод вызывается
+        в фоновом потоке. Если стоимость хеша пароля отличается от заданной в настройках,
+        хеш пересчитывается."""
+
+        try:
+            self.wait_until_ready()
+        except Exception as e:
+            return False, e
 
         # запрос пользователя по логину
         with Session(self.engine) as session:
@@ -42,10 +147,22 @@ class MusicSession:
 
         user = users[0]
 
-        # проверка совпадения пароля
-        if not bcrypt.checkpw(password.encode(), user.password_hash.encode()):
+        # проверка совпадения пароля (без открытого соединения с БД)
+        if not passwords.check_password(password, user.password_hash):
             return False, 'Неверный пароль'
 
+        # пересчёт хеша после изменения стоимости хеширования
+        if passwords.needs_rehash(user.password_hash):
+            password_hash = passwords.hash_password(password)
+            with Session(self.engine) as session:
+                try:
+                    session.execute(update(User).where(User.id == user.id).values(password_hash=password_hash))
+                    session.commit()
+                except Exception:
+                    session.rollback()  # вход возможен и со старым хешем
+                else:
+                    user = session.scalars(select(User).where(User.id == user.id)).one()
+
         # успешная попытка входа
         # сохранение данных о текущем пользователе
         self.user = user
@@ -54,8 +171,13 @@ class MusicSession:
     def sign_up(self, login: str, password: str, username: str, bio: str) -> (bool, str):
         """Создание нового аккаунта."""
 
+        try:
+            self.wait_until_ready()
+        except Exception as e:
+            return False, e
+
         # хеширование пароля
-        password_hash_and_salt = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        password_hash_and_salt = passwords.hash_password(password)
 
         # создание экземпляра класса пользователя
         user = User(
@@ -70,7 +192,7 @@ class MusicSession:
             try:
                 session.add(user)
                 session.commit()
-            except sqlite3.IntegrityError:
+            except IntegrityError:
                 session.rollback()
                 return False, 'Пользователь с данным логином уже существует'
             else:
@@ -86,7 +208,7 @@ class MusicSession:
                 user = session.query(User).get(self.user.id)
                 if password is not None:
                     # хеширование пароля
-                    password_hash_and_salt = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+                    password_hash_and_salt = passwords.hash_password(password)
                     user.password_hash = password_hash_and_salt
                 if username is not None:
                     user.username = username
@@ -105,50 +227,300 @@ class MusicSession:
 
         self.user = None
 
+    def get_all_users(self) -> Sequence[User]:
+        """Получение списка из всех пользователей."""
+
+        with Session(self.engine) as session:
+            statement = select(User).order_by(User.id)
+            users = session.scalars(statement).all()
+
+        return users
+
+    def set_admin(self, login: str, is_admin: bool) -> (bool, str):
+        """Назначение пользователя администратором или снятие с него этих прав."""
+
+        if self.user is None or not self.user.is_admin:
+            return False, 'Отказано в доступе'
+
+        # попытка изменения прав пользователя
+        with Session(self.engine) as session:
+            try:
+                user = session.scalars(select(User).where(User.login == login)).one_or_none()
+                if user is None:
+                    return False, 'Неверный логин'
+                user.is_admin = is_admin
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                return False, e
+            else:
+                return True, 'Успех'
+
+    def reset_password(self, login: str, password: str) -> (bool, str):
+        """Установка нового пароля пользователя администратором."""
+
+        if self.user is None or not self.user.is_admin:
+            return False, 'Отказано в доступе'
+
+        # хеширование пароля
+        password_hash_and_salt = passwords.hash_password(password)
+
+        # попытка изменения пароля
+        with Session(self.engine) as session:
+            try:
+                user = session.scalars(select(User).where(User.login == login)).one_or_none()
+                if user is None:
+                    return False, 'Неверный логин'
+                user.password_hash = password_hash_and_salt
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                return False, e
+            else:
+                return True, 'Успех'
+
+    def delete_user(self, login: str) -> (bool, str):
+        """Удаление пользователя по логину."""
+
+        if self.user is None or not self.user.is_admin:
+            return False, 'Отказано в доступе'
+
+        # попытка удаления пользователя
+        with Session(self.engine) as session:
+            try:
+                result = session.execute(delete(User).where(User.login == login))
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                return False, e
+            else:
+                if result.rowcount == 0:
+                    return False, 'Неверный логин'
+                return True, 'Успех'
+
+    def subscribe(self, listener: Callable[[ChangeEvent], None]) -> None:
+        """Подписка на изменения каталога.
+
+        Подписчик вызывается после фиксации транзакции в потоке, выполнившем изменение
+        (при удалении также сообщается о каскадно удалённых записях), а об изменениях,
+        сохранённых другими клиентами общей БД, - в потоке ChangeWatcher."""
+
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[ChangeEvent], None]) -> None:
+        """Отмена подписки на изменения каталога."""
+
+        self.listeners.remove(listener)
+
+    def notify(self, entity_type: str, op: str, ids: Sequence[int], local: bool = True) -> None:
+        """Оповещение подписчиков об изменении каталога.
+
+        Об изменениях, сохранённых самой сессией (local=True), сообщается также
+        ChangeWatcher, чтобы он не передал их повторно как изменения других клиентов."""
+
+        if len(ids) == 0:
+            return
+
+        change = ChangeEvent(entity_type, op, tuple(ids))
+        if local and self.change_watcher is not None:
+            self.change_watcher.add_local_change(change)
+        for listener in list(self.listeners):
+            listener(change)
+
+    def start_change_watcher(self, interval: float = config.CHANGE_POLL_INTERVAL) -> ChangeWatcher:
+        """Запуск отслеживания изменений каталога, сохранённых другими клиентами общей БД."""
+
+        watcher = ChangeWatcher(self, interval, config.TOMBSTONE_RETENTION)
+        self.change_watcher = watcher
+        watcher.start()
+        return watcher
+
     def add_track(self, name: str, audio_file_path: str, album_id: int, genre_ids: tuple[int]) -> (bool, str):
         """Добавление композиции."""
 
         if self.user is None or not self.user.is_admin:
             return False, 'Отказано в доступе'
 
-        # сохранение аудиофайла в MongoDB GridFS
-        audio_id = self.save_audio_file(audio_file_path)
+        # сохранение аудиофайла в хранилище в текущем потоке
+        upload = AudioUpload(self.blob_store, audio_file_path)
+        upload.run()
+        if upload.error is not None:
+            return False, upload.error
+
+        return self.create_track_from_upload(name, upload, album_id, genre_ids)
+
+    def create_track_from_upload(self, name: str, upload: AudioUpload, album_id: int,
+                                 genre_ids: tuple[int]) -> (bool, str):
+        """Добавление композиции с аудиофайлом завершённой загрузки и сведениями о нём."""
+
+        return self.create_track(name, upload.audio_id, album_id, genre_ids, upload.audio_metadata)
+
+    def create_track(self, name: str, audio_id: str, album_id: int, genre_ids: tuple[int],
+                     audio_metadata: dict = None) -> (bool, str):
+        """Добавление композиции с уже сохранённым аудиофайлом.
+
+        Ссылка на аудиофайл передаётся композиции: если композицию добавить не удалось
+        (в том числе при отказе в доступе), ссылка освобождается.
+        audio_metadata - сведения об аудиофайле (filename, size, content_hash, duration, bitrate)."""
+
+        if self.user is None or not self.user.is_admin:
+            self.release_audio_file(audio_id)
+            return False, 'Отказано в доступе'
 
         # создание экземпляра класса композиции
         track = Track(
             name=name,
             audio_id=audio_id,
-            album_id=album_id
+            album_id=album_id,
+            **(audio_metadata or {})
         )
 
-        for genre_id in genre_ids:
-            track.genres.append(self.get_genre(genre_id))
-
         # попытка добавления композиции
         with Session(self.engine) as session:
             try:
+                # жанры загружаются одним запросом в той же сессии
+                if len(genre_ids) != 0:
+                    track.genres = list(session.scalars(select(Genre).where(Genre.id.in_(genre_ids))))
                 session.add(track)
                 session.commit()
             except Exception as e:
                 session.rollback()
+                self.release_audio_file(audio_id)  # освобождение уже сохранённого аудиофайла
                 return False, e
             else:
+                self.cache.invalidate('track')
+                self.notify('track', 'insert', [track.id])
                 return True, 'Успех'
 
+    def start_audio_upload(self, audio_file_path: str) -> AudioUpload:
+        """Запуск фоновой загрузки аудиофайла в хранилище."""
+
+        upload = AudioUpload(self.blob_store, audio_file_path)
+        upload.start()
+
+        return upload
+
     def save_audio_file(self, audio_file_path: str) -> str:
-        """Сохранение аудиофайла и возвращение его _id в MongoDB."""
+        """Сохранение аудиофайла и возвращение его ID в хранилище."""
+
+        # загрузка выполняется в текущем потоке
+        upload = AudioUpload(self.blob_store, audio_file_path)
+        upload.run()
+
+        if upload.error is not None:
+            raise upload.error
+
+        return upload.audio_id
+
+    def release_audio_file(self, audio_file_id: str) -> None:
+        """Освобождение ссылки на аудиофайл; файл удаляется, когда ссылок не остаётся.
+
+        Ошибка хранилища не передаётся вызывающему: запись в БД уже изменена, а файл,
+        на который не ссылается ни одна композиция, удалит сборщик потерянных файлов."""
+
+        if audio_file_id is None:
+            return
+
+        try:
+            self.blob_store.release(audio_file_id)
+        except Exception:
+            traceback.print_exc()
+
+    def release_audio_files(self, audio_file_ids: Sequence[str]) -> None:
+        """Освобождение ссылок на аудиофайлы удалённых композиций одним пакетом.
+
+        Ошибки хранилища обрабатываются так же, как в release_audio_file."""
+
+        if len(audio_file_ids) == 0:
+            return
+
+        try:
+            self.blob_store.release_many(audio_file_ids)
+        except Exception:
+            traceback.print_exc()
 
-        filename = audio_file_path.split('/')[-1]
+    def backfill_audio_metadata(self, batch_size: int = 100) -> int:
+        """Заполнение сведений об аудиофайлах у композиций, добавленных до их появления в таблице.
 
-        with open(audio_file_path, 'rb') as audio_file:
-            audio_file_id = self.grid_fs.put(audio_file, filename=filename)
+        Возвращает количество обновлённых композиций."""
 
-        return str(audio_file_id)
+        updated = 0
+        after_id = None
 
-    def get_audio_file(self, audio_file_id: str) -> GridOut:
-        """Получение аудиофайла по его _id в MongoDB."""
+        while True:
+            with Session(self.engine) as session:
+                statement = (
+                    select(Track)
+                    .where(Track.filename.is_(None), Track.audio_id.is_not(None))
+                    .order_by(Track.id)
+                    .limit(batch_size)
+                )
+                if after_id is not None:
+                    statement = statement.where(Track.id > after_id)
+                tracks = session.scalars(statement).all()
 
-        return self.grid_fs.get(ObjectId(audio_file_id))
+                if len(tracks) == 0:
+                    break
+
+                audio_stats = self.blob_store.stat_many([t.audio_id for t in tracks])
+                for track in tracks:
+                    audio_stat = audio_stats.get(track.audio_id)
+                    if audio_stat is None:
+                        continue
+
+                    # из хранилища читаются только заголовки MP3
+                    with self.blob_store.get(track.audio_id) as audio_file:
+                        mp3_info = read_mp3_info(audio_file, audio_stat.size)
+
+                    track.filename = audio_stat.filename
+                    track.size = audio_stat.size
+                    track.content_hash = audio_stat.sha256
+                    if mp3_info is not None:
+                        track.duration = mp3_info.duration
+                        track.bitrate = mp3_info.bitrate
+                    updated += 1
+
+                after_id = tracks[-1].id
+                session.commit()
+
+        self.cache.invalidate('track')
+        return updated
+
+    def get_dedup_report(self) -> dict:
+        """Получение статистики дедупликации аудиофайлов."""
+
+        return self.blob_store.dedup_report()
+
+    def check_consistency(self, delete_orphans: bool = False, grace_period: float = config.GC_GRACE_PERIOD,
+                          batch_size: int = 1000) -> dict:
+        """Проверка согласованности композиций и хранилища аудиофайлов.
+
+        При delete_orphans потерянные файлы старше grace_period секунд удаляются.
+        Возвращает отчёт о проверке."""
+
+        checker = ConsistencyChecker(self.engine, self.blob_store, batch_size, grace_period, delete_orphans)
+        return checker.run()
+
+    def start_garbage_collector(self, pass_interval: float = config.GC_INTERVAL,
+                                grace_period: float = config.GC_GRACE_PERIOD) -> GarbageCollector:
+        """Запуск фонового удаления потерянных аудиофайлов."""
+
+        collector = GarbageCollector(self, grace_period=grace_period, pass_interval=pass_interval)
+        collector.start()
+        return collector
+
+    def get_audio_cache_stats(self) -> dict:
+        """Получение статистики локального дискового кэша аудиофайлов (None, если кэш не используется)."""
+
+        if not isinstance(self.blob_store, CachedBlobStore):
+            return None
+
+        return self.blob_store.cache.stats()
+
+    def get_audio_file(self, audio_file_id: str) -> BinaryIO:
+        """Получение аудиофайла по его ID в хранилище."""
+
+        return self.blob_store.get(audio_file_id)
 
     def get_all_tracks(self) -> Sequence[Track]:
         """Получение списка из всех композиций."""
@@ -159,23 +531,138 @@ class MusicSession:
 
         return tracks
 
+    def get_tracks_page(self, after_id: int = None, limit: int = PAGE_SIZE,
+                        sort_key: str = None, after_value=None) -> Sequence[Track]:
+        """Получение страницы списка композиций после композиции с ID after_id
+        (after_value - значение столбца sort_key у этой записи, см. _page_statement)."""
+
+        tracks = self.cache.get('track', ('page', after_id, limit, sort_key, after_value))
+        if tracks is not None:
+            return tracks
+
+        with Session(self.engine) as session:
+            statement = self._page_statement(Track, after_id, limit, sort_key, after_value)
+            tracks = session.scalars(statement).all()
+
+        self.cache.put('track', ('page', after_id, limit, sort_key, after_value), tracks)
+        return tracks
+
+    def get_track_listing(self, after_id: int = None, limit: int = None,
+                          sort_key: str = None, after_value=None) -> list[TrackRow]:
+        """Получение списка композиций вместе с альбомом, исполнителем, жанрами и именем файла.
+
+        При указании limit возвращается страница списка после композиции с ID after_id
+        (after_value - значение столбца sort_key у этой записи, см. _page_statement).
+        Сортировка возможна только по полям TrackRow: из них берётся курсор следующей страницы."""
+
+        if sort_key is not None and sort_key not in TrackRow._fields:
+            raise ValueError(f'Недопустимый ключ сортировки: {sort_key}')
+
+        rows = self.cache.get('track', ('listing', after_id, limit, sort_key, after_value))
+        if rows is not None:
+            return rows
+
+        rows = self._track_rows(self._page_statement(Track, after_id, limit, sort_key, after_value))
+
+        self.cache.put('track', ('listing', after_id, limit, sort_key, after_value), rows)
+        return rows
+
+    def get_track_rows(self, track_ids: Sequence[int]) -> list[TrackRow]:
+        """Получение строк списка композиций с заданными ID (в порядке возрастания ID)."""
+
+        return self._track_rows(select(Track).where(Track.id.in_(track_ids)).order_by(Track.id))
+
+    def get_track_audio_id(self, track_id: int) -> str:
+        """Получение ID аудиофайла композиции (None, если нет композиции или её аудиофайла).
+
+        Запрашивается только столбец audio_id по первичному ключу: метод вызывается
+        сервером для каждого запроса диапазона байт аудиофайла."""
+
+        audio_id = self.cache.get('track', ('audio_id', track_id))
+        if audio_id is not None:
+            return audio_id
+
+        with Session(self.engine) as session:
+            audio_id = session.scalar(select(Track.audio_id).where(Track.id == track_id))
+
+        if audio_id is not None:
+            self.cache.put('track', ('audio_id', track_id), audio_id)
+        return audio_id
+
+    def _track_rows(self, statement: Select) -> list[TrackRow]:
+        """Выполнение запроса композиций и построение строк списка."""
+
+        # альбомы и исполнители подгружаются через JOIN, жанры - одним дополнительным запросом,
+        # поэтому число запросов не зависит от количества композиций
+        with Session(self.engine) as session:
+            statement = statement.options(
+                joinedload(Track.album).joinedload(Album.artist),
+                selectinload(Track.genres)
+            )
+            tracks = session.scalars(statement).unique().all()
+
+        return [
+            TrackRow(
+                id=track.id,
+                name=track.name,
+                album_name=track.album.name,
+                artist_name=track.album.artist.name,
+                genre_names=tuple(g.name for g in track.genres),
+                filename=track.filename,
+                audio_id=track.audio_id,
+                size=track.size
+            )
+            for track in tracks
+        ]
+
     def delete_track(self, track_id: int) -> (bool, str):
         """Удаление композиции по ID."""
 
+        return self.delete_tracks([track_id])
+
+    def delete_tracks(self, track_ids: Sequence[int]) -> (bool, str):
+        """Удаление нескольких композиций в одной транзакции."""
+
         if self.user is None or not self.user.is_admin:
             return False, 'Отказано в доступе'
 
-        # попытка удаления композиции
+        # попытка удаления композиций (связи с жанрами удаляются каскадно средствами БД)
         with Session(self.engine) as session:
             try:
-                track = session.query(Track).filter(Track.id == track_id).first()
-                self.grid_fs.delete(track.audio_id)  # удаление аудиофайла из MongoDB
-                session.delete(track)
+                tracks = session.execute(select(Track.id, Track.audio_id).where(Track.id.in_(track_ids))).all()
+                session.execute(delete(Track).where(Track.id.in_(track_ids)))
                 session.commit()
             except Exception as e:
                 session.rollback()
                 return False, e
             else:
+                self.cache.invalidate('track')
+                self.notify('track', 'delete', [track_id for track_id, _ in tracks])
+                # освобождение ссылок на аудиофайлы после удаления композиций
+                self.release_audio_files([audio_id for _, audio_id in tracks if audio_id is not None])
+                return True, 'Успех'
+
+    def add_genres_to_tracks(self, track_ids: Sequence[int], genre_ids: Sequence[int]) -> (bool, str):
+        """Добавление жанров нескольким композициям в одной транзакции (имеющиеся связи сохраняются)."""
+
+        if self.user is None or not self.user.is_admin:
+            return False, 'Отказано в доступе'
+
+        rows = [{'track_id': track_id, 'genre_id': genre_id} for track_id in track_ids for genre_id in genre_ids]
+        if len(rows) == 0:
+            return True, 'Успех'
+
+        # попытка добавления связей одним пакетным запросом; уже существующие связи пропускаются
+        with Session(self.engine) as session:
+            try:
+                session.execute(insert(track_to_genre).prefix_with('OR IGNORE', dialect='sqlite'), rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                return False, e
+            else:
+                self.cache.invalidate('track')
+                self.notify('track', 'update', track_ids)
                 return True, 'Успех'
 
     def add_album(self, name: str, release_date: date, artist_id: int) -> (bool, str):
@@ -200,51 +687,109 @@ class MusicSession:
                 session.rollback()
                 return False, e
             else:
+                self.cache.invalidate('album')
+                self.notify('album', 'insert', [album.id])
                 return True, 'Успех'
 
     def get_all_albums(self) -> Sequence[Album]:
         """Получение списка из всех альбомов."""
 
+        albums = self.cache.get('album', 'all')
+        if albums is not None:
+            return albums
+
+        with Session(self.engine) as session:
+            statement = select(Album).options(joinedload(Album.artist))
+            albums = session.scalars(statement).all()
+
+        self.cache.put('album', 'all', albums)
+        self.cache.put_entities('album', albums)
+        return albums
+
+    def get_albums_page(self, after_id: int = None, limit: int = PAGE_SIZE,
+                        sort_key: str = None, after_value=None) -> Sequence[Album]:
+        """Получение страницы списка альбомов после альбома с ID after_id
+        (after_value - значение столбца sort_key у этой записи, см. _page_statement)."""
+
+        albums = self.cache.get('album', ('page', after_id, limit, sort_key, after_value))
+        if albums is not None:
+            return albums
+
         with Session(self.engine) as session:
-            statement = select(Album)
+            statement = self._page_statement(Album, after_id, limit, sort_key, after_value).options(joinedload(Album.artist))
             albums = session.scalars(statement).all()
 
+        self.cache.put('album', ('page', after_id, limit, sort_key, after_value), albums)
+        self.cache.put_entities('album', albums)
         return albums
 
+    def get_album_rows(self, album_ids: Sequence[int]) -> Sequence[Album]:
+        """Получение альбомов с заданными ID вместе с исполнителями (в порядке возрастания ID)."""
+
+        with Session(self.engine) as session:
+            statement = select(Album).where(Album.id.in_(album_ids)).order_by(Album.id)
+            return session.scalars(statement.options(joinedload(Album.artist))).all()
+
     def get_albums(self, artist_id: int) -> Sequence[Album]:
         """Получение списка из альбомов исполнителя по его ID."""
 
+        albums = self.cache.get('album', ('artist', artist_id))
+        if albums is not None:
+            return albums
+
         with Session(self.engine) as session:
             statement = select(Artist).where(Artist.id == artist_id)
             albums = session.scalars(statement).one().albums
 
+        self.cache.put('album', ('artist', artist_id), albums)
+        self.cache.put_entities('album', albums)
         return albums
 
     def get_album(self, album_id: int) -> Album:
         """Получение альбома по ID."""
 
+        album = self.cache.get_entity('album', album_id)
+        if album is not None:
+            return album
+
         with Session(self.engine) as session:
             statement = select(Album).where(Album.id == album_id)
             album = session.scalars(statement).one()
 
+        self.cache.put_entities('album', [album])
         return album
 
     def delete_album(self, album_id: int) -> (bool, str):
-        """Удаление альбома по ID."""
+        """Удаление альбома по ID вместе с его композициями."""
+
+        return self.delete_albums([album_id])
+
+    def delete_albums(self, album_ids: Sequence[int]) -> (bool, str):
+        """Удаление нескольких альбомов вместе с их композициями в одной транзакции."""
 
         if self.user is None or not self.user.is_admin:
             return False, 'Отказано в доступе'
 
-        # попытка удаления альбома
+        # попытка удаления альбомов: композиции удаляются каскадно средствами БД,
+        # поэтому их ID и ID их аудиофайлов запрашиваются заранее одним запросом
         with Session(self.engine) as session:
             try:
-                album = session.query(Album).filter(Album.id == album_id).first()
-                session.delete(album)
+                tracks = session.execute(
+                    select(Track.id, Track.audio_id).where(Track.album_id.in_(album_ids))
+                ).all()
+                deleted_album_ids = session.scalars(
+                    delete(Album).where(Album.id.in_(album_ids)).returning(Album.id)
+                ).all()
                 session.commit()
             except Exception as e:
                 session.rollback()
                 return False, e
             else:
+                self.cache.invalidate('album')
+                self.notify('track', 'delete', [track_id for track_id, _ in tracks])
+                self.notify('album', 'delete', deleted_album_ids)
+                # освобождение ссылок на аудиофайлы после удаления композиций
+                self.release_audio_files([audio_id for _, audio_id in tracks if audio_id is not None])
                 return True, 'Успех'
 
     def add_artist(self, name: str, description: str) -> (bool, str):
@@ -268,42 +813,95 @@ class MusicSession:
                 session.rollback()
                 return False, e
             else:
+                self.cache.invalidate('artist')
+                self.notify('artist', 'insert', [artist.id])
                 return True, 'Успех'
 
     def get_all_artists(self) -> Sequence[Artist]:
         """Получение списка из всех исполнителей."""
 
+        artists = self.cache.get('artist', 'all')
+        if artists is not None:
+            return artists
+
         with Session(self.engine) as session:
             statement = select(Artist)
             artists = session.scalars(statement).all()
 
+        self.cache.put('artist', 'all', artists)
+        self.cache.put_entities('artist', artists)
         return artists
 
+    def get_artists_page(self, after_id: int = None, limit: int = PAGE_SIZE,
+                         sort_key: str = None, after_value=None) -> Sequence[Artist]:
+        """Получение страницы списка исполнителей после исполнителя с ID after_id
+        (after_value - значение столбца sort_key у этой записи, см. _page_statement)."""
+
+        artists = self.cache.get('artist', ('page', after_id, limit, sort_key, after_value))
+        if artists is not None:
+            return artists
+
+        with Session(self.engine) as session:
+            statement = self._page_statement(Artist, after_id, limit, sort_key, after_value)
+            artists = session.scalars(statement).all()
+
+        self.cache.put('artist', ('page', after_id, limit, sort_key, after_value), artists)
+        self.cache.put_entities('artist', artists)
+        return artists
+
+    def get_artist_rows(self, artist_ids: Sequence[int]) -> Sequence[Artist]:
+        """Получение исполнителей с заданными ID (в порядке возрастания ID)."""
+
+        with Session(self.engine) as session:
+            return session.scalars(select(Artist).where(Artist.id.in_(artist_ids)).order_by(Artist.id)).all()
+
     def get_artist(self, artist_id: int) -> Artist:
         """Получение исполнителя по ID."""
 
+        artist = self.cache.get_entity('artist', artist_id)
+        if artist is not None:
+            return artist
+
         with Session(self.engine) as session:
             statement = select(Artist).where(Artist.id == artist_id)
             artist = session.scalars(statement).one()
 
+        self.cache.put_entities('artist', [artist])
         return artist
 
     def delete_artist(self, artist_id: int) -> (bool, str):
-        """Удаление исполнителя по ID."""
+        """Удаление исполнителя по ID вместе с его альбомами и композициями."""
+
+        return self.delete_artists([artist_id])
+
+    def delete_artists(self, artist_ids: Sequence[int]) -> (bool, str):
+        """Удаление нескольких исполнителей вместе с их альбомами и композициями в одной транзакции."""
 
         if self.user is None or not self.user.is_admin:
             return False, 'Отказано в доступе'
 
-        # попытка удаления исполнителя
+        # попытка удаления исполнителей: альбомы и композиции удаляются каскадно средствами БД,
+        # поэтому ID альбомов, композиций и их аудиофайлов запрашиваются заранее
         with Session(self.engine) as session:
             try:
-                artist = session.query(Artist).filter(Artist.id == artist_id).first()
-                session.delete(artist)
+                album_ids = session.scalars(select(Album.id).where(Album.artist_id.in_(artist_ids))).all()
+                tracks = session.execute(
+                    select(Track.id, Track.audio_id).where(Track.album_id.in_(album_ids))
+                ).all()
+                deleted_artist_ids = session.scalars(
+                    delete(Artist).where(Artist.id.in_(artist_ids)).returning(Artist.id)
+                ).all()
                 session.commit()
             except Exception as e:
                 session.rollback()
                 return False, e
             else:
+                self.cache.invalidate('artist')
+                self.notify('track', 'delete', [track_id for track_id, _ in tracks])
+                self.notify('album', 'delete', album_ids)
+                self.notify('artist', 'delete', deleted_artist_ids)
+                # освобождение ссылок на аудиофайлы после удаления композиций
+                self.release_audio_files([audio_id for _, audio_id in tracks if audio_id is not None])
                 return True, 'Успех'
 
     def add_genre(self, name: str) -> (bool, str):
@@ -324,17 +922,48 @@ class MusicSession:
                 session.rollback()
                 return False, e
             else:
+                self.cache.invalidate('genre')
+                self.notify('genre', 'insert', [genre.id])
                 return True, 'Успех'
 
     def get_all_genres(self) -> Sequence[Genre]:
         """Получение списка из всех жанров."""
 
+        genres = self.cache.get('genre', 'all')
+        if genres is not None:
+            return genres
+
         with Session(self.engine) as session:
             statement = select(Genre)
             genres = session.scalars(statement).all()
 
+        self.cache.put('genre', 'all', genres)
+        self.cache.put_entities('genre', genres)
         return genres
 
+    def get_genres_page(self, after_id: int = None, limit: int = PAGE_SIZE,
+                        sort_key: str = None, after_value=None) -> Sequence[Genre]:
+        """Получение страницы списка жанров после жанра с ID after_id
+        (after_value - значение столбца sort_key у этой записи, см. _page_statement)."""
+
+        genres = self.cache.get('genre', ('page', after_id, limit, sort_key, after_value))
+        if genres is not None:
+            return genres
+
+        with Session(self.engine) as session:
+            statement = self._page_statement(Genre, after_id, limit, sort_key, after_value)
+            genres = session.scalars(statement).all()
+
+        self.cache.put('genre', ('page', after_id, limit, sort_key, after_value), genres)
+        self.cache.put_entities('genre', genres)
+        return genres
+
+    def get_genre_rows(self, genre_ids: Sequence[int]) -> Sequence[Genre]:
+        """Получение жанров с заданными ID (в порядке возрастания ID)."""
+
+        with Session(self.engine) as session:
+            return session.scalars(select(Genre).where(Genre.id.in_(genre_ids)).order_by(Genre.id)).all()
+
     def get_genres(self, track_id: int) -> Sequence[Genre]:
         """Получение списка из жанров композиции по её ID."""
 
@@ -347,26 +976,123 @@ class MusicSession:
     def get_genre(self, genre_id: int) -> Genre:
         """Получение жанра по ID."""
 
+        genre = self.cache.get_entity('genre', genre_id)
+        if genre is not None:
+            return genre
+
         with Session(self.engine) as session:
             statement = select(Genre).where(Genre.id == genre_id)
             genre = session.scalars(statement).one()
 
+        self.cache.put_entities('genre', [genre])
         return genre
 
     def delete_genre(self, genre_id: int) -> (bool, str):
         """Удаление жанра по ID."""
 
+        return self.delete_genres([genre_id])
+
+    def delete_genres(self, genre_ids: Sequence[int]) -> (bool, str):
+        """Удаление нескольких жанров в одной транзакции."""
+
         if self.user is None or not self.user.is_admin:
             return False, 'Отказано в доступе'
 
-        # попытка удаления жанра
+        # попытка удаления жанров (связи с композициями удаляются каскадно средствами БД,
+        # поэтому композиции, у которых изменится список жанров, запрашиваются заранее)
         with Session(self.engine) as session:
             try:
-                genre = session.query(Genre).filter(Genre.id == genre_id).first()
-                session.delete(genre)
+                track_ids = session.scalars(
+                    select(track_to_genre.c.track_id).where(track_to_genre.c.genre_id.in_(genre_ids)).distinct()
+                ).all()
+                deleted_genre_ids = session.scalars(
+                    delete(Genre).where(Genre.id.in_(genre_ids)).returning(Genre.id)
+                ).all()
                 session.commit()
             except Exception as e:
                 session.rollback()
                 return False, e
             else:
+                self.cache.invalidate('genre')
+                self.notify('genre', 'delete', deleted_genre_ids)
+                self.notify('track', 'update', track_ids)
                 return True, 'Успех'
+
+    def search(self, query: str, limit: int = 50) -> list[SearchResult]:
+        """Полнотекстовый поиск по названиям композиций, альбомов, исполнителей, жанров
+        и описаниям исполнителей; результаты упорядочены по релевантности."""
+
+        # каждое слово запроса ищется как префикс, все слова должны присутствовать
+        words = re.findall(r'\w+', query)
+        if len(words) == 0:
+            return []
+        match = ' '.join(f'"{word}"*' for word in words)
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                text('SELECT kind, ref_id, name, description FROM catalog_search '
+                     'WHERE catalog_search MATCH :match ORDER BY rank LIMIT :limit'),
+                {'match': match, 'limit': limit}
+            ).all()
+
+        return [SearchResult(*row) for row in rows]
+
+    @staticmethod
+    def _page_statement(model, after_id: int = None, limit: int = None, sort_key: str = None,
+                        after_value=None) -> Select:
+        """Построение запроса страницы списка с курсором по ключу (keyset pagination).
+
+        Записи упорядочиваются по столбцу sort_key (по умолчанию - по ID), а затем по ID;
+        страница начинается сразу после курсора (after_value, after_id), где after_value -
+        значение sort_key у последней записи предыдущей страницы (None - NULL). Значение
+        передаётся в курсоре, а не запрашивается по ID: запись могла быть удалена. Строка
+        (например, из запроса HTTP) приводится к типу столбца. Записи со значением NULL
+        в столбце сортировки идут первыми."""
+
+        if sort_key is None:
+            sort_column = model.id
+        elif sort_key in model.__table__.columns:
+            sort_column = getattr(model, sort_key)
+        else:
+            raise ValueError(f'Недопустимый ключ сортировки: {sort_key}')
+
+        nullable = model.__table__.columns[sort_column.key].nullable
+
+        statement = select(model)
+
+        if after_id is not None:
+            if sort_key is None:
+                statement = statement.where(model.id > after_id)
+            else:
+                python_type = sort_column.type.python_type
+                if isinstance(after_value, str) and python_type is not str:
+                    if python_type in (date, datetime):
+                        after_value = python_type.fromisoformat(after_value)
+                    else:
+                        after_value = python_type(after_value)
+
+                cursor_column = sort_column
+                if python_type is datetime and after_value is not None:
+                    # отметки времени хранятся как с долями секунды, так и без них, поэтому
+                    # сравниваются в едином формате (с точностью до миллисекунд)
+                    cursor_column = func.strftime('%Y-%m-%d %H:%M:%f', sort_column)
+                    after_value = after_value.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+                if after_value is None:
+                    # после записи со значением NULL идут остальные записи с NULL (по ID)
+                    # и все записи со значениями
+                    condition = or_(sort_column.is_not(None), and_(sort_column.is_(None), model.id > after_id))
+                else:
+                    condition = or_(
+                        cursor_column > after_value,
+                        and_(cursor_column == after_value, model.id > after_id)
+                    )
+                statement = statement.where(condition)
+
+        # NULLS FIRST совпадает с порядком SQLite по умолчанию и не мешает использованию индекса
+        statement = statement.order_by(sort_column.nulls_first() if nullable else sort_column, model.id)
+
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        return statement
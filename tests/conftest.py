@@ -0,0 +1,75 @@
+import os
+import sys
+import random
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import User
+from session import MusicSession
+from blob_store import LocalBlobStore
+from benchmarks.generator import synthetic_mp3
+
+
+@pytest.fixture
+def session(tmp_path):
+    """Сессия администратора с БД SQLite и локальным хранилищем во временном каталоге."""
+
+    music_session = MusicSession(f'sqlite:///{tmp_path / "music.db"}',
+                                 blob_store=LocalBlobStore(str(tmp_path / 'audio')))
+    music_session.user = User(is_admin=True)
+
+    yield music_session
+
+    music_session.engine.dispose()
+
+
+@pytest.fixture
+def statements(session):
+    """Список SQL-запросов (с параметрами), выполняемых сессией; очищается тестом перед замером."""
+
+    executed = []
+
+    @event.listens_for(session.engine, 'before_cursor_execute')
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            executed.append((statement, parameters))
+
+    return executed
+
+
+def add_catalog(session: MusicSession, artists: int, albums_per_artist: int = 1, tracks_per_album: int = 1,
+                genres: int = 2) -> None:
+    """Заполнение каталога через методы сессии; у каждой композиции - все жанры."""
+
+    for i in range(genres):
+        assert session.add_genre(f'Genre {i}')[0]
+    genre_ids = [genre.id for genre in session.get_all_genres()]
+
+    for i in range(artists):
+        assert session.add_artist(f'Artist {i}', '')[0]
+    for artist in session.get_all_artists():
+        for i in range(albums_per_artist):
+            assert session.add_album(f'Album {artist.id}.{i}', date(2020, 1, 1), artist.id)[0]
+    for album in session.get_all_albums():
+        for i in range(tracks_per_album):
+            assert session.create_track(f'Track {album.id}.{i}', None, album.id, genre_ids)[0]
+
+
+def add_audio_tracks(session: MusicSession, directory, count: int) -> list:
+    """Добавление композиций с разными аудиофайлами (создаются в каталоге directory); возвращает композиции."""
+
+    assert session.add_artist('Audio artist', '')[0]
+    artist_id = max(artist.id for artist in session.get_all_artists())
+    assert session.add_album('Audio album', date(2020, 1, 1), artist_id)[0]
+    album_id = max(album.id for album in session.get_all_albums())
+
+    for i in range(count):
+        path = directory / f'{i}.mp3'
+        path.write_bytes(synthetic_mp3(1.0, random.Random(i)))
+        assert session.add_track(f'Audio track {i}', str(path), album_id, ())[0]
+
+    return [track for track in session.get_all_tracks() if track.album_id == album_id]
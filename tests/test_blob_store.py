@@ -0,0 +1,83 @@
+import io
+import gc
+import hashlib
+
+import pytest
+
+from blob_store import LocalBlobStore, CachedBlobStore
+from disk_cache import DiskCache
+from conftest import add_audio_tracks
+
+
+def test_release_deletes_blob_with_last_reference(tmp_path):
+    store = LocalBlobStore(str(tmp_path / 'audio'))
+
+    blob_id = store.put(io.BytesIO(b'audio data'), 'a.mp3')
+    assert store.put(io.BytesIO(b'audio data'), 'b.mp3') == blob_id
+    assert store.stat(blob_id).refcount == 2
+
+    assert not store.release(blob_id)
+    assert store.stat(blob_id).refcount == 1
+
+    assert store.release(blob_id)
+    assert store.stat(blob_id) is None
+    # удалённый файл не находится по SHA-256
+    assert store.acquire_by_hash(hashlib.sha256(b'audio data').hexdigest()) is None
+
+
+def test_dedup_report_counts_saved_bytes(tmp_path):
+    store = LocalBlobStore(str(tmp_path / 'audio'))
+    for name in ('a.mp3', 'b.mp3', 'c.mp3'):
+        store.put(io.BytesIO(b'x' * 100), name)
+    store.put(io.BytesIO(b'y' * 50), 'd.mp3')
+
+    report = store.dedup_report()
+
+    assert (report['files'], report['references']) == (2, 4)
+    assert (report['stored_bytes'], report['logical_bytes'], report['saved_bytes']) == (150, 350, 200)
+    assert report['dedup_ratio'] == 350 / 150
+
+
+@pytest.mark.parametrize('entity_type, events', [
+    ('track', [('track', 'delete')]),
+    ('album', [('track', 'delete'), ('album', 'delete')]),
+    ('artist', [('track', 'delete'), ('album', 'delete'), ('artist', 'delete')]),
+])
+def test_failed_release_does_not_abort_deletion(session, tmp_path, monkeypatch, entity_type, events):
+    track = add_audio_tracks(session, tmp_path, 1)[0]
+    entity_id = {'track': track.id, 'album': track.album_id,
+                 'artist': session.get_album(track.album_id).artist_id}[entity_type]
+    session.get_track_listing()  # список попадает в кэш и должен быть сброшен
+
+    changes = []
+    state_before_release = []
+
+    def release(blob_id):
+        # к освобождению файлов кэш уже сброшен, а подписчики уведомлены
+        state_before_release.append((list(changes), session.get_track_listing()))
+        raise OSError('Хранилище недоступно')
+
+    monkeypatch.setattr(session.blob_store, 'release', release)
+    monkeypatch.setattr(session.blob_store, 'release_many', lambda blob_ids: release(blob_ids[0]))
+    session.subscribe(changes.append)
+
+    assert getattr(session, f'delete_{entity_type}')(entity_id) == (True, 'Успех')
+
+    assert session.get_track_listing() == []
+    assert [(change.entity_type, change.op) for change in changes] == events
+    assert state_before_release == [(changes, [])]
+    # файл остаётся в хранилище до проверки согласованности
+    assert session.blob_store.stat(track.audio_id) is not None
+
+
+def test_range_stays_valid_after_file_is_closed_and_deleted(tmp_path):
+    store = LocalBlobStore(str(tmp_path / 'audio'))
+    blob_id = store.put(io.BytesIO(b'0123456789'), 'a.mp3')
+    cached_store = CachedBlobStore(store, DiskCache(str(tmp_path / 'cache'), 100))
+    cached_store.fill(blob_id)
+
+    ranges = [store.open_range(blob_id, 2, 3), cached_store.open_range(blob_id, 5, 3)]
+    assert store.release(blob_id)
+    gc.collect()
+
+    assert [bytes(data) for data in ranges] == [b'234', b'567']
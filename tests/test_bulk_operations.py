@@ -0,0 +1,126 @@
+import pytest
+
+from db import User
+from conftest import add_catalog, add_audio_tracks
+
+
+def track_albums(session) -> dict[int, int]:
+    """ID альбомов композиций по ID композиций."""
+
+    return {track.id: track.album_id for track in session.get_all_tracks()}
+
+
+def test_delete_albums_cascades_to_tracks(session):
+    add_catalog(session, 2, albums_per_artist=2, tracks_per_album=2)
+    album_ids = [album.id for album in session.get_all_albums()[:3]]
+    remaining_album = session.get_all_albums()[3]
+    deleted_track_ids = [track_id for track_id, album_id in track_albums(session).items() if album_id in album_ids]
+    changes = []
+    session.subscribe(changes.append)
+
+    assert session.delete_albums(album_ids) == (True, 'Успех')
+
+    assert [album.id for album in session.get_all_albums()] == [remaining_album.id]
+    assert set(track_albums(session).values()) == {remaining_album.id}
+    assert [(change.entity_type, change.op, set(change.ids)) for change in changes] == [
+        ('track', 'delete', set(deleted_track_ids)),
+        ('album', 'delete', set(album_ids)),
+    ]
+
+
+def test_delete_artists_cascades_to_albums_and_tracks(session):
+    add_catalog(session, 3, albums_per_artist=2, tracks_per_album=2)
+    artists = session.get_all_artists()
+
+    assert session.delete_artists([artists[0].id, artists[2].id]) == (True, 'Успех')
+
+    assert [artist.id for artist in session.get_all_artists()] == [artists[1].id]
+    albums = session.get_all_albums()
+    assert {album.artist_id for album in albums} == {artists[1].id}
+    assert set(track_albums(session).values()) == {album.id for album in albums}
+    assert len(session.get_track_listing()) == 4
+
+
+def test_delete_albums_releases_audio_files(session, tmp_path):
+    tracks = add_audio_tracks(session, tmp_path, 3)
+
+    assert session.delete_albums([tracks[0].album_id]) == (True, 'Успех')
+
+    assert all(session.blob_store.stat(track.audio_id) is None for track in tracks)
+
+
+def test_delete_genres_removes_only_links(session):
+    add_catalog(session, 1, tracks_per_album=3, genres=3)
+    genres = session.get_all_genres()
+    track_ids = [track.id for track in session.get_all_tracks()]
+    changes = []
+    session.subscribe(changes.append)
+
+    assert session.delete_genres([genres[0].id, genres[2].id]) == (True, 'Успех')
+
+    assert [track.id for track in session.get_all_tracks()] == track_ids
+    assert {row.genre_names for row in session.get_track_listing()} == {(genres[1].name,)}
+    assert [(change.entity_type, change.op, set(change.ids)) for change in changes] == [
+        ('genre', 'delete', {genres[0].id, genres[2].id}),
+        ('track', 'update', set(track_ids)),
+    ]
+
+
+def test_add_genres_to_tracks_keeps_existing_links(session):
+    add_catalog(session, 1, tracks_per_album=3, genres=1)
+    assert session.add_genre('New')[0]
+    old_genre, new_genre = session.get_all_genres()
+    track_ids = [track.id for track in session.get_all_tracks()]
+
+    # повторное добавление уже существующих связей не считается ошибкой
+    for _ in range(2):
+        assert session.add_genres_to_tracks(track_ids[:2], [old_genre.id, new_genre.id]) == (True, 'Успех')
+
+    genre_names = {row.id: set(row.genre_names) for row in session.get_track_listing()}
+    assert genre_names == {
+        track_ids[0]: {old_genre.name, new_genre.name},
+        track_ids[1]: {old_genre.name, new_genre.name},
+        track_ids[2]: {old_genre.name},
+    }
+
+
+def test_failed_bulk_update_is_rolled_back(session):
+    add_catalog(session, 1, tracks_per_album=2, genres=1)
+    genre = session.get_all_genres()[0]
+    assert session.add_genre('New')[0]
+    new_genre = session.get_all_genres()[1]
+    track_ids = [track.id for track in session.get_all_tracks()]
+
+    # несуществующий жанр нарушает внешний ключ, и ни одна связь не добавляется
+    success, _ = session.add_genres_to_tracks(track_ids, [new_genre.id, 1000])
+
+    assert not success
+    assert {row.genre_names for row in session.get_track_listing()} == {(genre.name,)}
+
+
+@pytest.mark.parametrize('operation, entity', [
+    ('delete_tracks', 'track'),
+    ('delete_albums', 'album'),
+    ('delete_artists', 'artist'),
+    ('delete_genres', 'genre'),
+])
+def test_bulk_delete_query_count_does_not_depend_on_selection_size(session, statements, operation, entity):
+    add_catalog(session, 6, tracks_per_album=2, genres=6)
+    ids = [row.id for row in getattr(session, f'get_all_{entity}s')()]
+
+    statements.clear()
+    assert getattr(session, operation)(ids[:1])[0]
+    single = len(statements)
+
+    statements.clear()
+    assert getattr(session, operation)(ids[1:])[0]
+    assert len(statements) == single
+
+
+@pytest.mark.parametrize('operation', ['delete_tracks', 'delete_albums', 'delete_artists', 'delete_genres'])
+def test_bulk_delete_is_denied_for_non_admin(session, operation):
+    add_catalog(session, 1)
+    session.user = User(is_admin=False)
+
+    assert getattr(session, operation)([1]) == (False, 'Отказано в доступе')
+    assert len(session.get_all_tracks()) == 1
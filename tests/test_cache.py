@@ -0,0 +1,44 @@
+from cache import LRUCache, CatalogCache
+from conftest import add_catalog
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' становится самой старой записью
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+
+
+def test_invalidation_clears_dependent_types():
+    cache = CatalogCache()
+    for entity_type in CatalogCache.ENTITY_TYPES:
+        cache.put(entity_type, 'all', [entity_type])
+
+    cache.invalidate('artist')
+
+    assert cache.get('artist', 'all') is None
+    assert cache.get('album', 'all') is None
+    assert cache.get('track', 'all') is None
+    assert cache.get('genre', 'all') == ['genre']
+
+
+def test_session_serves_repeated_reads_from_cache(session, statements):
+    add_catalog(session, 2)
+    session.cache = CatalogCache()
+
+    statements.clear()
+    albums = session.get_all_albums()
+    assert session.get_all_albums() is albums
+    assert len(statements) == 1
+    assert (session.cache.stats()['album']['hits'], session.cache.stats()['album']['misses']) == (1, 1)
+
+    # изменение исполнителей очищает кэш альбомов, содержащих имена исполнителей
+    assert session.add_artist('New artist', '')[0]
+    statements.clear()
+    assert session.get_all_albums() is not albums
+    assert len(statements) == 1
@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from db import User
+from session import MusicSession
+from blob_store import LocalBlobStore
+from changes import ChangeEvent, ChangeWatcher
+from conftest import add_catalog
+
+
+@pytest.fixture
+def other_session(session, tmp_path):
+    """Вторая сессия (другой клиент) с той же БД."""
+
+    music_session = MusicSession(str(session.engine.url), blob_store=LocalBlobStore(str(tmp_path / 'audio')))
+    music_session.user = User(is_admin=True)
+
+    yield music_session
+
+    music_session.engine.dispose()
+
+
+@pytest.fixture
+def watcher(session):
+    """ChangeWatcher сессии, проверки которого выполняются тестом."""
+
+    session.wait_until_ready()
+    change_watcher = ChangeWatcher(session)
+    session.change_watcher = change_watcher
+    return change_watcher
+
+
+def test_local_changes_are_not_repeated(session, watcher):
+    add_catalog(session, 1)
+    with session.engine.connect() as connection:
+        watcher.reset(connection)
+
+        assert session.add_genre('Local')[0]
+        track_id = session.get_all_tracks()[0].id
+        assert session.delete_tracks([track_id])[0]
+
+        assert watcher.poll(connection) == []
+
+
+def test_other_client_changes_are_reported(session, other_session, watcher):
+    add_catalog(session, 1)
+    with session.engine.connect() as connection:
+        watcher.reset(connection)
+
+        assert session.add_genre('Local')[0]
+        assert other_session.add_genre('Other')[0]
+        track_id = other_session.get_all_tracks()[0].id
+        assert other_session.delete_tracks([track_id])[0]
+
+        other_genre_id = max(genre.id for genre in other_session.get_all_genres())
+        assert watcher.poll(connection) == [ChangeEvent('track', 'delete', (track_id,)),
+                                            ChangeEvent('genre', 'insert', (other_genre_id,))]
+
+
+def test_changes_saved_before_reset_do_not_hide_later_changes(session, other_session, watcher):
+    add_catalog(session, 1)
+    genre_id = session.get_all_genres()[0].id
+    with session.engine.connect() as connection:
+        watcher.reset(connection)
+
+        time.sleep(0.01)  # отметка updated_at хранится с точностью до миллисекунды
+        with other_session.engine.begin() as other_connection:
+            other_connection.exec_driver_sql('UPDATE genre SET name = ? WHERE id = ?', ('Renamed', genre_id))
+
+        assert watcher.poll(connection) == [ChangeEvent('genre', 'update', (genre_id,))]
+
+
+def test_subscribers_receive_session_changes(session):
+    changes = []
+    session.subscribe(changes.append)
+
+    add_catalog(session, 1, genres=1)
+    genre_id = session.get_all_genres()[0].id
+    artist_id = session.get_all_artists()[0].id
+    album_id = session.get_all_albums()[0].id
+    track_id = session.get_all_tracks()[0].id
+    assert session.add_genre('New')[0]
+    new_genre_id = max(genre.id for genre in session.get_all_genres())
+    assert session.add_genres_to_tracks([track_id], [new_genre_id])[0]
+    assert not session.add_genres_to_tracks([track_id], [1000])[0]  # об отменённых изменениях не сообщается
+    session.unsubscribe(changes.append)
+    assert session.delete_genres([genre_id])[0]
+
+    assert changes == [
+        ChangeEvent('genre', 'insert', (genre_id,)),
+        ChangeEvent('artist', 'insert', (artist_id,)),
+        ChangeEvent('album', 'insert', (album_id,)),
+        ChangeEvent('track', 'insert', (track_id,)),
+        ChangeEvent('genre', 'insert', (new_genre_id,)),
+        ChangeEvent('track', 'update', (track_id,)),
+    ]
+
+
+def test_updated_rows_are_fetched_for_list_frames(session, other_session, watcher):
+    add_catalog(session, 2, genres=2)
+    album_id = session.get_all_albums()[1].id
+    artist_id = session.get_all_artists()[1].id
+    genre_id = session.get_all_genres()[1].id
+    with session.engine.connect() as connection:
+        watcher.reset(connection)
+
+        time.sleep(0.01)  # отметка updated_at хранится с точностью до миллисекунды
+        # изменение названий другим клиентом (у сессии нет методов редактирования)
+        with other_session.engine.begin() as other_connection:
+            for table, row_id in (('album', album_id), ('artist', artist_id), ('genre', genre_id)):
+                other_connection.exec_driver_sql(f'UPDATE {table} SET name = ? WHERE id = ?', ('Renamed', row_id))
+
+        assert watcher.poll(connection) == [ChangeEvent('genre', 'update', (genre_id,)),
+                                            ChangeEvent('artist', 'update', (artist_id,)),
+                                            ChangeEvent('album', 'update', (album_id,))]
+
+    # строки списков получаются с данными, нужными для отображения (исполнитель альбома)
+    albums = session.get_album_rows([album_id])
+    assert [(album.name, album.artist.name) for album in albums] == [('Renamed', 'Renamed')]
+    assert [artist.name for artist in session.get_artist_rows([artist_id])] == ['Renamed']
+    assert [genre.name for genre in session.get_genre_rows([genre_id])] == ['Renamed']
@@ -0,0 +1,104 @@
+import json
+import random
+
+import pytest
+
+import cli
+from benchmarks.generator import synthetic_mp3
+
+
+@pytest.fixture
+def run(session, capsys):
+    """Выполнение команды cli с сессией теста; возвращает код завершения и вывод команды."""
+
+    def run_command(*argv: str) -> tuple[int, str]:
+        args = cli.create_parser().parse_args(argv)
+        capsys.readouterr()
+        code = args.handler(session, args)
+        return code or 0, capsys.readouterr().out
+
+    return run_command
+
+
+def run_json(run, *argv: str):
+    """Выполнение команды cli, выводящей JSON."""
+
+    code, output = run(*argv)
+    return code, json.loads(output)
+
+
+def test_catalog_commands(run, tmp_path):
+    assert run_json(run, 'add-genre', 'Rock') == (0, {
+        'success': True, 'message': 'Успех',
+        'changes': [{'entity_type': 'genre', 'op': 'insert', 'ids': [1]}]
+    })
+    assert run_json(run, 'add-artist', 'Sunrise Band', '--description', 'Рок-группа')[0] == 0
+    assert run_json(run, 'add-album', 'First', '--artist-id', '1', '--release-date', '2020-01-01')[0] == 0
+
+    path = tmp_path / 'track.mp3'
+    path.write_bytes(synthetic_mp3(1.0, random.Random(0)))
+    assert run_json(run, 'add-track', 'Morning', str(path), '--album-id', '1')[0] == 0
+    code, result = run_json(run, 'assign-genres', '--track-id', '1', '--genre-id', '1')
+    assert (code, result['changes']) == (0, [{'entity_type': 'track', 'op': 'update', 'ids': [1]}])
+
+    code, tracks = run_json(run, 'list', 'tracks', '--sort', 'name')
+    assert (code, [(track['name'], track['genre_names']) for track in tracks]) == (0, [('Morning', ['Rock'])])
+    code, results = run_json(run, 'search', 'sunrise')
+    assert (code, [result['kind'] for result in results]) == (0, ['artist'])
+
+    assert run('export', '--output', str(tmp_path / 'catalog.json')) == (0, '')
+    catalog = json.loads((tmp_path / 'catalog.json').read_text(encoding='utf-8'))
+    assert {kind: len(entities) for kind, entities in catalog.items()} == {
+        'tracks': 1, 'albums': 1, 'artists': 1, 'genres': 1
+    }
+
+    code, result = run_json(run, 'delete', 'artists', '1')
+    assert code == 0
+    assert [(change['entity_type'], change['ids']) for change in result['changes']] == [
+        ('track', [1]), ('album', [1]), ('artist', [1])
+    ]
+    # повторное удаление не затрагивает ни одной записи, но не считается ошибкой
+    assert run_json(run, 'delete', 'artists', '1') == (0, {'success': True, 'message': 'Успех', 'changes': []})
+
+
+def test_user_commands(run, monkeypatch):
+    passwords = iter(['first password', 'second password'])
+    monkeypatch.setattr(cli, 'read_password', lambda: next(passwords))
+
+    code, result = run_json(run, 'add-user', 'alice', 'Alice', '--admin')
+    assert (code, result['success']) == (0, True)
+    # повторная регистрация с тем же логином отклоняется
+    monkeypatch.setattr(cli, 'read_password', lambda: 'password')
+    assert run_json(run, 'add-user', 'alice', 'Alice')[0] == 1
+    monkeypatch.setattr(cli, 'read_password', lambda: next(passwords))
+
+    code, users = run_json(run, 'list-users')
+    assert (code, [(user['login'], user['is_admin']) for user in users]) == (0, [('alice', True)])
+    assert 'password_hash' not in users[0]
+
+    assert run_json(run, 'set-admin', 'alice', '--revoke')[1]['success']
+    assert run_json(run, 'reset-password', 'alice')[1]['success']
+    assert run_json(run, 'delete-user', 'alice') == (0, {'success': True, 'message': 'Успех', 'changes': []})
+    assert run_json(run, 'list-users') == (0, [])
+
+
+def test_maintenance_commands(run, session, tmp_path):
+    source = tmp_path / 'library'
+    for i in range(2):
+        path = source / 'Artist' / 'Album' / f'{i} Track.mp3'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(synthetic_mp3(1.0, random.Random(i)))
+
+    code, output = run('import', str(source), '--processes', '1', '--upload-threads', '1')
+    assert code == 0 and 'Импорт завершён' in output
+    assert len(session.get_all_tracks()) == 2
+
+    code, output = run('backfill-audio-metadata')
+    assert (code, output) == (0, 'Обновлено композиций: 0\n')
+    assert run('audio-cache-stats') == (0, 'Дисковый кэш аудиофайлов не используется\n')
+
+    code, report = run_json(run, 'dedup-report')
+    assert (code, report['files']) == (0, 2)
+    code, report = run_json(run, 'fsck')
+    assert (code, report['blobs'], report['orphaned'], report['dangling']) == (0, 2, 0, 0)
+
@@ -0,0 +1,65 @@
+import io
+import os
+
+import pytest
+
+from disk_cache import DiskCache
+
+
+class FailingStream(io.BytesIO):
+    """Поток, чтение которого прерывается ошибкой после первой части."""
+
+    def read(self, size: int = -1) -> bytes:
+        if self.tell() > 0:
+            raise OSError('Ошибка чтения')
+        return super().read(size)
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=30)
+    for key in ('aa01', 'aa02', 'aa03'):
+        cache.put(key, io.BytesIO(b'x' * 10))
+
+    assert cache.get('aa01') is not None  # 'aa02' становится давно не использовавшимся
+    cache.put('aa04', io.BytesIO(b'x' * 10))
+
+    assert not cache.contains('aa02') and not os.path.exists(cache.path('aa02'))
+    assert all(cache.contains(key) for key in ('aa01', 'aa03', 'aa04'))
+    assert cache.stats()['bytes'] == 30 and cache.stats()['evictions'] == 1
+
+
+def test_put_replaces_file_atomically(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=100)
+    cache.put('bb01', io.BytesIO(b'old'))
+
+    with pytest.raises(OSError):
+        cache.put('bb01', FailingStream(b'new contents'), chunk_size=3)
+
+    # прерванная запись не затрагивает кэшированный файл и не оставляет временных файлов
+    with open(cache.get('bb01'), 'rb') as cached_file:
+        assert cached_file.read() == b'old'
+    assert os.listdir(cache.temp_dir) == []
+
+    cache.put('bb01', io.BytesIO(b'new contents'))
+    with open(cache.get('bb01'), 'rb') as cached_file:
+        assert cached_file.read() == b'new contents'
+    assert cache.stats()['bytes'] == len(b'new contents')
+
+
+def test_files_larger_than_cache_are_not_stored(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+
+    assert cache.put('cc01', io.BytesIO(b'x' * 11)) is None
+    assert not cache.contains('cc01') and os.listdir(cache.temp_dir) == []
+
+
+def test_cache_is_restored_after_restart(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=100)
+    cache.put('dd01', io.BytesIO(b'x' * 10))
+    with open(os.path.join(cache.temp_dir, 'unfinished'), 'wb') as temp_file:
+        temp_file.write(b'partial')
+
+    restarted = DiskCache(str(tmp_path), max_bytes=100)
+
+    assert restarted.contains('dd01') and restarted.stats()['bytes'] == 10
+    assert os.listdir(restarted.temp_dir) == []
@@ -0,0 +1,50 @@
+import io
+import time
+
+from conftest import add_audio_tracks
+
+
+def test_check_reports_orphans_and_dangling_references(session, tmp_path):
+    audio_ids = [track.audio_id for track in add_audio_tracks(session, tmp_path, 3)]
+    orphan_id = session.blob_store.put(io.BytesIO(b'orphan'), 'orphan.mp3')
+    with session.engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE track SET audio_id = 'missing' WHERE audio_id = ?", (audio_ids[0],))
+
+    report = session.check_consistency(batch_size=2)
+
+    assert report['blobs'] == 4 and report['referenced_blobs'] == 2
+    assert sorted(report['orphaned_ids']) == sorted([orphan_id, audio_ids[0]])
+    assert report['dangling_ids'] == ['missing']
+    assert report['deleted'] == 0
+
+
+def test_check_deletes_only_old_orphans(session, tmp_path):
+    audio_ids = [track.audio_id for track in add_audio_tracks(session, tmp_path, 2)]
+    orphan_id = session.blob_store.put(io.BytesIO(b'orphan'), 'orphan.mp3')
+
+    # файл моложе периода ожидания не удаляется: его композиция может ещё сохраняться
+    assert session.check_consistency(delete_orphans=True, grace_period=3600)['deleted'] == 0
+    assert session.blob_store.stat(orphan_id) is not None
+
+    report = session.check_consistency(delete_orphans=True, grace_period=-1)
+
+    assert report['deleted'] == 1 and report['deleted_bytes'] == len(b'orphan')
+    assert session.blob_store.stat(orphan_id) is None
+    assert all(session.blob_store.stat(audio_id) is not None for audio_id in audio_ids)
+
+
+def test_garbage_collector_deletes_orphans_in_background(session, tmp_path):
+    audio_ids = [track.audio_id for track in add_audio_tracks(session, tmp_path, 2)]
+    orphan_id = session.blob_store.put(io.BytesIO(b'orphan'), 'orphan.mp3')
+
+    collector = session.start_garbage_collector(pass_interval=60, grace_period=-1)
+    try:
+        deadline = time.monotonic() + 10
+        while collector.last_report is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        collector.stop()
+
+    assert collector.last_report['deleted'] == 1
+    assert session.blob_store.stat(orphan_id) is None
+    assert all(session.blob_store.stat(audio_id) is not None for audio_id in audio_ids)
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import event
+
+import config
+import passwords
+
+
+@pytest.fixture
+def user(session, monkeypatch):
+    """Пользователь с хешем пароля стоимостью 4; в настройках задана стоимость 5."""
+
+    monkeypatch.setattr(config, 'BCRYPT_ROUNDS', 4)
+    assert session.sign_up('login', 'password', 'User', '')[0]
+    monkeypatch.setattr(config, 'BCRYPT_ROUNDS', 5)
+    session.user = None
+
+
+def test_login_rehashes_password(session, user):
+    assert session.login('login', 'password') == (True, 'Успех')
+
+    assert passwords.get_rounds(session.user.password_hash) == 5
+    assert session.login('login', 'password')[0]
+
+
+def test_login_succeeds_when_rehash_fails(session, user):
+    @event.listens_for(session.engine, 'before_cursor_execute')
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE user '):
+            raise RuntimeError('Ошибка записи')
+
+    assert session.login('login', 'password') == (True, 'Успех')
+
+    assert not session.user.is_admin
+    assert passwords.get_rounds(session.user.password_hash) == 4
+
+
+def test_login_rejects_wrong_password(session, user):
+    assert session.login('login', 'wrong') == (False, 'Неверный пароль')
+    assert session.login('unknown', 'password') == (False, 'Неверный логин')
+    assert session.user is None
+
+
+def test_sign_up_rejects_duplicate_login(session, user):
+    assert session.sign_up('login', 'other', 'Other', '') == (False, 'Пользователь с данным логином уже существует')
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import inspect
+
+import migrations
+
+
+def test_failed_migration_is_rolled_back(session, monkeypatch):
+    session.wait_until_ready()
+    with session.engine.connect() as connection:
+        version = migrations.get_schema_version(connection)
+
+    def failing_migration(connection):
+        connection.exec_driver_sql('CREATE TABLE half_applied (id INTEGER PRIMARY KEY)')
+        connection.exec_driver_sql('ALTER TABLE genre ADD COLUMN half_applied INTEGER')
+        raise RuntimeError('Ошибка миграции')
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS + [(version + 1, '', failing_migration)])
+
+    with pytest.raises(RuntimeError):
+        migrations.upgrade(session.engine)
+
+    with session.engine.connect() as connection:
+        assert migrations.get_schema_version(connection) == version
+        inspector = inspect(connection)
+        assert not inspector.has_table('half_applied')
+        assert 'half_applied' not in {column['name'] for column in inspector.get_columns('genre')}
+        assert connection.exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
+
+
+def test_upgrade_is_idempotent(session):
+    session.wait_until_ready()
+    with session.engine.connect() as connection:
+        version = migrations.get_schema_version(connection)
+
+    assert version == migrations.MIGRATIONS[-1][0]
+    assert migrations.upgrade(session.engine) == version
@@ -0,0 +1,73 @@
+import pytest
+
+from conftest import add_catalog
+
+
+def walk_pages(get_page, limit: int, sort_key: str, after_page=None) -> list[int]:
+    """ID всех записей, полученных постранично; after_page вызывается с курсором после каждой страницы."""
+
+    ids = []
+    after_id = after_value = None
+    while True:
+        page = get_page(after_id=after_id, limit=limit, sort_key=sort_key, after_value=after_value)
+        ids.extend(entity.id for entity in page)
+        if len(page) < limit:
+            return ids
+        after_id = page[-1].id
+        after_value = getattr(page[-1], sort_key) if sort_key is not None else None
+        if after_page is not None:
+            after_page(after_id)
+
+
+def add_tracks(session) -> None:
+    """Пять композиций; у части из них сведения об аудиофайле не заполнены (NULL)."""
+
+    add_catalog(session, 1, tracks_per_album=5)
+    with session.engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE track SET filename = 'b.mp3', size = 10 WHERE id IN (2, 4)")
+        connection.exec_driver_sql("UPDATE track SET filename = 'a.mp3', size = 20 WHERE id = 5")
+    session.cache.invalidate('track')
+
+
+@pytest.mark.parametrize('sort_key', [None, 'name', 'filename', 'size'])
+def test_track_pages_cover_all_tracks(session, sort_key):
+    add_tracks(session)
+
+    ids = walk_pages(session.get_tracks_page, 2, sort_key)
+
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+    if sort_key == 'filename':
+        assert ids == [1, 3, 5, 2, 4]
+    if sort_key == 'size':
+        assert ids == [1, 3, 2, 4, 5]
+
+
+
+@pytest.mark.parametrize('sort_key, expected', [
+    (None, [1, 2, 3, 4, 5]),
+    ('name', [1, 2, 3, 4, 5]),
+    ('filename', [1, 3, 5, 2, 4]),  # курсор первой страницы - композиция 3 со значением NULL
+    ('size', [1, 3, 2, 4, 5]),
+])
+def test_pages_continue_after_cursor_row_is_deleted(session, sort_key, expected):
+    add_tracks(session)
+
+    deleted = []
+
+    def delete_cursor_row(after_id: int) -> None:
+        if len(deleted) == 0:
+            assert session.delete_tracks([after_id])[0]
+            deleted.append(after_id)
+
+    assert walk_pages(session.get_tracks_page, 2, sort_key, delete_cursor_row) == expected
+    assert walk_pages(session.get_track_listing, 2, sort_key) == [i for i in expected if i not in deleted]
+
+
+def test_album_pages_with_date_and_time_cursor(session):
+    add_catalog(session, 6)
+
+    for sort_key in ('release_date', 'created_at', 'updated_at'):
+        assert walk_pages(session.get_albums_page, 4, sort_key) == [1, 2, 3, 4, 5, 6]
+        assert walk_pages(lambda **kwargs: session.get_albums_page(**{
+            **kwargs, 'after_value': None if kwargs['after_value'] is None else str(kwargs['after_value'])
+        }), 4, sort_key) == [1, 2, 3, 4, 5, 6]
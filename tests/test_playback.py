@@ -0,0 +1,61 @@
+import io
+import time
+import threading
+
+from blob_store import LocalBlobStore
+from playback import Player, PlaybackItem, NullSink, RawFileSink
+
+
+class SlowBlobStore(LocalBlobStore):
+    """Хранилище, в котором range-запрос ждёт разрешения теста (как медленный удалённый backend)."""
+
+    def __init__(self, root: str) -> None:
+        super().__init__(root)
+        self.release_reads = threading.Event()
+
+    def open_range(self, blob_id: str, offset: int, length: int) -> bytes | memoryview:
+        self.release_reads.wait()
+        return super().open_range(blob_id, offset, length)
+
+
+def wait_for_event(player: Player, name: str) -> tuple:
+    """Ожидание события проигрывателя с заданным именем (предыдущие события пропускаются)."""
+
+    while True:
+        event = player.events.get(timeout=5)
+        if event[0] == name:
+            return event
+
+
+def test_raw_file_sink_writes_tracks_back_to_back(tmp_path):
+    store = LocalBlobStore(str(tmp_path / 'audio'))
+    data = [bytes([i]) * (1000 + i) for i in range(3)]
+    items = [PlaybackItem(store.put(io.BytesIO(d), f'{i}.mp3'), len(d), f'Track {i}') for i, d in enumerate(data)]
+
+    player = Player(store, RawFileSink(str(tmp_path / 'out.mp3')), buffer_size=256, prefetch_size=100,
+                    chunk_size=64)
+    player.play(items)
+    wait_for_event(player, 'finished')
+
+    assert (tmp_path / 'out.mp3').read_bytes() == b''.join(data)
+
+
+def test_stop_does_not_wait_for_slow_read(tmp_path):
+    store = SlowBlobStore(str(tmp_path / 'audio'))
+    audio_id = store.put(io.BytesIO(b'a' * 1000), 'a.mp3')
+    sink = NullSink()
+    player = Player(store, sink)
+
+    player.play([PlaybackItem(audio_id, 1000, 'Track')])
+    started = time.perf_counter()
+    player.stop()
+    assert time.perf_counter() - started < 0.5
+    assert player.is_playing()  # поток ещё ждёт ответа хранилища
+
+    # новое воспроизведение начинается только после завершения остановленного потока
+    player.play([PlaybackItem(audio_id, 1000, 'Track')])
+    store.release_reads.set()
+    assert wait_for_event(player, 'stopped') == ('stopped',)
+    wait_for_event(player, 'finished')
+    assert len(sink.tracks) == 1
+    assert sink.bytes_written == 1000
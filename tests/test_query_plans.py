@@ -0,0 +1,63 @@
+import pytest
+
+from changes import ChangeWatcher
+from conftest import add_catalog
+
+
+def watcher_changed_rows(session) -> None:
+    """Запрос изменённых записей, выполняемый ChangeWatcher при каждой проверке."""
+
+    watcher = ChangeWatcher(session)
+    with session.engine.connect() as connection:
+        watcher.reset(connection)
+        watcher.changed_rows(connection, 'track')
+
+
+# частые операции сессии; их SQL-запросы должны выполняться поиском по индексу
+OPERATIONS = {
+    'track_listing_page': lambda session: session.get_track_listing(after_id=3, limit=5),
+    'track_listing_sorted_page': lambda session: session.get_track_listing(after_id=3, limit=5, sort_key='name'),
+    'track_rows': lambda session: session.get_track_rows([1, 2]),
+    'track_audio_id': lambda session: session.get_track_audio_id(1),
+    'albums_sorted_page': lambda session: session.get_albums_page(after_id=2, limit=5, sort_key='name'),
+    'artists_sorted_page': lambda session: session.get_artists_page(after_id=2, limit=5, sort_key='name'),
+    'genres_sorted_page': lambda session: session.get_genres_page(after_id=1, limit=5, sort_key='name'),
+    'artist_albums': lambda session: session.get_albums(1),
+    'track_genres': lambda session: session.get_genres(1),
+    'search': lambda session: session.search('track album'),
+    'delete_genres': lambda session: session.delete_genres([1]),
+    'delete_artists': lambda session: session.delete_artists([1]),
+    'changed_rows': watcher_changed_rows,
+}
+
+
+def uses_index(plan: list[str]) -> bool:
+    """Проверка, что план не просматривает таблицу целиком и не сортирует результат отдельно."""
+
+    return all(
+        not (step.startswith('SCAN') and 'INDEX' not in step) and 'TEMP B-TREE' not in step
+        for step in plan
+    )
+
+
+@pytest.mark.parametrize('operation', OPERATIONS)
+def test_session_queries_use_indexes(session, statements, operation):
+    add_catalog(session, 3, albums_per_artist=2, tracks_per_album=3)
+    session.cache = type(session.cache)()
+
+    executed = []
+    statements.clear()
+    OPERATIONS[operation](session)
+    executed.extend(statements)
+
+    checked = 0
+    with session.engine.connect() as connection:
+        for statement, parameters in executed:
+            if not statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+
+            plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            assert uses_index(plan), f'{statement}\n{plan}'
+            checked += 1
+
+    assert checked != 0
@@ -0,0 +1,71 @@
+import asyncio
+
+from server import CatalogServer
+from conftest import add_audio_tracks
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                  headers: dict = None) -> tuple[int, dict]:
+    """Запрос без тела ответа (HEAD или ответ 304 Not Modified); возвращает код ответа и заголовки."""
+
+    lines = [f'{method} {path} HTTP/1.1', 'Host: localhost']
+    lines.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    response_headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(':')
+        if name:
+            response_headers[name.strip().lower()] = value.strip()
+    return int(head[0].split(' ')[1]), response_headers
+
+
+def request_etags(session, track_ids: list[int]) -> tuple[list[str], list[int]]:
+    """ETag аудиофайлов композиций и коды ответов на запросы с ETag первой композиции."""
+
+    async def run() -> tuple[list[str], list[int]]:
+        catalog_server = CatalogServer(session)
+        server = await catalog_server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        try:
+            etags, statuses = [], []
+            for track_id in track_ids:
+                status, headers = await request(reader, writer, 'HEAD', f'/tracks/{track_id}/audio')
+                assert status == 200
+                etags.append(headers['etag'])
+            for track_id in track_ids:
+                status, _ = await request(reader, writer, 'HEAD', f'/tracks/{track_id}/audio',
+                                          {'If-None-Match': etags[0]})
+                statuses.append(status)
+            return etags, statuses
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            catalog_server.close()
+
+    return asyncio.run(run())
+
+
+def test_audio_etag_is_content_hash(session, tmp_path):
+    track_ids = [track.id for track in add_audio_tracks(session, tmp_path, 2)]
+
+    etags, statuses = request_etags(session, track_ids)
+
+    assert etags == [f'"{session.blob_store.stat(session.get_track_audio_id(track_id)).sha256}"'
+                     for track_id in track_ids]
+    assert statuses == [304, 200]
+
+
+def test_audio_etag_without_content_hash(session, tmp_path, monkeypatch):
+    track_ids = [track.id for track in add_audio_tracks(session, tmp_path, 2)]
+
+    # файлы, сохранённые до подсчёта SHA-256
+    stat = session.blob_store.stat
+    monkeypatch.setattr(session.blob_store, 'stat', lambda blob_id: stat(blob_id)._replace(sha256=None))
+
+    etags, statuses = request_etags(session, track_ids)
+
+    assert len(set(etags)) == 2 and '"None"' not in etags
+    assert statuses == [304, 200]
@@ -0,0 +1,27 @@
+import pytest
+
+from conftest import add_catalog
+
+
+@pytest.mark.parametrize('artists', [1, 20])
+def test_track_listing_query_count_does_not_depend_on_catalog_size(session, statements, artists):
+    add_catalog(session, artists, albums_per_artist=2, tracks_per_album=5)
+
+    statements.clear()
+    rows = session.get_track_listing()
+
+    assert len(rows) == artists * 2 * 5
+    assert all(row.album_name and row.artist_name and len(row.genre_names) == 2 for row in rows)
+    # композиции с альбомами и исполнителями - одним запросом, жанры - ещё одним
+    assert len(statements) == 2
+
+
+def test_track_listing_page_query_count(session, statements):
+    add_catalog(session, 10, tracks_per_album=10)
+
+    statements.clear()
+    rows = session.get_track_listing(limit=session.PAGE_SIZE // 2, sort_key='name')
+
+    assert len(rows) == session.PAGE_SIZE // 2
+    assert len(statements) == 2
+
@@ -0,0 +1,104 @@
+import os
+import random
+
+import pytest
+
+import upload
+from upload import AudioUpload
+from blob_store import LocalBlobStore
+from benchmarks.generator import synthetic_mp3
+from conftest import add_catalog
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalBlobStore(str(tmp_path / 'audio'))
+
+
+@pytest.fixture
+def audio_path(tmp_path):
+    path = tmp_path / 'track.mp3'
+    path.write_bytes(os.urandom(10_000))
+    return str(path)
+
+
+def test_committed_blob_is_released_when_upload_fails(store, audio_path, monkeypatch):
+    def fail(*args):
+        raise OSError('read error')
+
+    monkeypatch.setattr(upload, 'read_mp3_info', fail)
+
+    audio_upload = AudioUpload(store, audio_path, chunk_size=1000)
+    audio_upload.run()
+
+    assert isinstance(audio_upload.error, OSError)
+    assert audio_upload.audio_id is None
+    assert list(store.iter_blobs()) == []
+
+
+def test_partial_write_is_aborted_when_upload_fails(store, audio_path, monkeypatch):
+    def fail(*args):
+        raise OSError('acquire error')
+
+    monkeypatch.setattr(store, 'acquire_by_hash', fail)
+
+    audio_upload = AudioUpload(store, audio_path, chunk_size=1000)
+    audio_upload.run()
+
+    assert isinstance(audio_upload.error, OSError)
+    assert os.listdir(store.temp_dir) == []
+    assert list(store.iter_blobs()) == []
+
+
+def test_cancel_after_completion_releases_blob(store, audio_path):
+    audio_upload = AudioUpload(store, audio_path)
+    audio_upload.run()
+    assert audio_upload.events.get_nowait() == ('progress', 10_000, 10_000)
+    assert audio_upload.events.get_nowait()[0] == 'done'
+
+    # окно закрыто до обработки события 'done'
+    audio_upload.cancel()
+
+    assert not audio_upload.claim()
+    assert list(store.iter_blobs()) == []
+
+
+def test_claimed_blob_is_kept_after_cancel(store, audio_path):
+    audio_upload = AudioUpload(store, audio_path)
+    audio_upload.run()
+
+    assert audio_upload.claim()
+    audio_upload.cancel()
+
+    assert [blob_stat.id for blob_stat in store.iter_blobs()] == [audio_upload.audio_id]
+
+
+def test_track_from_background_upload_stores_audio_metadata(session, tmp_path):
+    path = tmp_path / 'upload.mp3'
+    path.write_bytes(synthetic_mp3(2.0, random.Random(0)))
+    add_catalog(session, 1, tracks_per_album=0)
+
+    # тот же путь, что и в окне добавления композиции: фоновая загрузка, затем добавление
+    audio_upload = session.start_audio_upload(str(path))
+    audio_upload.join()
+    assert audio_upload.claim()
+    assert session.create_track_from_upload('Uploaded', audio_upload, 1, ())[0]
+
+    track = session.get_all_tracks()[0]
+    assert track.filename == 'upload.mp3'
+    assert track.size == path.stat().st_size
+    assert len(track.content_hash) == 64
+    assert track.duration == pytest.approx(2.0, abs=0.1)
+    assert track.bitrate == 128
+
+
+def test_denied_track_releases_uploaded_blob(session, audio_path):
+    add_catalog(session, 1, tracks_per_album=0)
+    audio_upload = session.start_audio_upload(audio_path)
+    audio_upload.join()
+    assert audio_upload.claim()
+
+    session.user.is_admin = False
+    assert session.create_track_from_upload('Denied', audio_upload, 1, ()) == (False, 'Отказано в доступе')
+
+    assert list(session.blob_store.iter_blobs()) == []
@@ -0,0 +1,145 @@
+import os
+import queue
+import hashlib
+import threading
+
+from blob_store import BlobStore
+from mp3 import read_mp3_info
+
+
+class AudioUpload(threading.Thread):
+    """Фоновая потоковая загрузка аудиофайла в хранилище.
+
+    Файл передаётся частями фиксированного размера, поэтому в памяти
+    одновременно находится не больше одной части. Во время передачи
+    вычисляется SHA-256 содержимого: если файл с таким же содержимым уже
+    сохранён, новая копия удаляется, а счётчик ссылок (refcount)
+    существующего файла увеличивается. После загрузки в audio_metadata
+    находятся сведения о файле для сохранения в таблице композиций.
+
+    О ходе загрузки поток сообщает через очередь событий events:
+    ('progress', загружено_байт, всего_байт), ('done', audio_id),
+    ('cancelled',) или ('error', исключение).
+
+    При ошибке или отмене сохранённый файл (или полученная ссылка на
+    существующий) освобождается. Получатель события 'done' должен вызвать
+    claim(): если загрузка была отменена уже после сохранения файла,
+    claim() вернёт False, а файл будет освобождён."""
+
+    def __init__(self, blob_store: BlobStore, audio_file_path: str,
+                 chunk_size: int = BlobStore.CHUNK_SIZE) -> None:
+        """Инициализация загрузки."""
+
+        super().__init__(daemon=True)
+
+        self.blob_store = blob_store
+        self.audio_file_path = audio_file_path
+        self.chunk_size = chunk_size
+
+        self.filename = os.path.basename(audio_file_path)
+        self.total_size = os.path.getsize(audio_file_path)
+        self.uploaded_size = 0
+
+        self.audio_id = None
+        self.audio_metadata = None
+        self.deduplicated = False
+        self.error = None
+
+        self.events = queue.Queue()
+        self.cancel_requested = threading.Event()
+
+        # завершение загрузки, отмена и получение результата согласуются под блокировкой
+        self.lock = threading.Lock()
+        self.finished = False
+        self.claimed = False
+
+    def cancel(self) -> None:
+        """Запрос отмены загрузки (в том числе уже завершённой, но не использованной)."""
+
+        with self.lock:
+            self.cancel_requested.set()
+            if self.finished and not self.claimed:
+                self.release()
+
+    def claim(self) -> bool:
+        """Получение сохранённого файла для добавления композиции.
+
+        Возвращает False, если загрузка не удалась или была отменена."""
+
+        with self.lock:
+            if self.cancel_requested.is_set() or self.audio_id is None:
+                return False
+            self.claimed = True
+            return True
+
+    def release(self) -> None:
+        """Освобождение сохранённого файла, не использованного композицией."""
+
+        if self.audio_id is not None:
+            audio_id, self.audio_id = self.audio_id, None
+            self.blob_store.release(audio_id)
+
+    def run(self) -> None:
+        """Загрузка файла."""
+
+        writer = None
+        try:
+            writer = self.blob_store.new_writer(self.filename)
+            content_hash = hashlib.sha256()
+
+            with open(self.audio_file_path, 'rb') as audio_file:
+                while chunk := audio_file.read(self.chunk_size):
+                    if self.cancel_requested.is_set():
+                        break
+
+                    writer.write(chunk)
+                    content_hash.update(chunk)
+                    self.uploaded_size += len(chunk)
+                    self.events.put(('progress', self.uploaded_size, self.total_size))
+
+            # при отмене уже записанные части файла удаляются
+            if self.cancel_requested.is_set():
+                writer.abort()
+                self.events.put(('cancelled',))
+                return
+
+            # сохранение файла или получение ссылки на уже сохранённый файл с таким же содержимым
+            sha256 = content_hash.hexdigest()
+            self.audio_id, self.deduplicated = self.blob_store.finish_write(writer, sha256)
+            writer = None
+
+            # длительность и битрейт определяются по заголовкам кадров без чтения всего файла
+            with open(self.audio_file_path, 'rb') as audio_file:
+                mp3_info = read_mp3_info(audio_file, self.total_size)
+
+            self.audio_metadata = {
+                'filename': self.filename,
+                'size': self.total_size,
+                'content_hash': sha256,
+                'duration': mp3_info.duration if mp3_info is not None else None,
+                'bitrate': mp3_info.bitrate if mp3_info is not None else None
+            }
+        except Exception as e:
+            # удаление незавершённой записи или освобождение уже сохранённого файла
+            if writer is not None:
+                try:
+                    writer.abort()
+                except Exception:
+                    pass
+            try:
+                self.release()
+            except Exception:
+                pass  # файл без ссылок будет удалён сборщиком мусора
+
+            self.error = e
+            self.events.put(('error', e))
+        else:
+            with self.lock:
+                self.finished = True
+                # отмена могла быть запрошена уже после сохранения файла
+                if self.cancel_requested.is_set():
+                    self.release()
+                    self.events.put(('cancelled',))
+                    return
+
+            self.events.put(('done', self.audio_id))